@@ -0,0 +1,368 @@
+# Copyright (c) 2026 Roger Light and others
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Eclipse Public License v2.0
+# and Eclipse Distribution License v1.0 which accompany this distribution.
+#
+# The Eclipse Public License is available at
+#    http://www.eclipse.org/legal/epl-v20.html
+# and the Eclipse Distribution License is available at
+#   http://www.eclipse.org/org/documents/edl-v10.php.
+
+"""
+This module provides `Aggregator`, which keeps rolling statistics of numeric
+values received on MQTT topics.
+
+Values are stored per topic in fixed size ring buffers, and the minimum,
+maximum, mean and rate of change over a sliding time window are maintained
+as samples arrive, so that querying them is O(1). Optionally, statistics over
+consecutive (tumbling) windows are kept as well.
+
+Example::
+
+    agg = Aggregator(window=10.0)
+    agg.attach(client, "everest/+/powermeter", field="power_W.total")
+    agg.attach(client, "everest/+/battery_temperature_C")
+    agg.series("everest/evse/powermeter", "power_W.total").add_trigger("on", lambda v: v > 0)
+    ...
+    stats = agg.series("everest/car/battery_temperature_C").stats()
+    assert stats.max < 60.0
+"""
+from __future__ import annotations
+
+import collections
+import json
+import math
+import threading
+from array import array
+from typing import Any, Callable, NamedTuple
+
+from . import client as paho
+from .client import time_func
+
+
+class WindowStats(NamedTuple):
+    """Statistics of the samples of a window. rate is the change of the value
+    per second between the first and last samples. Values are None when the
+    window has no samples, rate is None with less than two samples."""
+    count: int
+    min: float | None
+    max: float | None
+    mean: float | None
+    rate: float | None
+
+
+_EMPTY_STATS = WindowStats(0, None, None, None, None)
+
+
+def _rate(first_time: float, first: float, last_time: float, last: float) -> float | None:
+    if last_time <= first_time:
+        return None
+    return (last - first) / (last_time - first_time)
+
+
+class Series:
+    """Rolling statistics of the values of one topic.
+
+    The last `capacity` samples are kept in ring buffers; samples older than
+    `window` seconds are dropped. Minimum and maximum are maintained with
+    monotonic queues and the mean with a running sum, so all statistics are
+    updated in amortized O(1) per sample. Series may be updated and queried
+    from different threads.
+
+    :param float window: length of the sliding window in seconds.
+    :param int capacity: maximum number of samples kept. When full, the oldest
+        sample is dropped even if it is still in the window.
+    :param float tumbling: if set, also compute statistics over consecutive
+        windows of this length, available with `windows()`.
+    :param int history: number of completed tumbling windows kept.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        capacity: int = 1024,
+        tumbling: float | None = None,
+        history: int = 16,
+    ) -> None:
+        if window <= 0:
+            raise ValueError("window must be greater than 0")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.window = window
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Sequence numbers of the oldest sample and of the next sample
+        self._start = 0
+        self._end = 0
+        self._sum = 0.0
+        self._min: collections.deque[int] = collections.deque()
+        self._max: collections.deque[int] = collections.deque()
+        self._triggers: dict[str, tuple[Callable[[float], bool], list[float | None]]] = {}
+
+        self.tumbling = tumbling
+        self._windows: collections.deque[tuple[float, WindowStats]] = collections.deque(maxlen=history)
+        self._bucket: float | None = None
+        self._bucket_stats: list[Any] = []
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def _evict_oldest(self) -> None:
+        seq = self._start
+        self._sum -= self._values[seq % self.capacity]
+        if self._min and self._min[0] == seq:
+            self._min.popleft()
+        if self._max and self._max[0] == seq:
+            self._max.popleft()
+        self._start += 1
+        if self._start == self._end:
+            # Avoid accumulating rounding errors
+            self._sum = 0.0
+
+    def expire(self, now: float) -> None:
+        """Drop samples older than the window, relative to now."""
+        with self._lock:
+            self._expire(now)
+
+    def _expire(self, now: float) -> None:
+        limit = now - self.window
+        times = self._times
+        capacity = self.capacity
+        while self._start < self._end and times[self._start % capacity] <= limit:
+            self._evict_oldest()
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a sample. Timestamps must not decrease."""
+        with self._lock:
+            self._add(timestamp, value)
+
+    def _add(self, timestamp: float, value: float) -> None:
+        if self._end - self._start == self.capacity:
+            self._evict_oldest()
+        self._expire(timestamp)
+
+        seq = self._end
+        index = seq % self.capacity
+        values = self._values
+        self._times[index] = timestamp
+        values[index] = value
+        self._end += 1
+        self._sum += value
+
+        while self._min and values[self._min[-1] % self.capacity] >= value:
+            self._min.pop()
+        self._min.append(seq)
+        while self._max and values[self._max[-1] % self.capacity] <= value:
+            self._max.pop()
+        self._max.append(seq)
+
+        for predicate, matched in self._triggers.values():
+            if predicate(value):
+                if matched[0] is None:
+                    matched[0] = timestamp
+                matched[1] = timestamp
+
+        if self.tumbling is not None:
+            self._add_tumbling(timestamp, value)
+
+    def _add_tumbling(self, timestamp: float, value: float) -> None:
+        assert self.tumbling is not None
+        bucket = math.floor(timestamp / self.tumbling) * self.tumbling
+        stats = self._bucket_stats
+        if bucket != self._bucket:
+            if self._bucket is not None:
+                self._windows.append((self._bucket, self._tumbling_stats()))
+            self._bucket = bucket
+            # count, min, max, sum, first time, first value, last time, last value
+            stats[:] = [0, value, value, 0.0, timestamp, value, timestamp, value]
+        stats[0] += 1
+        if value < stats[1]:
+            stats[1] = value
+        if value > stats[2]:
+            stats[2] = value
+        stats[3] += value
+        stats[6] = timestamp
+        stats[7] = value
+
+    def _tumbling_stats(self) -> WindowStats:
+        count, vmin, vmax, total, first_time, first, last_time, last = self._bucket_stats
+        return WindowStats(count, vmin, vmax, total / count, _rate(first_time, first, last_time, last))
+
+    def add_trigger(self, name: str, predicate: Callable[[float], bool]) -> None:
+        """Record when values matching predicate are received.
+
+        The times of the first and of the last matching samples are then
+        available through `triggered()`. Only samples added after this call
+        are checked.
+        """
+        with self._lock:
+            self._triggers[name] = (predicate, [None, None])
+
+    def triggered(self, name: str) -> float | None:
+        """Return the time of the first sample that matched the trigger
+        name, or None."""
+        with self._lock:
+            return self._triggers[name][1][0]
+
+    def last_triggered(self, name: str) -> float | None:
+        """Return the time of the last sample that matched the trigger
+        name, or None."""
+        with self._lock:
+            return self._triggers[name][1][1]
+
+    @property
+    def last(self) -> float | None:
+        """The last value added, even if it has expired."""
+        with self._lock:
+            if self._end == 0:
+                return None
+            return self._values[(self._end - 1) % self.capacity]
+
+    def stats(self, now: float | None = None) -> WindowStats:
+        """Return the statistics of the sliding window ending at now.
+
+        :param float now: end of the window, defaults to the current time of
+            the monotonic clock used for `MQTTMessage.timestamp`.
+        """
+        with self._lock:
+            return self._stats(time_func() if now is None else now)
+
+    def _stats(self, now: float) -> WindowStats:
+        self._expire(now)
+        count = self._end - self._start
+        if count == 0:
+            return _EMPTY_STATS
+        capacity = self.capacity
+        values = self._values
+        times = self._times
+        first = self._start % capacity
+        last = (self._end - 1) % capacity
+        return WindowStats(
+            count,
+            values[self._min[0] % capacity],
+            values[self._max[0] % capacity],
+            self._sum / count,
+            _rate(times[first], values[first], times[last], values[last]),
+        )
+
+    def windows(self) -> list[tuple[float, WindowStats]]:
+        """Return the completed tumbling windows, oldest first, as
+        (start time, statistics)."""
+        with self._lock:
+            return list(self._windows)
+
+    def current_window(self) -> tuple[float, WindowStats] | None:
+        """Return the tumbling window in progress, as (start time, statistics)."""
+        with self._lock:
+            if self._bucket is None:
+                return None
+            return self._bucket, self._tumbling_stats()
+
+
+def _parse_value(payload: bytes, field: str | None) -> float | None:
+    if field is None:
+        # Most telemetry payloads are a bare number, avoid the JSON parser
+        try:
+            return float(payload)
+        except ValueError:
+            pass
+    try:
+        value = json.loads(payload)
+    except ValueError:
+        return None
+    if field is not None:
+        for part in field.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return None
+            value = value[part]
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+class Aggregator:
+    """Rolling statistics of numeric values received on topics.
+
+    Use `attach()` to feed the aggregator from the messages received by a
+    client. A `Series` is created for each topic (and field) when its first
+    value is received, with the parameters given here.
+
+    Payloads must be a JSON number, or a JSON object when a field is given
+    to `attach()`. Other messages are counted in `errors` and ignored.
+
+    :param float window: see `Series`.
+    :param int capacity: see `Series`.
+    :param float tumbling: see `Series`.
+    :param int history: see `Series`.
+    """
+
+    def __init__(
+        self,
+        window: float = 10.0,
+        capacity: int = 1024,
+        tumbling: float | None = None,
+        history: int = 16,
+    ) -> None:
+        self._params = (window, capacity, tumbling, history)
+        self._series: dict[tuple[str, str | None], Series] = {}
+        self._lock = threading.Lock()
+        self.errors = 0
+
+    def attach(self, client: paho.Client, sub: str, field: str | None = None) -> None:
+        """Aggregate the values of messages received by client on topics
+        matching sub, with `Client.message_callback_add()`.
+
+        :param str field: dotted path of the value in a JSON object payload,
+            e.g. "power_W.total". If None, the payload must be a number.
+        """
+        def callback(client: paho.Client, userdata: Any, message: paho.MQTTMessage) -> None:
+            self.on_message(message, field)
+
+        client.message_callback_add(sub, callback)
+
+    def detach(self, client: paho.Client, sub: str) -> None:
+        """Stop aggregating messages matching sub."""
+        client.message_callback_remove(sub)
+
+    def on_message(self, message: paho.MQTTMessage, field: str | None = None) -> None:
+        """Add the value of message."""
+        value = _parse_value(message.payload, field)
+        if value is None:
+            # Callbacks may run in several threads, see MessageDispatcher
+            with self._lock:
+                self.errors += 1
+            return
+        timestamp = message.timestamp or time_func()
+        self.add(message.topic, timestamp, value, field)
+
+    def add(self, topic: str, timestamp: float, value: float, field: str | None = None) -> None:
+        """Add a sample to the series of topic and field."""
+        with self._lock:
+            series = self._series.get((topic, field))
+            if series is None:
+                series = self._series[(topic, field)] = Series(*self._params)
+        series.add(timestamp, value)
+
+    def series(self, topic: str, field: str | None = None) -> Series:
+        """Return the series of topic and field, creating it if needed."""
+        with self._lock:
+            series = self._series.get((topic, field))
+            if series is None:
+                series = self._series[(topic, field)] = Series(*self._params)
+            return series
+
+    def stats(self, topic: str, field: str | None = None, now: float | None = None) -> WindowStats:
+        """Return the sliding window statistics of topic and field."""
+        with self._lock:
+            series = self._series.get((topic, field))
+        if series is None:
+            return _EMPTY_STATS
+        return series.stats(now)
+
+    def topics(self) -> list[tuple[str, str | None]]:
+        """Return the (topic, field) pairs that have a series."""
+        with self._lock:
+            return list(self._series)
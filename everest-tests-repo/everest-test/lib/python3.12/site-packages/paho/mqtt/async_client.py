@@ -0,0 +1,356 @@
+# Copyright (c) 2026 Roger Light and others
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Eclipse Public License v2.0
+# and Eclipse Distribution License v1.0 which accompany this distribution.
+#
+# The Eclipse Public License is available at
+#    http://www.eclipse.org/legal/epl-v20.html
+# and the Eclipse Distribution License is available at
+#   http://www.eclipse.org/org/documents/edl-v10.php.
+
+"""
+This module provides `AsyncClient`, which runs a `paho.mqtt.client.Client`
+on an asyncio event loop instead of a dedicated network thread.
+
+The socket of the wrapped client is registered with the event loop using
+``add_reader()``/``add_writer()``, and the existing `Client.loop_read()`,
+`Client.loop_write()` and `Client.loop_misc()` functions are called when the
+socket is ready. No thread and no wake-up socketpair are created.
+
+Example::
+
+    async with AsyncClient() as client:
+        await client.connect("localhost")
+        await client.subscribe("everest/#")
+        async for message in client.messages():
+            print(message.topic, message.payload)
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator
+
+from .. import mqtt
+from . import client as paho
+from .enums import CallbackAPIVersion, MQTTErrorCode, MQTTProtocolVersion
+from .packettypes import PacketTypes
+from .properties import Properties
+from .reasoncodes import ReasonCode
+from .subscribeoptions import SubscribeOptions
+
+try:
+    from typing import Literal
+except ImportError:
+    from typing_extensions import Literal  # type: ignore
+
+
+class AsyncClient:
+    """MQTT client driven by an asyncio event loop.
+
+    The constructor arguments are the same as `paho.mqtt.client.Client`, except
+    that the callback API version is always VERSION2. The wrapped client is
+    available as `client`, for example to call `tls_set()` or
+    `username_pw_set()` before connecting.
+
+    The on_connect, on_disconnect, on_message, on_publish, on_subscribe,
+    on_unsubscribe and on_socket_* callbacks of the wrapped client are used by
+    this class and must not be replaced. Topic specific callbacks added with
+    `Client.message_callback_add()` still work as usual; such messages are not
+    returned by `messages()`.
+
+    :param int queue_size: maximum number of received messages waiting to be
+        consumed from `messages()`. 0 (the default) means unlimited. When the
+        queue is full new messages are dropped and counted in `dropped_messages`.
+    :param float misc_interval: how often, in seconds, `Client.loop_misc()`
+        is run to handle keepalive.
+    """
+
+    def __init__(
+        self,
+        client_id: str | None = "",
+        clean_session: bool | None = None,
+        userdata: Any = None,
+        protocol: MQTTProtocolVersion = paho.MQTTv311,
+        transport: Literal["tcp", "websockets", "unix"] = "tcp",
+        manual_ack: bool = False,
+        queue_size: int = 0,
+        misc_interval: float = 1.0,
+    ) -> None:
+        self._client = paho.Client(
+            CallbackAPIVersion.VERSION2,
+            client_id=client_id,
+            clean_session=clean_session,
+            userdata=userdata,
+            protocol=protocol,
+            transport=transport,
+            reconnect_on_failure=False,
+            manual_ack=manual_ack,
+        )
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._misc_interval = misc_interval
+        self._misc_task: asyncio.Task[None] | None = None
+        self._queue_size = queue_size
+        self._messages: asyncio.Queue[paho.MQTTMessage | None] | None = None
+        self._connect_future: asyncio.Future[ReasonCode] | None = None
+        self._disconnect_future: asyncio.Future[ReasonCode] | None = None
+        self._pending: dict[int, asyncio.Future[Any]] = {}
+        self.dropped_messages = 0
+        """Number of received messages dropped because the queue was full."""
+
+        self._client.on_connect = self._on_connect
+        self._client.on_disconnect = self._on_disconnect
+        self._client.on_message = self._on_message
+        self._client.on_publish = self._on_publish
+        self._client.on_subscribe = self._on_subscribe
+        self._client.on_unsubscribe = self._on_unsubscribe
+        self._client.on_socket_open = self._on_socket_open
+        self._client.on_socket_close = self._on_socket_close
+        self._client.on_socket_register_write = self._on_socket_register_write
+        self._client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    @property
+    def client(self) -> paho.Client:
+        """The wrapped `paho.mqtt.client.Client`."""
+        return self._client
+
+    async def __aenter__(self) -> AsyncClient:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._client.is_connected():
+            await self.disconnect()
+        self._stop_misc()
+
+    async def connect(
+        self,
+        host: str,
+        port: int = 1883,
+        keepalive: int = 60,
+        bind_address: str = "",
+        bind_port: int = 0,
+        clean_start: paho.CleanStartOption = paho.MQTT_CLEAN_START_FIRST_ONLY,
+        properties: Properties | None = None,
+    ) -> ReasonCode:
+        """Connect to a broker and wait for its CONNACK.
+
+        The arguments are the same as `Client.connect()`. The blocking TCP
+        (and TLS) connection setup is run in the default executor.
+
+        Returns the reason code of the CONNACK.
+
+        :raises MQTTException: if the broker refused the connection.
+        :raises OSError: if the connection could not be established.
+        """
+        self._loop = asyncio.get_running_loop()
+        if self._messages is None:
+            # The queue itself is unbounded, queue_size is enforced in
+            # _on_message() so the end-of-stream marker always fits.
+            self._messages = asyncio.Queue()
+        self._connect_future = self._loop.create_future()
+
+        await self._loop.run_in_executor(
+            None,
+            lambda: self._client.connect(
+                host, port, keepalive, bind_address, bind_port, clean_start, properties,
+            ),
+        )
+        if self._misc_task is None:
+            self._misc_task = self._loop.create_task(self._misc_loop())
+
+        reason_code = await self._connect_future
+        if reason_code.is_failure:
+            raise mqtt.MQTTException(paho.connack_string(reason_code))
+        return reason_code
+
+    async def disconnect(
+        self,
+        reasoncode: ReasonCode | None = None,
+        properties: Properties | None = None,
+    ) -> ReasonCode:
+        """Disconnect from the broker and wait until the connection is closed.
+
+        Returns the reason code passed to on_disconnect.
+        """
+        if self._loop is None:
+            raise RuntimeError("Client is not connected")
+        self._disconnect_future = self._loop.create_future()
+        rc = self._client.disconnect(reasoncode, properties)
+        if rc == MQTTErrorCode.MQTT_ERR_NO_CONN:
+            self._disconnect_future = None
+            return ReasonCode(PacketTypes.DISCONNECT)
+        try:
+            return await self._disconnect_future
+        finally:
+            self._stop_misc()
+
+    async def publish(
+        self,
+        topic: str,
+        payload: paho.PayloadType = None,
+        qos: int = 0,
+        retain: bool = False,
+        properties: Properties | None = None,
+    ) -> paho.MQTTMessageInfo:
+        """Publish a message and wait until on_publish is called for it.
+
+        For QoS 0 this means the message was written to the socket, for QoS 1
+        and 2 that the broker acknowledged it. The arguments are the same as
+        `Client.publish()`.
+
+        :raises RuntimeError: if the message could not be queued.
+        """
+        info = self._client.publish(topic, payload, qos, retain, properties)
+        # QoS > 0 messages are kept and sent once connected, QoS 0 are lost.
+        if info.rc != MQTTErrorCode.MQTT_ERR_SUCCESS and not (
+            info.rc == MQTTErrorCode.MQTT_ERR_NO_CONN and qos > 0
+        ):
+            raise RuntimeError(f"Message publish failed: {paho.error_string(info.rc)}")
+        if not info.is_published():
+            await self._wait_for(info.mid)
+        return info
+
+    async def subscribe(
+        self,
+        topic: str | tuple[str, int] | tuple[str, SubscribeOptions] | list[tuple[str, int]] | list[tuple[str, SubscribeOptions]],
+        qos: int = 0,
+        options: SubscribeOptions | None = None,
+        properties: Properties | None = None,
+    ) -> list[ReasonCode]:
+        """Subscribe to one or more topics and wait for the SUBACK.
+
+        The arguments are the same as `Client.subscribe()`. Returns the list
+        of reason codes from the SUBACK.
+        """
+        rc, mid = self._client.subscribe(topic, qos, options, properties)
+        if rc != MQTTErrorCode.MQTT_ERR_SUCCESS or mid is None:
+            raise RuntimeError(f"Subscribe failed: {paho.error_string(rc)}")
+        return await self._wait_for(mid)  # type: ignore[no-any-return]
+
+    async def unsubscribe(
+        self, topic: str | list[str], properties: Properties | None = None
+    ) -> list[ReasonCode]:
+        """Unsubscribe from one or more topics and wait for the UNSUBACK.
+
+        Returns the list of reason codes from the UNSUBACK (always empty for
+        MQTT v3.x).
+        """
+        rc, mid = self._client.unsubscribe(topic, properties)
+        if rc != MQTTErrorCode.MQTT_ERR_SUCCESS or mid is None:
+            raise RuntimeError(f"Unsubscribe failed: {paho.error_string(rc)}")
+        return await self._wait_for(mid)  # type: ignore[no-any-return]
+
+    async def messages(self) -> AsyncIterator[paho.MQTTMessage]:
+        """Iterate over received messages as they arrive.
+
+        The iteration stops once the client is disconnected.
+        """
+        if self._messages is None:
+            raise RuntimeError("Client is not connected")
+        while True:
+            message = await self._messages.get()
+            if message is None:
+                return
+            yield message
+
+    def _wait_for(self, mid: int) -> asyncio.Future[Any]:
+        if self._loop is None:
+            raise RuntimeError("Client is not connected")
+        future = self._loop.create_future()
+        self._pending[mid] = future
+        return future
+
+    def _resolve(self, mid: int, result: Any) -> None:
+        future = self._pending.pop(mid, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    async def _misc_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._misc_interval)
+            self._client.loop_misc()
+
+    def _stop_misc(self) -> None:
+        if self._misc_task is not None:
+            self._misc_task.cancel()
+            self._misc_task = None
+
+    def _call_in_loop(self, func: Any, *args: Any) -> None:
+        # Socket callbacks are called from the executor thread while
+        # connecting, everything else runs on the event loop thread.
+        assert self._loop is not None
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            func(*args)
+        else:
+            self._loop.call_soon_threadsafe(func, *args)
+
+    def _do_read(self) -> None:
+        sock = self._client.socket()
+        self._client.loop_read()
+        # A SSL socket may still have decrypted data that the selector does
+        # not know about.
+        if sock is not None and sock is self._client.socket() and getattr(sock, "pending", lambda: 0)() > 0:
+            assert self._loop is not None
+            self._loop.call_soon(self._do_read)
+
+    def _do_write(self) -> None:
+        self._client.loop_write()
+
+    def _on_socket_open(self, client: paho.Client, userdata: Any, sock: paho.SocketLike) -> None:
+        self._call_in_loop(self._loop.add_reader, sock, self._do_read)  # type: ignore[union-attr]
+
+    def _on_socket_close(self, client: paho.Client, userdata: Any, sock: paho.SocketLike) -> None:
+        self._call_in_loop(self._loop.remove_reader, sock)  # type: ignore[union-attr]
+
+    def _on_socket_register_write(self, client: paho.Client, userdata: Any, sock: paho.SocketLike) -> None:
+        self._call_in_loop(self._loop.add_writer, sock, self._do_write)  # type: ignore[union-attr]
+
+    def _on_socket_unregister_write(self, client: paho.Client, userdata: Any, sock: paho.SocketLike) -> None:
+        self._call_in_loop(self._loop.remove_writer, sock)  # type: ignore[union-attr]
+
+    def _on_connect(
+        self, client: paho.Client, userdata: Any, flags: paho.ConnectFlags, reason_code: ReasonCode, properties: Properties | None,
+    ) -> None:
+        if self._connect_future is not None and not self._connect_future.done():
+            self._connect_future.set_result(reason_code)
+
+    def _on_disconnect(
+        self, client: paho.Client, userdata: Any, flags: paho.DisconnectFlags, reason_code: ReasonCode, properties: Properties | None,
+    ) -> None:
+        if self._connect_future is not None and not self._connect_future.done():
+            self._connect_future.set_exception(mqtt.MQTTException(f"Connection lost: {reason_code}"))
+        if self._disconnect_future is not None and not self._disconnect_future.done():
+            self._disconnect_future.set_result(reason_code)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"Connection lost: {reason_code}"))
+        self._pending.clear()
+        if self._messages is not None:
+            # Wake up messages() so the iteration stops
+            self._messages.put_nowait(None)
+
+    def _on_message(self, client: paho.Client, userdata: Any, message: paho.MQTTMessage) -> None:
+        assert self._messages is not None
+        if self._queue_size > 0 and self._messages.qsize() >= self._queue_size:
+            self.dropped_messages += 1
+        else:
+            self._messages.put_nowait(message)
+
+    def _on_publish(
+        self, client: paho.Client, userdata: Any, mid: int, reason_code: ReasonCode, properties: Properties,
+    ) -> None:
+        self._resolve(mid, reason_code)
+
+    def _on_subscribe(
+        self, client: paho.Client, userdata: Any, mid: int, reason_codes: list[ReasonCode], properties: Properties | None,
+    ) -> None:
+        self._resolve(mid, reason_codes)
+
+    def _on_unsubscribe(
+        self, client: paho.Client, userdata: Any, mid: int, reason_codes: list[ReasonCode], properties: Properties | None,
+    ) -> None:
+        self._resolve(mid, reason_codes)
@@ -41,9 +41,10 @@ from paho.mqtt.packettypes import PacketTypes
 
 from .enums import CallbackAPIVersion, ConnackCode, LogLevel, MessageState, MessageType, MQTTErrorCode, MQTTProtocolVersion, PahoClientMode, _ConnectionState
 from .matcher import MQTTMatcher
-from .properties import Properties
+from .properties import Properties, VariableByteIntegers
 from .reasoncodes import ReasonCode, ReasonCodes
 from .subscribeoptions import SubscribeOptions
+from .timers import TimerWheel
 
 try:
     from typing import Literal
@@ -61,15 +62,14 @@ if TYPE_CHECKING:
     except ImportError:
         from typing_extensions import Protocol  # type: ignore
 
+    from .dispatch import MessageDispatcher
+    from .metrics import ClientMetrics
+    from .persistence import MessagePersistence
+
     class _InPacket(TypedDict):
         command: int
-        have_remaining: int
-        remaining_count: list[int]
-        remaining_mult: int
         remaining_length: int
-        packet: bytearray
-        to_process: int
-        pos: int
+        packet: bytes
 
 
     class _OutPacket(TypedDict):
@@ -210,6 +210,28 @@ MQTT_CLEAN_START_FIRST_ONLY: CleanStartOption = 3
 
 sockpair_data = b"0"
 
+# Size of the blocks read from the socket into the receive buffer. Several
+# small packets are usually received with a single recv() of this size.
+_READ_BUFFER_SIZE = 65536
+
+# Resolution of the client timers, and their keys
+_TIMER_TICK = 0.1
+_TIMER_KEEPALIVE = 0
+_TIMER_PINGRESP = 1
+_TIMER_RECONNECT = 2
+
+_UINT16 = struct.Struct("!H")
+
+# Topic Alias property identifier, for topic aliases added to packed properties
+_TOPIC_ALIAS = b"\x23"
+
+# Limits on the number of queued packets, and of bytes, sent together by a
+# single write. Small packets are gathered with socket.sendmsg() when
+# available.
+_WRITE_MAX_PACKETS = 512
+_WRITE_BUFFER_SIZE = 65536
+_HAVE_SENDMSG = hasattr(socket.socket, "sendmsg")
+
 # Payload support all those type and will be converted to bytes:
 # * str are utf8 encoded
 # * int/float are converted to string and utf8 encoded (e.g. 1 is converted to b"1")
@@ -260,6 +282,7 @@ CallbackOnDisconnect_v2 = Callable[["Client", Any, DisconnectFlags, ReasonCode,
 CallbackOnDisconnect = Union[CallbackOnDisconnect_v1, CallbackOnDisconnect_v2]
 CallbackOnLog = Callable[["Client", Any, int, str], None]
 CallbackOnMessage = Callable[["Client", Any, "MQTTMessage"], None]
+CallbackOnMessageBatch = Callable[["Client", Any, List["MQTTMessage"]], None]
 CallbackOnPreConnect = Callable[["Client", Any], None]
 CallbackOnPublish_v1 = Callable[["Client", Any, int], None]
 CallbackOnPublish_v2 = Callable[["Client", Any, int, ReasonCode, Properties], None]
@@ -504,6 +527,15 @@ class MQTTMessageInfo:
     def __str__(self) -> str:
         return str((self.rc, self.mid))
 
+    def __getstate__(self) -> dict[str, Any]:
+        # The condition can't be pickled or copied, a new one is created
+        return {name: getattr(self, name) for name in self.__slots__ if name != '_condition'}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._condition = threading.Condition()
+
     def __iter__(self) -> Iterator[MQTTErrorCode | int]:
         self._iterpos = 0
         return self
@@ -586,7 +618,7 @@ class MQTTMessage:
     """ This is a class that describes an incoming message. It is
     passed to the `on_message` callback as the message parameter.
     """
-    __slots__ = 'timestamp', 'state', 'dup', 'mid', '_topic', 'payload', 'qos', 'retain', 'info', 'properties'
+    __slots__ = 'timestamp', 'state', 'dup', 'mid', '_topic', '_payload', 'qos', 'retain', 'info', 'properties'
 
     def __init__(self, mid: int = 0, topic: bytes = b""):
         self.timestamp = 0.0
@@ -594,9 +626,8 @@ class MQTTMessage:
         self.dup = False
         self.mid = mid
         """ The message id (int)."""
-        self._topic = topic
-        self.payload = b""
-        """the message payload (bytes)"""
+        self._topic: bytes | memoryview = topic
+        self._payload: bytes | bytearray | memoryview = b""
         self.qos = 0
         """ The message Quality of Service (0, 1 or 2)."""
         self.retain = False
@@ -615,18 +646,107 @@ class MQTTMessage:
         """Define a non-equality test"""
         return not self.__eq__(other)
 
+    def __getstate__(self) -> dict[str, Any]:
+        # Topic and payload of received messages are views of the network
+        # buffer, which can't be pickled or copied
+        state = {name: getattr(self, name) for name in self.__slots__}
+        if isinstance(self._topic, memoryview):
+            state['_topic'] = self._topic.tobytes()
+        if isinstance(self._payload, memoryview):
+            state['_payload'] = self._payload.tobytes()
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+
     @property
     def topic(self) -> str:
         """topic that the message was published on.
 
         This property is read-only.
         """
-        return self._topic.decode('utf-8')
+        return str(self._topic, 'utf-8')
 
     @topic.setter
-    def topic(self, value: bytes) -> None:
+    def topic(self, value: bytes | memoryview) -> None:
         self._topic = value
 
+    @property
+    def payload(self) -> bytes:
+        """the message payload (bytes)
+
+        For received messages the payload is kept as a view of the network
+        packet and only copied to bytes the first time it is read, which
+        also releases the packet.
+        """
+        payload = self._payload
+        if isinstance(payload, memoryview):
+            payload = self._payload = payload.tobytes()
+        return payload  # type: ignore[return-value]
+
+    @payload.setter
+    def payload(self, value: bytes | bytearray | memoryview) -> None:
+        self._payload = value
+
+
+class PublishTemplate:
+    """A publish to a fixed topic, with fixed QoS, retain flag and properties,
+    returned by `Client.prepared_publish()`.
+
+    The topic and the MQTT v5.0 properties are validated and encoded once,
+    when the template is created. `publish()` then only has to add the
+    payload, which makes repeated publishing to the same topic cheaper than
+    calling `Client.publish()`.
+
+    The properties are encoded when the template is created, changing the
+    `Properties` instance afterwards has no effect on the template.
+
+    Members:
+
+    topic : String. The topic that messages are published on.
+
+    qos : Integer. The quality of service level used.
+
+    retain : Boolean. The retain flag used.
+
+    properties : Properties. The MQTT v5.0 properties included, or None.
+    """
+
+    __slots__ = 'topic', 'qos', 'retain', 'properties', '_client', '_topic', '_packed_topic', '_packed_properties'
+
+    def __init__(
+        self,
+        client: Client,
+        topic: str,
+        qos: int = 0,
+        retain: bool = False,
+        properties: Properties | None = None,
+    ):
+        self.topic = topic
+        self.qos = qos
+        self.retain = retain
+        self.properties = properties
+        self._client = client
+        self._topic = topic.encode('utf-8')
+        self._packed_topic = _UINT16.pack(len(self._topic)) + self._topic
+        if client._protocol == MQTTv5:
+            self._packed_properties = b'\x00' if properties is None else properties.pack()
+        else:
+            self._packed_properties = b''
+
+    def publish(self, payload: PayloadType = None) -> MQTTMessageInfo:
+        """Publish payload using this template.
+
+        :param payload: The actual message to send, see `Client.publish()`.
+
+        Returns a `MQTTMessageInfo`, as `Client.publish()` does.
+
+        :raises ValueError: if the length of the payload is greater than 268435455 bytes.
+        """
+        return self._client._publish(
+            self._topic, payload, self.qos, self.retain, self.properties, self)
+
 
 class Client:
     """MQTT version 3.1/3.1.1/5.0 client class.
@@ -801,14 +921,15 @@ class Client:
         self._password: bytes | None = None
         self._in_packet: _InPacket = {
             "command": 0,
-            "have_remaining": 0,
-            "remaining_count": [],
-            "remaining_mult": 1,
             "remaining_length": 0,
-            "packet": bytearray(b""),
-            "to_process": 0,
-            "pos": 0,
+            "packet": b"",
         }
+        self._in_buffer = bytearray()
+        self._in_buffer_pos = 0
+        # Time of the last recv(), when the packets it completed were received
+        self._in_recv_time = 0.0
+        # Complete packets were left in _in_buffer while the dispatcher was paused
+        self._in_stalled = False
         self._out_packet: collections.deque[_OutPacket] = collections.deque()
         self._last_msg_in = time_func()
         self._last_msg_out = time_func()
@@ -817,17 +938,43 @@ class Client:
         self._reconnect_delay: int | None = None
         self._reconnect_on_failure = reconnect_on_failure
         self._ping_t = 0.0
+        # Keepalive and reconnect delays. _last_msg_in/_last_msg_out are
+        # updated once per read/write without a lock, keepalive timers are
+        # only rescheduled from them when they expire.
+        self._timers = TimerWheel(_TIMER_TICK)
         self._last_mid = 0
         self._state = _ConnectionState.MQTT_CS_NEW
+        # All outgoing QoS > 0 messages by mid. Messages holding a slot of
+        # the inflight window are also in _out_inflight, the others wait in
+        # _out_queue until an acknowledgement frees a slot.
         self._out_messages: collections.OrderedDict[
             int, MQTTMessage
         ] = collections.OrderedDict()
+        self._out_inflight: collections.OrderedDict[
+            int, MQTTMessage
+        ] = collections.OrderedDict()
+        self._out_queue: collections.deque[MQTTMessage] = collections.deque()
         self._in_messages: collections.OrderedDict[
             int, MQTTMessage
         ] = collections.OrderedDict()
         self._max_inflight_messages = 20
         self._inflight_messages = 0
         self._max_queued_messages = 0
+        self._persistence: MessagePersistence | None = None
+        self._metrics: ClientMetrics | None = None
+        self._dispatcher: MessageDispatcher | None = None
+        # Incremented by reconnect(), so that the dispatcher doesn't acknowledge
+        # a message received on a previous connection.
+        self._connection_count = 0
+        # MQTT v5.0 topic aliases of the current connection. Outgoing aliases
+        # are kept in least recently used order and reused once the broker's
+        # Topic Alias Maximum is reached.
+        self._max_topic_aliases = 0
+        self._out_topic_alias_max = 0
+        self._out_topic_aliases: collections.OrderedDict[bytes, int] = collections.OrderedDict()
+        self._out_topic_alias_mutex = threading.Lock()
+        self._in_topic_alias_max = 0
+        self._in_topic_aliases: dict[int, bytes] = {}
         self._connect_properties: Properties | None = None
         self._will_properties: Properties | None = None
         self._will = False
@@ -843,7 +990,6 @@ class Client:
         self._proxy: Any = {}
         self._in_callback_mutex = threading.Lock()
         self._callback_mutex = threading.RLock()
-        self._msgtime_mutex = threading.Lock()
         self._out_message_mutex = threading.RLock()
         self._in_message_mutex = threading.Lock()
         self._reconnect_delay_mutex = threading.Lock()
@@ -863,6 +1009,8 @@ class Client:
         self._on_connect_fail: CallbackOnConnectFail | None = None
         self._on_subscribe: CallbackOnSubscribe | None = None
         self._on_message: CallbackOnMessage | None = None
+        self._on_message_batch: CallbackOnMessageBatch | None = None
+        self._message_batch: list[MQTTMessage] | None = None
         self._on_publish: CallbackOnPublish | None = None
         self._on_unsubscribe: CallbackOnUnsubscribe | None = None
         self._on_disconnect: CallbackOnDisconnect | None = None
@@ -1061,6 +1209,105 @@ class Client:
 
         self._max_queued_messages = value
 
+    @property
+    def max_topic_aliases(self) -> int:
+        """
+        (MQTT v5.0 only) Maximum number of topic aliases used for outgoing messages, 0 (the default)
+        disables them.
+
+        When enabled, publishing on a topic assigns it an alias, and the following messages on
+        that topic are sent with the alias instead of the topic name. No more aliases than the
+        Topic Alias Maximum of the broker's CONNACK are used; when they are all assigned, the
+        alias of the least recently used topic is reassigned. Aliases are assigned again on each
+        connection.
+
+        Messages published with a Topic Alias property are sent unchanged; setting aliases
+        yourself must not be combined with this option.
+
+        This property may not be changed if the connection is already open.
+        """
+        return self._max_topic_aliases
+
+    @max_topic_aliases.setter
+    def max_topic_aliases(self, value: int) -> None:
+        if not self._connection_closed():
+            raise RuntimeError("updating max_topic_aliases on established connection is not supported")
+
+        if value < 0 or value > 65535:
+            raise ValueError("Invalid topic alias maximum.")
+
+        self._max_topic_aliases = value
+
+    @property
+    def persistence(self) -> MessagePersistence | None:
+        """
+        Where the outgoing QoS 1 and 2 messages and the incoming QoS 2 messages are persisted,
+        see `paho.mqtt.persistence`. None (the default) keeps them in memory only.
+
+        Setting it loads the messages stored by a previous run, which are sent once connected.
+        While set, the payload of queued messages is only kept by the persistence.
+
+        This property may not be changed if the connection is already open, or once messages have
+        been published.
+        """
+        return self._persistence
+
+    @persistence.setter
+    def persistence(self, value: MessagePersistence | None) -> None:
+        if not self._connection_closed():
+            raise RuntimeError("updating persistence on established connection is not supported")
+
+        if self._out_messages or self._in_messages:
+            raise RuntimeError("updating persistence with messages in flight is not supported")
+
+        self._persistence = value
+        if value is None:
+            return
+
+        out_messages, in_messages = value.load()
+        with self._out_message_mutex:
+            for m in out_messages:
+                self._out_messages[m.mid] = m
+                if m.state == mqtt_ms_queued:
+                    self._out_queue.append(m)
+                else:
+                    self._out_inflight[m.mid] = m
+            if out_messages:
+                with self._mid_generate_mutex:
+                    self._last_mid = out_messages[-1].mid
+        with self._in_message_mutex:
+            for m in in_messages:
+                self._in_messages[m.mid] = m
+
+    @property
+    def metrics(self) -> ClientMetrics | None:
+        """
+        The `paho.mqtt.metrics.ClientMetrics` updated by this client, or None (the default) to
+        disable metrics.
+        """
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, value: ClientMetrics | None) -> None:
+        if value is not None:
+            value._attach(self)
+        self._metrics = value
+
+    @property
+    def dispatcher(self) -> MessageDispatcher | None:
+        """
+        The `paho.mqtt.dispatch.MessageDispatcher` running the message callbacks on worker
+        threads, or None (the default) to run them on the thread of the network loop.
+
+        With a dispatcher, QoS 1 and 2 messages are acknowledged once their callbacks have
+        returned.
+        """
+        return self._dispatcher
+
+    @dispatcher.setter
+    def dispatcher(self, value: MessageDispatcher | None) -> None:
+        self._dispatcher = value
+
     @property
     def will_topic(self) -> str | None:
         """
@@ -1120,6 +1367,28 @@ class Client:
             self._call_socket_register_write()
             raise BlockingIOError() from err
 
+    def _sock_send_packets(self, packets: list[_OutPacket]) -> int:
+        """Send the remaining data of several packets, as far as possible
+        with a single system call."""
+        buffers = [
+            memoryview(packet['packet'])[packet['pos']:] if packet['pos'] else packet['packet']
+            for packet in packets
+        ]
+        if len(buffers) == 1:
+            return self._sock_send(buffers[0])
+
+        sock = self._sock
+        if type(sock) is socket.socket and _HAVE_SENDMSG:
+            try:
+                return sock.sendmsg(buffers)
+            except BlockingIOError as err:
+                self._call_socket_register_write()
+                raise BlockingIOError() from err
+
+        # TLS and WebSocket connections can't gather buffers, a single
+        # larger write is still cheaper than one write per packet.
+        return self._sock_send(b"".join(buffers))
+
     def _sock_close(self) -> None:
         """Close the connection to the server."""
         if not self._sock:
@@ -1551,16 +1820,13 @@ class Client:
         if self._port <= 0:
             raise ValueError('Invalid port number.')
 
-        self._in_packet = {
-            "command": 0,
-            "have_remaining": 0,
-            "remaining_count": [],
-            "remaining_mult": 1,
-            "remaining_length": 0,
-            "packet": bytearray(b""),
-            "to_process": 0,
-            "pos": 0,
-        }
+        self._in_packet["command"] = 0
+        self._in_packet["remaining_length"] = 0
+        self._in_packet["packet"] = b""
+        self._in_buffer = bytearray()
+        self._in_buffer_pos = 0
+        self._in_stalled = False
+        self._connection_count += 1
 
         self._ping_t = 0.0
         self._state = _ConnectionState.MQTT_CS_CONNECTING
@@ -1576,9 +1842,20 @@ class Client:
 
         self._out_packet.clear()
 
-        with self._msgtime_mutex:
-            self._last_msg_in = time_func()
-            self._last_msg_out = time_func()
+        now = time_func()
+        self._last_msg_in = now
+        self._last_msg_out = now
+        self._timers.cancel(_TIMER_PINGRESP)
+        if self._keepalive:
+            self._timers.schedule(_TIMER_KEEPALIVE, now + self._keepalive)
+
+        # Topic aliases only last for a connection. Outgoing aliases are
+        # enabled again by the CONNACK.
+        with self._out_topic_alias_mutex:
+            self._out_topic_alias_max = 0
+            self._out_topic_aliases.clear()
+        self._in_topic_alias_max = getattr(self._connect_properties, "TopicAliasMaximum", 0)
+        self._in_topic_aliases.clear()
 
         # Put messages in progress in a valid state.
         self._messages_reconnect_reset()
@@ -1643,21 +1920,38 @@ class Client:
         else:
             wlist = []
 
+        # Don't read more messages while the dispatcher queues are full, the
+        # dispatcher wakes us up through sockpairR once they have room. The
+        # CONNACK of a new connection is read all the same.
+        reading = (
+            self._dispatcher is None
+            or not self._dispatcher.paused
+            or self._sockpairR is None
+            or self._state != _ConnectionState.MQTT_CS_CONNECTED
+        )
+
         # used to check if there are any bytes left in the (SSL) socket
         pending_bytes = 0
-        if hasattr(self._sock, 'pending'):
+        if reading and hasattr(self._sock, 'pending'):
             pending_bytes = self._sock.pending()  # type: ignore[union-attr]
+        if reading and self._in_stalled:
+            pending_bytes += len(self._in_buffer)
 
         # if bytes are pending do not wait in select
         if pending_bytes > 0:
             timeout = 0.0
+        else:
+            # Wake up in time for the next keepalive timer
+            timeout = min(timeout, self._timers.next_expiry(time_func()))
 
         # sockpairR is used to break out of select() before the timeout, on a
         # call to publish() etc.
         if self._sockpairR is None:
             rlist = [self._sock]
-        else:
+        elif reading:
             rlist = [self._sock, self._sockpairR]
+        else:
+            rlist = [self._sockpairR]
 
         try:
             socklist = select.select(rlist, wlist, [], timeout)
@@ -1762,6 +2056,54 @@ class Client:
         if qos < 0 or qos > 2:
             raise ValueError('Invalid QoS level.')
 
+        return self._publish(topic_bytes, payload, qos, retain, properties)
+
+    def prepared_publish(
+        self,
+        topic: str,
+        qos: int = 0,
+        retain: bool = False,
+        properties: Properties | None = None,
+    ) -> PublishTemplate:
+        """Prepare publishing messages on a topic.
+
+        Returns a `PublishTemplate` whose ``publish(payload)`` method publishes
+        a message in the same way as ``publish(topic, payload, qos, retain,
+        properties)``. The topic and properties are validated and encoded only
+        once, which avoids that work for applications publishing repeatedly to
+        the same topics.
+
+        :param str topic: The topic that the messages should be published on.
+        :param int qos: The quality of service level to use.
+        :param bool retain: If set to true, the messages will be set as the "last known
+            good"/retained message for the topic.
+        :param Properties properties: (MQTT v5.0 only) the MQTT v5.0 properties to be included.
+
+        :raises ValueError: if topic is None, has zero length or is
+            invalid (contains a wildcard), except if the MQTT version used is v5.0.
+            For v5.0, a zero length topic can be used when a Topic Alias has been set.
+        :raises ValueError: if qos is not one of 0, 1 or 2
+        """
+        if self._protocol != MQTTv5:
+            if topic is None or len(topic) == 0:
+                raise ValueError('Invalid topic.')
+
+        self._raise_for_invalid_topic(topic.encode('utf-8'))
+
+        if qos < 0 or qos > 2:
+            raise ValueError('Invalid QoS level.')
+
+        return PublishTemplate(self, topic, qos, retain, properties)
+
+    def _publish(
+        self,
+        topic_bytes: bytes,
+        payload: PayloadType,
+        qos: int,
+        retain: bool,
+        properties: Properties | None,
+        template: PublishTemplate | None = None,
+    ) -> MQTTMessageInfo:
         local_payload = _encode_payload(payload)
 
         if len(local_payload) > 268435455:
@@ -1772,7 +2114,7 @@ class Client:
         if qos == 0:
             info = MQTTMessageInfo(local_mid)
             rc = self._send_publish(
-                local_mid, topic_bytes, local_payload, qos, retain, False, info, properties)
+                local_mid, topic_bytes, local_payload, qos, retain, False, info, properties, template)
             info.rc = rc
             return info
         else:
@@ -1795,24 +2137,39 @@ class Client:
 
                 self._out_messages[message.mid] = message
                 if self._max_inflight_messages == 0 or self._inflight_messages < self._max_inflight_messages:
+                    self._out_inflight[message.mid] = message
                     self._inflight_messages += 1
                     if qos == 1:
                         message.state = mqtt_ms_wait_for_puback
                     elif qos == 2:
                         message.state = mqtt_ms_wait_for_pubrec
+                    if self._persistence is not None:
+                        self._persistence.add_out(message)
 
                     rc = self._send_publish(message.mid, topic_bytes, message.payload, message.qos, message.retain,
-                                            message.dup, message.info, message.properties)
+                                            message.dup, message.info, message.properties, template)
 
                     # remove from inflight messages so it will be send after a connection is made
                     if rc == MQTTErrorCode.MQTT_ERR_NO_CONN:
                         self._inflight_messages -= 1
-                        message.state = mqtt_ms_publish
+                        if self._persistence is not None:
+                            # Wait in the queue, so that the payload is not kept in memory
+                            # however long the connection is lost.
+                            del self._out_inflight[message.mid]
+                            message.state = mqtt_ms_queued
+                            self._out_queue.append(message)
+                            self._out_message_queued(message)
+                        else:
+                            message.state = mqtt_ms_publish
 
                     message.info.rc = rc
                     return message.info
                 else:
                     message.state = mqtt_ms_queued
+                    self._out_queue.append(message)
+                    if self._persistence is not None:
+                        self._persistence.add_out(message)
+                        self._out_message_queued(message)
                     message.info.rc = MQTTErrorCode.MQTT_ERR_SUCCESS
                     return message.info
 
@@ -2094,15 +2451,22 @@ class Client:
         if max_packets < 1:
             max_packets = 1
 
-        for _ in range(0, max_packets):
-            if self._sock is None:
-                return MQTTErrorCode.MQTT_ERR_NO_CONN
-            rc = self._packet_read()
-            if rc > 0:
-                return self._loop_rc_handle(rc)
-            elif rc == MQTTErrorCode.MQTT_ERR_AGAIN:
-                return MQTTErrorCode.MQTT_ERR_SUCCESS
-        return MQTTErrorCode.MQTT_ERR_SUCCESS
+        if self._on_message_batch is not None and self._dispatcher is None:
+            self._message_batch = []
+        self._in_stalled = False
+        try:
+            for _ in range(0, max_packets):
+                if self._sock is None:
+                    return MQTTErrorCode.MQTT_ERR_NO_CONN
+                rc = self._packet_read()
+                if rc > 0:
+                    self._flush_message_batch()
+                    return self._loop_rc_handle(rc)
+                elif rc == MQTTErrorCode.MQTT_ERR_AGAIN:
+                    return MQTTErrorCode.MQTT_ERR_SUCCESS
+            return MQTTErrorCode.MQTT_ERR_SUCCESS
+        finally:
+            self._flush_message_batch()
 
     def loop_write(self) -> MQTTErrorCode:
         """Process write network events. Use in place of calling `loop()` if you
@@ -2146,7 +2510,12 @@ class Client:
             return MQTTErrorCode.MQTT_ERR_NO_CONN
 
         now = time_func()
-        self._check_keepalive()
+        expired = self._timers.advance(now)
+        if not expired:
+            return MQTTErrorCode.MQTT_ERR_SUCCESS
+
+        if _TIMER_KEEPALIVE in expired:
+            self._check_keepalive(now)
 
         if self._ping_t > 0 and now - self._ping_t >= self._keepalive:
             # client->ping_t != 0 means we are waiting for a pingresp.
@@ -2617,6 +2986,50 @@ class Client:
             return func
         return decorator
 
+    @property
+    def on_message_batch(self) -> CallbackOnMessageBatch | None:
+        """The callback called with all messages received during one call
+        of `loop_read()`.
+
+        When set, this callback replaces `on_message`: messages that are
+        not matched by a `message_callback_add()` callback are collected
+        while the incoming data is decoded, and passed as a single list
+        once `loop_read()` has processed all available packets. This
+        avoids the per-message locking and call overhead for high rate
+        topics. Messages matched by a `message_callback_add()` callback
+        are passed to that callback first, one by one.
+
+        With automatic acknowledgement, the PUBACK/PUBCOMP for a message
+        may be queued before the batch is passed to this callback. Use
+        ``manual_ack=True`` and `ack()` if messages must only be
+        acknowledged once processed.
+
+        Expected signature is (for all callback API version):
+            message_batch_callback(client, userdata, messages)
+
+        :param Client client: the client instance for this callback
+        :param userdata: the private user data as set in Client() or user_data_set()
+        :param list[MQTTMessage] messages: the received messages, in the
+                    order they were received.
+
+        Decorator: @client.message_batch_callback() (``client`` is the name of the
+            instance which this callback is being attached to)
+        """
+        return self._on_message_batch
+
+    @on_message_batch.setter
+    def on_message_batch(self, func: CallbackOnMessageBatch | None) -> None:
+        with self._callback_mutex:
+            self._on_message_batch = func
+
+    def message_batch_callback(
+        self,
+    ) -> Callable[[CallbackOnMessageBatch], CallbackOnMessageBatch]:
+        def decorator(func: CallbackOnMessageBatch) -> CallbackOnMessageBatch:
+            self.on_message_batch = func
+            return func
+        return decorator
+
     @property
     def on_publish(self) -> CallbackOnPublish | None:
         """The callback called when a message that was to be sent using the
@@ -3052,138 +3465,174 @@ class Client:
         return rc
 
     def _packet_read(self) -> MQTTErrorCode:
-        # This gets called if pselect() indicates that there is network data
-        # available - ie. at least one byte.  What we do depends on what data we
-        # already have.
-        # If we've not got a command, attempt to read one and save it. This should
-        # always work because it's only a single byte.
-        # Then try to read the remaining length. This may fail because it is may
-        # be more than one byte - will need to save data pending next read if it
-        # does fail.
-        # Then try to read the remaining payload, where 'payload' here means the
-        # combined variable header and actual payload. This is the most likely to
-        # fail due to longer length, so save current data and current position.
-        # After all data is read, send to _mqtt_handle_packet() to deal with.
-        # Finally, free the memory and reset everything to starting conditions.
-        if self._in_packet['command'] == 0:
-            try:
-                command = self._sock_recv(1)
-            except BlockingIOError:
-                return MQTTErrorCode.MQTT_ERR_AGAIN
-            except TimeoutError as err:
-                self._easy_log(
-                    MQTT_LOG_ERR, 'timeout on socket: %s', err)
-                return MQTTErrorCode.MQTT_ERR_CONN_LOST
-            except OSError as err:
-                self._easy_log(
-                    MQTT_LOG_ERR, 'failed to receive on socket: %s', err)
-                return MQTTErrorCode.MQTT_ERR_CONN_LOST
-            else:
-                if len(command) == 0:
-                    return MQTTErrorCode.MQTT_ERR_CONN_LOST
-                self._in_packet['command'] = command[0]
-
-        if self._in_packet['have_remaining'] == 0:
-            # Read remaining
-            # Algorithm for decoding taken from pseudo code at
-            # http://publib.boulder.ibm.com/infocenter/wmbhelp/v6r0m0/topic/com.ibm.etools.mft.doc/ac10870_.htm
+        # This gets called if select() indicates that there is network data
+        # available - ie. at least one byte.
+        # Data is read from the socket in large blocks and appended to
+        # self._in_buffer, so a single recv() usually holds several packets.
+        # PUBLISH packets are views of the buffer, which is replaced rather
+        # than modified once packets have been taken from it.
+        # Every complete packet in the buffer is then passed to
+        # _packet_handle() in one pass, by pointing self._in_packet at it.
+        # A packet that is only partially received is kept in the buffer
+        # until more data arrives.
+        # Finally, the consumed part of the buffer is discarded.
+        handled = 0
+        count = 100  # Don't get stuck in this loop if we have a huge message.
+        try:
             while True:
+                buf = self._in_buffer
+                pos = self._in_buffer_pos
+                end = len(buf)
+
+                # Decode the fixed header: command byte then remaining length.
+                # Algorithm for decoding taken from pseudo code at
+                # http://publib.boulder.ibm.com/infocenter/wmbhelp/v6r0m0/topic/com.ibm.etools.mft.doc/ac10870_.htm
+                remaining_length = 0
+                remaining_mult = 1
+                header_end = 0
+                i = pos + 1
+                while i < end:
+                    byte_value = buf[i]
+                    i += 1
+                    remaining_length += (byte_value & 127) * remaining_mult
+                    remaining_mult *= 128
+                    if (byte_value & 128) == 0:
+                        header_end = i
+                        break
+                    # Max 4 bytes length for remaining length as defined by protocol.
+                    # Anything more likely means a broken/malicious client.
+                    if i - pos > 4:
+                        return MQTTErrorCode.MQTT_ERR_PROTOCOL
+
+                if header_end and end - header_end >= remaining_length:
+                    if (self._dispatcher is not None and self._dispatcher.paused
+                            and (buf[pos] & 0xF0) == PUBLISH):
+                        # Keep the packets in the buffer from this message on
+                        # until the dispatcher queues have room.
+                        self._in_stalled = True
+                        return MQTTErrorCode.MQTT_ERR_AGAIN
+                    # All data for this packet is read.
+                    packet_end = header_end + remaining_length
+                    self._in_packet['command'] = buf[pos]
+                    self._in_packet['remaining_length'] = remaining_length
+                    if (buf[pos] & 0xF0) == PUBLISH:
+                        # The topic and payload of the message are views of
+                        # this packet, the buffer isn't modified any more
+                        # once packets have been taken from it.
+                        self._in_packet['packet'] = memoryview(buf)[header_end:packet_end]
+                    else:
+                        self._in_packet['packet'] = bytes(buf[header_end:packet_end])
+                    self._in_buffer_pos = packet_end
+                    handled += 1
+
+                    rc = self._packet_handle()
+                    if rc != MQTTErrorCode.MQTT_ERR_SUCCESS or self._sock is None:
+                        return rc
+                    continue
+
+                if handled:
+                    # Leave the incomplete packet in the buffer; select() will
+                    # report the socket readable again once the rest arrives.
+                    return MQTTErrorCode.MQTT_ERR_SUCCESS
+
+                wanted = _READ_BUFFER_SIZE
+                if header_end:
+                    wanted = max(wanted, remaining_length - (end - header_end))
                 try:
-                    byte = self._sock_recv(1)
+                    data = self._sock_recv(wanted)
                 except BlockingIOError:
                     return MQTTErrorCode.MQTT_ERR_AGAIN
+                except TimeoutError as err:
+                    self._easy_log(
+                        MQTT_LOG_ERR, 'timeout on socket: %s', err)
+                    return MQTTErrorCode.MQTT_ERR_CONN_LOST
                 except OSError as err:
                     self._easy_log(
                         MQTT_LOG_ERR, 'failed to receive on socket: %s', err)
                     return MQTTErrorCode.MQTT_ERR_CONN_LOST
                 else:
-                    if len(byte) == 0:
+                    if len(data) == 0:
                         return MQTTErrorCode.MQTT_ERR_CONN_LOST
-                    byte_value = byte[0]
-                    self._in_packet['remaining_count'].append(byte_value)
-                    # Max 4 bytes length for remaining length as defined by protocol.
-                    # Anything more likely means a broken/malicious client.
-                    if len(self._in_packet['remaining_count']) > 4:
-                        return MQTTErrorCode.MQTT_ERR_PROTOCOL
-
-                    self._in_packet['remaining_length'] += (
-                        byte_value & 127) * self._in_packet['remaining_mult']
-                    self._in_packet['remaining_mult'] = self._in_packet['remaining_mult'] * 128
-
-                if (byte_value & 128) == 0:
-                    break
-
-            self._in_packet['have_remaining'] = 1
-            self._in_packet['to_process'] = self._in_packet['remaining_length']
-
-        count = 100 # Don't get stuck in this loop if we have a huge message.
-        while self._in_packet['to_process'] > 0:
-            try:
-                data = self._sock_recv(self._in_packet['to_process'])
-            except BlockingIOError:
-                return MQTTErrorCode.MQTT_ERR_AGAIN
-            except OSError as err:
-                self._easy_log(
-                    MQTT_LOG_ERR, 'failed to receive on socket: %s', err)
-                return MQTTErrorCode.MQTT_ERR_CONN_LOST
-            else:
-                if len(data) == 0:
-                    return MQTTErrorCode.MQTT_ERR_CONN_LOST
-                self._in_packet['to_process'] -= len(data)
-                self._in_packet['packet'] += data
-            count -= 1
-            if count == 0:
-                with self._msgtime_mutex:
+                    buf += data
+                    self._in_recv_time = time_func()
+                    if self._metrics is not None:
+                        self._metrics.bytes_in += len(data)
+                count -= 1
+                if count == 0:
                     self._last_msg_in = time_func()
-                return MQTTErrorCode.MQTT_ERR_AGAIN
-
-        # All data for this packet is read.
-        self._in_packet['pos'] = 0
-        rc = self._packet_handle()
-
-        # Free data and reset values
-        self._in_packet = {
-            "command": 0,
-            "have_remaining": 0,
-            "remaining_count": [],
-            "remaining_mult": 1,
-            "remaining_length": 0,
-            "packet": bytearray(b""),
-            "to_process": 0,
-            "pos": 0,
-        }
-
-        with self._msgtime_mutex:
-            self._last_msg_in = time_func()
-        return rc
+                    return MQTTErrorCode.MQTT_ERR_AGAIN
+        finally:
+            # Discard the consumed packets, keeping any partial one in a new
+            # buffer, as received messages may still point into this one.
+            if self._in_buffer_pos:
+                self._in_buffer = self._in_buffer[self._in_buffer_pos:]
+                self._in_buffer_pos = 0
+            if handled:
+                self._last_msg_in = time_func()
 
     def _packet_write(self) -> MQTTErrorCode:
         while True:
+            # Gather as many queued packets as possible into a single send.
+            # Packets are taken off the queue with popleft() so that other
+            # threads may keep appending while the data is being sent.
+            # DISCONNECT closes the socket, it is sent on its own once the
+            # callbacks of the packets before it have run.
+            packets: list[_OutPacket] = []
+            size = 0
             try:
-                packet = self._out_packet.popleft()
+                while len(packets) < _WRITE_MAX_PACKETS and size < _WRITE_BUFFER_SIZE:
+                    packet = self._out_packet.popleft()
+                    if (packet['command'] & 0xF0) == DISCONNECT:
+                        if packets:
+                            self._out_packet.appendleft(packet)
+                        else:
+                            packets.append(packet)
+                        break
+                    packets.append(packet)
+                    size += packet['to_process']
             except IndexError:
-                return MQTTErrorCode.MQTT_ERR_SUCCESS
+                if not packets:
+                    return MQTTErrorCode.MQTT_ERR_SUCCESS
 
             try:
-                write_length = self._sock_send(
-                    packet['packet'][packet['pos']:])
+                write_length = self._sock_send_packets(packets)
             except (AttributeError, ValueError):
-                self._out_packet.appendleft(packet)
+                self._out_packet.extendleft(reversed(packets))
                 return MQTTErrorCode.MQTT_ERR_SUCCESS
             except BlockingIOError:
-                self._out_packet.appendleft(packet)
+                self._out_packet.extendleft(reversed(packets))
                 return MQTTErrorCode.MQTT_ERR_AGAIN
             except OSError as err:
-                self._out_packet.appendleft(packet)
+                self._out_packet.extendleft(reversed(packets))
                 self._easy_log(
                     MQTT_LOG_ERR, 'failed to receive on socket: %s', err)
                 return MQTTErrorCode.MQTT_ERR_CONN_LOST
 
-            if write_length > 0:
-                packet['to_process'] -= write_length
-                packet['pos'] += write_length
+            if write_length <= 0:
+                self._out_packet.extendleft(reversed(packets))
+                break
+            written = write_length
+
+            completed = 0
+            for packet in packets:
+                length = min(write_length, packet['to_process'])
+                packet['to_process'] -= length
+                packet['pos'] += length
+                write_length -= length
+                if packet['to_process'] > 0:
+                    break
+                completed += 1
+
+            # Put back what was not completely sent before running any
+            # callback, so the queue order is kept if a callback publishes.
+            self._out_packet.extendleft(reversed(packets[completed:]))
 
-                if packet['to_process'] == 0:
+            done = packets[:completed]
+            if self._metrics is not None:
+                self._metrics._packets_written(written, done)
+
+            try:
+                for packet in done:
                     if (packet['command'] & 0xF0) == PUBLISH and packet['qos'] == 0:
                         with self._callback_mutex:
                             on_publish = self.on_publish
@@ -3202,7 +3651,7 @@ class Client:
                                             self,
                                             self._userdata,
                                             packet["mid"],
-                                            ReasonCode(PacketTypes.PUBACK),
+                                            ReasonCode._cached(PacketTypes.PUBACK),
                                             Properties(PacketTypes.PUBACK),
                                         )
                                     else:
@@ -3220,8 +3669,7 @@ class Client:
                         packet['info']._set_as_published()  # type: ignore
 
                     if (packet['command'] & 0xF0) == DISCONNECT:
-                        with self._msgtime_mutex:
-                            self._last_msg_out = time_func()
+                        self._last_msg_out = time_func()
 
                         self._do_on_disconnect(
                             packet_from_broker=False,
@@ -3234,15 +3682,16 @@ class Client:
                         if self._state == _ConnectionState.MQTT_CS_DISCONNECTING:
                             self._state = _ConnectionState.MQTT_CS_DISCONNECTED
                         return MQTTErrorCode.MQTT_ERR_SUCCESS
+            finally:
+                # Should a callback raise, the QoS 0 messages sent are still marked
+                # as published, or their wait_for_publish() would never return.
+                for packet in done:
+                    info = packet['info']
+                    if ((packet['command'] & 0xF0) == PUBLISH and packet['qos'] == 0
+                            and info is not None and not info._published):
+                        info._set_as_published()
 
-                else:
-                    # We haven't finished with this packet
-                    self._out_packet.appendleft(packet)
-            else:
-                break
-
-        with self._msgtime_mutex:
-            self._last_msg_out = time_func()
+        self._last_msg_out = time_func()
 
         return MQTTErrorCode.MQTT_ERR_SUCCESS
 
@@ -3258,15 +3707,15 @@ class Client:
             level_std = LOGGING_LEVEL[level]
             self._logger.log(level_std, fmt, *args)
 
-    def _check_keepalive(self) -> None:
+    def _check_keepalive(self, now: float) -> None:
+        # Called when the keepalive timer expires. The timer is set for the
+        # keepalive of the last traffic seen at the time it was scheduled,
+        # newer traffic only pushes it back here.
         if self._keepalive == 0:
             return
 
-        now = time_func()
-
-        with self._msgtime_mutex:
-            last_msg_out = self._last_msg_out
-            last_msg_in = self._last_msg_in
+        last_msg_out = self._last_msg_out
+        last_msg_in = self._last_msg_in
 
         if self._sock is not None and (now - last_msg_out >= self._keepalive or now - last_msg_in >= self._keepalive):
             if self._state == _ConnectionState.MQTT_CS_CONNECTED and self._ping_t == 0:
@@ -3279,9 +3728,8 @@ class Client:
                         v1_rc=MQTTErrorCode.MQTT_ERR_CONN_LOST,
                     )
                 else:
-                    with self._msgtime_mutex:
-                        self._last_msg_out = now
-                        self._last_msg_in = now
+                    self._last_msg_out = now
+                    self._last_msg_in = now
             else:
                 self._sock_close()
 
@@ -3296,6 +3744,10 @@ class Client:
                     v1_rc=rc,
                 )
 
+        if self._sock is not None:
+            self._timers.schedule(
+                _TIMER_KEEPALIVE, min(self._last_msg_out, self._last_msg_in) + self._keepalive)
+
     def _mid_generate(self) -> int:
         with self._mid_generate_mutex:
             self._last_mid += 1
@@ -3328,6 +3780,7 @@ class Client:
         rc = self._send_simple_command(PINGREQ)
         if rc == MQTTErrorCode.MQTT_ERR_SUCCESS:
             self._ping_t = time_func()
+            self._timers.schedule(_TIMER_PINGRESP, self._ping_t + self._keepalive)
         return rc
 
     def _send_pingresp(self) -> MQTTErrorCode:
@@ -3374,6 +3827,7 @@ class Client:
         dup: bool = False,
         info: MQTTMessageInfo | None = None,
         properties: Properties | None = None,
+        template: PublishTemplate | None = None,
     ) -> MQTTErrorCode:
         # we assume that topic and payload are already properly encoded
         if not isinstance(topic, bytes):
@@ -3385,11 +3839,7 @@ class Client:
             return MQTTErrorCode.MQTT_ERR_NO_CONN
 
         command = PUBLISH | ((dup & 0x1) << 3) | (qos << 1) | retain
-        packet = bytearray()
-        packet.append(command)
-
         payloadlen = len(payload)
-        remaining_length = 2 + len(topic) + payloadlen
 
         if payloadlen == 0:
             if self._protocol == MQTTv5:
@@ -3418,30 +3868,83 @@ class Client:
                     dup, qos, retain, mid, topic, payloadlen
                 )
 
+        if template is not None:
+            packed_topic = template._packed_topic
+            packed_properties = template._packed_properties
+        else:
+            packed_topic = _UINT16.pack(len(topic)) + topic
+            if self._protocol == MQTTv5:
+                packed_properties = b'\x00' if properties is None else properties.pack()
+            else:
+                packed_properties = b''
+
+        if self._out_topic_alias_max and topic and (properties is None or not hasattr(properties, "TopicAlias")):
+            # The packet assigning an alias must be queued before the
+            # packets using it, so the alias is chosen and the packet queued
+            # under the same lock.
+            with self._out_topic_alias_mutex:
+                if self._out_topic_alias_max:
+                    packed_topic, packed_properties = self._topic_alias_apply(
+                        topic, packed_topic, packed_properties)
+                packet = self._pack_publish(command, packed_topic, mid, qos, packed_properties, payload)
+                self._packet_append(PUBLISH, packet, mid, qos, info)
+            return self._packet_queued()
+
+        packet = self._pack_publish(command, packed_topic, mid, qos, packed_properties, payload)
+        return self._packet_queue(PUBLISH, packet, mid, qos, info)
+
+    def _pack_publish(
+        self,
+        command: int,
+        packed_topic: bytes,
+        mid: int,
+        qos: int,
+        packed_properties: bytes,
+        payload: bytes | bytearray,
+    ) -> bytearray:
+        packet = bytearray()
+        packet.append(command)
+
+        remaining_length = len(packed_topic) + len(packed_properties) + len(payload)
         if qos > 0:
             # For message id
             remaining_length += 2
 
-        if self._protocol == MQTTv5:
-            if properties is None:
-                packed_properties = b'\x00'
-            else:
-                packed_properties = properties.pack()
-            remaining_length += len(packed_properties)
-
         self._pack_remaining_length(packet, remaining_length)
-        self._pack_str16(packet, topic)
+        packet.extend(packed_topic)
 
         if qos > 0:
             # For message id
-            packet.extend(struct.pack("!H", mid))
-
-        if self._protocol == MQTTv5:
-            packet.extend(packed_properties)
+            packet.extend(_UINT16.pack(mid))
 
+        packet.extend(packed_properties)
         packet.extend(payload)
+        return packet
+
+    def _topic_alias_apply(
+        self, topic: bytes, packed_topic: bytes, packed_properties: bytes
+    ) -> tuple[bytes, bytes]:
+        # Return the topic and properties to send topic with an alias.
+        # Called with _out_topic_alias_mutex held.
+        aliases = self._out_topic_aliases
+        alias = aliases.get(topic)
+        if alias is not None:
+            aliases.move_to_end(topic)
+            packed_topic = b'\x00\x00'
+        else:
+            if len(aliases) < self._out_topic_alias_max:
+                alias = len(aliases) + 1
+            else:
+                _, alias = aliases.popitem(last=False)
+            aliases[topic] = alias
+            self._easy_log(
+                MQTT_LOG_DEBUG, "Assigning topic alias %d to '%s'", alias, topic)
 
-        return self._packet_queue(PUBLISH, packet, mid, qos, info)
+        props_len, vbi_len = VariableByteIntegers.decode(packed_properties)
+        packed_properties = (
+            VariableByteIntegers.encode(props_len + 3) + _TOPIC_ALIAS + _UINT16.pack(alias)
+            + packed_properties[vbi_len:])
+        return packed_topic, packed_properties
 
     def _send_pubrec(self, mid: int) -> MQTTErrorCode:
         self._easy_log(MQTT_LOG_DEBUG, "Sending PUBREC (Mid: %d)", mid)
@@ -3712,36 +4215,72 @@ class Client:
     def _messages_reconnect_reset_out(self) -> None:
         with self._out_message_mutex:
             self._inflight_messages = 0
-            for m in self._out_messages.values():
+            inflight = self._out_inflight
+            queue = self._out_queue
+            max_inflight = self._max_inflight_messages
+
+            if max_inflight > 0 and len(inflight) > max_inflight:
+                # Messages published while disconnected take a slot each,
+                # those that do not fit in the window wait again.
+                overflow = list(inflight.values())[max_inflight:]
+                for m in overflow:
+                    del inflight[m.mid]
+                    m.state = mqtt_ms_queued
+                    self._out_message_queued(m)
+                queue.extendleft(reversed(overflow))
+
+            # Queued messages were never sent, only the messages of the
+            # inflight window need their state reset.
+            for m in inflight.values():
                 m.timestamp = 0
-                if self._max_inflight_messages == 0 or self._inflight_messages < self._max_inflight_messages:
-                    if m.qos == 0:
-                        m.state = mqtt_ms_publish
-                    elif m.qos == 1:
-                        # self._inflight_messages = self._inflight_messages + 1
-                        if m.state == mqtt_ms_wait_for_puback:
+                if m.qos == 0:
+                    m.state = mqtt_ms_publish
+                elif m.qos == 1:
+                    # self._inflight_messages = self._inflight_messages + 1
+                    if m.state == mqtt_ms_wait_for_puback:
+                        m.dup = True
+                    m.state = mqtt_ms_publish
+                elif m.qos == 2:
+                    # self._inflight_messages = self._inflight_messages + 1
+                    if self._check_clean_session():
+                        if m.state != mqtt_ms_publish:
                             m.dup = True
                         m.state = mqtt_ms_publish
-                    elif m.qos == 2:
-                        # self._inflight_messages = self._inflight_messages + 1
-                        if self._check_clean_session():
-                            if m.state != mqtt_ms_publish:
+                    else:
+                        if m.state == mqtt_ms_wait_for_pubcomp:
+                            m.state = mqtt_ms_resend_pubrel
+                        else:
+                            if m.state == mqtt_ms_wait_for_pubrec:
                                 m.dup = True
                             m.state = mqtt_ms_publish
-                        else:
-                            if m.state == mqtt_ms_wait_for_pubcomp:
-                                m.state = mqtt_ms_resend_pubrel
-                            else:
-                                if m.state == mqtt_ms_wait_for_pubrec:
-                                    m.dup = True
-                                m.state = mqtt_ms_publish
-                else:
-                    m.state = mqtt_ms_queued
+
+            # The window may have been enlarged while disconnected
+            while queue and (max_inflight == 0 or len(inflight) < max_inflight):
+                m = queue.popleft()
+                m.timestamp = 0
+                m.state = mqtt_ms_publish
+                inflight[m.mid] = m
+                self._out_message_unqueued(m)
+
+    def _out_message_queued(self, message: MQTTMessage) -> None:
+        # Dont lock message_mutex here
+        if self._persistence is not None:
+            self._persistence.update_out(message)
+            # Read back by _out_message_unqueued() when the message is sent
+            message.payload = b""
+
+    def _out_message_unqueued(self, message: MQTTMessage) -> None:
+        # Dont lock message_mutex here
+        if self._persistence is not None:
+            message.payload = self._persistence.payload(message.mid)
+            self._persistence.update_out(message)
 
     def _messages_reconnect_reset_in(self) -> None:
         with self._in_message_mutex:
             if self._check_clean_session():
                 self._in_messages = collections.OrderedDict()
+                if self._persistence is not None:
+                    self._persistence.clear_in()
                 return
             for m in self._in_messages.values():
                 m.timestamp = 0
@@ -3763,6 +4302,17 @@ class Client:
         qos: int,
         info: MQTTMessageInfo | None = None,
     ) -> MQTTErrorCode:
+        self._packet_append(command, packet, mid, qos, info)
+        return self._packet_queued()
+
+    def _packet_append(
+        self,
+        command: int,
+        packet: bytes,
+        mid: int,
+        qos: int,
+        info: MQTTMessageInfo | None = None,
+    ) -> None:
         mpkt: _OutPacket = {
             "command": command,
             "mid": mid,
@@ -3775,13 +4325,8 @@ class Client:
 
         self._out_packet.append(mpkt)
 
-        # Write a single byte to sockpairW (connected to sockpairR) to break
-        # out of select() if in threaded mode.
-        if self._sockpairW is not None:
-            try:
-                self._sockpairW.send(sockpair_data)
-            except BlockingIOError:
-                pass
+    def _packet_queued(self) -> MQTTErrorCode:
+        self._wake_loop()
 
         # If we have an external event loop registered, use that instead
         # of calling loop_write() directly.
@@ -3794,6 +4339,15 @@ class Client:
 
         return MQTTErrorCode.MQTT_ERR_SUCCESS
 
+    def _wake_loop(self) -> None:
+        # Write a single byte to sockpairW (connected to sockpairR) to break
+        # out of select() if in threaded mode.
+        if self._sockpairW is not None:
+            try:
+                self._sockpairW.send(sockpair_data)
+            except BlockingIOError:
+                pass
+
     def _packet_handle(self) -> MQTTErrorCode:
         cmd = self._in_packet['command'] & 0xF0
         if cmd == PINGREQ:
@@ -3838,6 +4392,7 @@ class Client:
 
         # No longer waiting for a PINGRESP.
         self._ping_t = 0
+        self._timers.cancel(_TIMER_PINGRESP)
         self._easy_log(MQTT_LOG_DEBUG, "Received PINGRESP")
         return MQTTErrorCode.MQTT_ERR_SUCCESS
 
@@ -3891,6 +4446,10 @@ class Client:
         if result == 0:
             self._state = _ConnectionState.MQTT_CS_CONNECTED
             self._reconnect_delay = None
+            if self._max_topic_aliases and properties is not None:
+                with self._out_topic_alias_mutex:
+                    self._out_topic_alias_max = min(
+                        self._max_topic_aliases, getattr(properties, "TopicAliasMaximum", 0))
 
         if self._protocol == MQTTv5:
             self._easy_log(
@@ -3949,12 +4508,10 @@ class Client:
         if result == 0:
             rc = MQTTErrorCode.MQTT_ERR_SUCCESS
             with self._out_message_mutex:
-                for m in self._out_messages.values():
+                # Queued messages are sent by _update_inflight() as the
+                # messages of the inflight window are acknowledged.
+                for m in list(self._out_inflight.values()):
                     m.timestamp = time_func()
-                    if m.state == mqtt_ms_queued:
-                        self.loop_write()  # Process outgoing messages that have just been queued up
-                        return MQTT_ERR_SUCCESS
-
                     if m.qos == 0:
                         with self._in_callback_mutex:  # Don't call loop_write after _send_publish()
                             rc = self._send_publish(
@@ -3972,6 +4529,8 @@ class Client:
                         if m.state == mqtt_ms_publish:
                             self._inflight_messages += 1
                             m.state = mqtt_ms_wait_for_puback
+                            if self._persistence is not None:
+                                self._persistence.update_out(m)
                             with self._in_callback_mutex:  # Don't call loop_write after _send_publish()
                                 rc = self._send_publish(
                                     m.mid,
@@ -3988,6 +4547,8 @@ class Client:
                         if m.state == mqtt_ms_publish:
                             self._inflight_messages += 1
                             m.state = mqtt_ms_wait_for_pubrec
+                            if self._persistence is not None:
+                                self._persistence.update_out(m)
                             with self._in_callback_mutex:  # Don't call loop_write after _send_publish()
                                 rc = self._send_publish(
                                     m.mid,
@@ -4003,6 +4564,8 @@ class Client:
                         elif m.state == mqtt_ms_resend_pubrel:
                             self._inflight_messages += 1
                             m.state = mqtt_ms_wait_for_pubcomp
+                            if self._persistence is not None:
+                                self._persistence.update_out(m)
                             with self._in_callback_mutex:  # Don't call loop_write after _send_publish()
                                 rc = self._send_pubrel(m.mid)
                             if rc != MQTTErrorCode.MQTT_ERR_SUCCESS:
@@ -4046,11 +4609,11 @@ class Client:
         if self._protocol == MQTTv5:
             properties = Properties(SUBACK >> 4)
             props, props_len = properties.unpack(packet)
-            reasoncodes = [ReasonCode(SUBACK >> 4, identifier=c) for c in packet[props_len:]]
+            reasoncodes = [ReasonCode._cached(SUBACK >> 4, identifier=c) for c in packet[props_len:]]
         else:
             pack_format = f"!{'B' * len(packet)}"
             granted_qos = struct.unpack(pack_format, packet)
-            reasoncodes = [ReasonCode(SUBACK >> 4, identifier=c) for c in granted_qos]
+            reasoncodes = [ReasonCode._cached(SUBACK >> 4, identifier=c) for c in granted_qos]
             properties = Properties(SUBACK >> 4)
 
         with self._callback_mutex:
@@ -4091,70 +4654,103 @@ class Client:
     def _handle_publish(self) -> MQTTErrorCode:
         header = self._in_packet['command']
         message = MQTTMessage()
+        message.timestamp = self._in_recv_time
         message.dup = ((header & 0x08) >> 3) != 0
         message.qos = (header & 0x06) >> 1
         message.retain = (header & 0x01) != 0
 
-        pack_format = f"!H{len(self._in_packet['packet']) - 2}s"
-        (slen, packet) = struct.unpack(pack_format, self._in_packet['packet'])
-        pack_format = f"!{slen}s{len(packet) - slen}s"
-        (topic, packet) = struct.unpack(pack_format, packet)
-
-        if self._protocol != MQTTv5 and len(topic) == 0:
+        # The payload is sliced out of the received packet without copying
+        # and only turned into bytes if it is read. The topic is small and
+        # copied, so that messages kept by the application don't hold on to
+        # the whole receive buffer.
+        packet = memoryview(self._in_packet['packet'])
+        if len(packet) < 2:
             return MQTTErrorCode.MQTT_ERR_PROTOCOL
+        slen, = _UINT16.unpack_from(packet)
+        pos = 2 + slen
+        if len(packet) < pos:
+            return MQTTErrorCode.MQTT_ERR_PROTOCOL
+        topic = packet[2:pos].tobytes()
 
-        # Handle topics with invalid UTF-8
-        # This replaces an invalid topic with a message and the hex
-        # representation of the topic for logging. When the user attempts to
-        # access message.topic in the callback, an exception will be raised.
-        try:
-            print_topic = topic.decode('utf-8')
-        except UnicodeDecodeError:
-            print_topic = f"TOPIC WITH INVALID UTF-8: {topic!r}"
-
-        message.topic = topic
+        if self._protocol != MQTTv5 and slen == 0:
+            return MQTTErrorCode.MQTT_ERR_PROTOCOL
 
         if message.qos > 0:
-            pack_format = f"!H{len(packet) - 2}s"
-            (message.mid, packet) = struct.unpack(pack_format, packet)
+            if len(packet) < pos + 2:
+                return MQTTErrorCode.MQTT_ERR_PROTOCOL
+            message.mid, = _UINT16.unpack_from(packet, pos)
+            pos += 2
 
         if self._protocol == MQTTv5:
             message.properties = Properties(PUBLISH >> 4)
-            props, props_len = message.properties.unpack(packet)
-            packet = packet[props_len:]
+            _, props_len = message.properties.unpack(packet[pos:])
+            pos += props_len
+
+            # The broker may only use topic aliases up to the Topic Alias
+            # Maximum of our CONNECT, none if it wasn't set.
+            alias = getattr(message.properties, "TopicAlias", None)
+            if alias is not None:
+                if alias > self._in_topic_alias_max:
+                    return MQTTErrorCode.MQTT_ERR_PROTOCOL
+                if slen > 0:
+                    self._in_topic_aliases[alias] = topic
+                else:
+                    topic = self._in_topic_aliases.get(alias, b"")
+                    if not topic:
+                        return MQTTErrorCode.MQTT_ERR_PROTOCOL
+            elif slen == 0:
+                return MQTTErrorCode.MQTT_ERR_PROTOCOL
 
-        message.payload = packet
+        message.topic = topic
 
-        if self._protocol == MQTTv5:
-            self._easy_log(
-                MQTT_LOG_DEBUG,
-                "Received PUBLISH (d%d, q%d, r%d, m%d), '%s', properties=%s, ...  (%d bytes)",
-                message.dup, message.qos, message.retain, message.mid,
-                print_topic, message.properties, len(message.payload)
-            )
-        else:
-            self._easy_log(
-                MQTT_LOG_DEBUG,
-                "Received PUBLISH (d%d, q%d, r%d, m%d), '%s', ...  (%d bytes)",
-                message.dup, message.qos, message.retain, message.mid,
-                print_topic, len(message.payload)
-            )
+        payload = packet[pos:]
+        message.payload = payload
+
+        if self._metrics is not None:
+            self._metrics._message_received(message)
+
+        # Only format the log message if _easy_log() has somewhere to send it
+        if self.on_log is not None or self.logger is not None:
+            # Handle topics with invalid UTF-8
+            # This replaces an invalid topic with a message and the hex
+            # representation of the topic for logging. When the user attempts to
+            # access message.topic in the callback, an exception will be raised.
+            try:
+                print_topic = str(topic, 'utf-8')
+            except UnicodeDecodeError:
+                print_topic = f"TOPIC WITH INVALID UTF-8: {bytes(topic)!r}"
+
+            if self._protocol == MQTTv5:
+                self._easy_log(
+                    MQTT_LOG_DEBUG,
+                    "Received PUBLISH (d%d, q%d, r%d, m%d), '%s', properties=%s, ...  (%d bytes)",
+                    message.dup, message.qos, message.retain, message.mid,
+                    print_topic, message.properties, len(payload)
+                )
+            else:
+                self._easy_log(
+                    MQTT_LOG_DEBUG,
+                    "Received PUBLISH (d%d, q%d, r%d, m%d), '%s', ...  (%d bytes)",
+                    message.dup, message.qos, message.retain, message.mid,
+                    print_topic, len(payload)
+                )
 
-        message.timestamp = time_func()
         if message.qos == 0:
             self._handle_on_message(message)
             return MQTTErrorCode.MQTT_ERR_SUCCESS
         elif message.qos == 1:
-            self._handle_on_message(message)
-            if self._manual_ack:
+            if self._handle_on_message(message) or self._manual_ack:
                 return MQTTErrorCode.MQTT_ERR_SUCCESS
             else:
                 return self._send_puback(message.mid)
         elif message.qos == 2:
+            message.state = mqtt_ms_wait_for_pubrel
+            if self._persistence is not None:
+                # Before PUBREC, the broker may then discard the message
+                self._persistence.add_in(message)
 
             rc = self._send_pubrec(message.mid)
 
-            message.state = mqtt_ms_wait_for_pubrel
             with self._in_message_mutex:
                 self._in_messages[message.mid] = message
 
@@ -4192,6 +4788,7 @@ class Client:
             return MQTTErrorCode.MQTT_ERR_PROTOCOL
 
         mid, = struct.unpack("!H", self._in_packet['packet'][:2])
+        dispatched = False
         if self._protocol == MQTTv5:
             if self._in_packet['remaining_length'] > 2:
                 reasonCode = ReasonCode(PUBREL >> 4)
@@ -4207,7 +4804,9 @@ class Client:
                 # Only pass the message on if we have removed it from the queue - this
                 # prevents multiple callbacks for the same message.
                 message = self._in_messages.pop(mid)
-                self._handle_on_message(message)
+                dispatched = self._handle_on_message(message)
+                if self._persistence is not None:
+                    self._persistence.remove_in(mid)
                 self._inflight_messages -= 1
                 if self._max_inflight_messages > 0:
                     with self._out_message_mutex:
@@ -4221,34 +4820,34 @@ class Client:
         # is possible that we must known about this message.
         # Choose to acknowledge this message (thus losing a message) but
         # avoid hanging. See #284.
-        if self._manual_ack:
+        if self._manual_ack or dispatched:
             return MQTTErrorCode.MQTT_ERR_SUCCESS
         else:
             return self._send_pubcomp(mid)
 
     def _update_inflight(self) -> MQTTErrorCode:
         # Dont lock message_mutex here
-        for m in self._out_messages.values():
-            if self._inflight_messages < self._max_inflight_messages:
-                if m.qos > 0 and m.state == mqtt_ms_queued:
-                    self._inflight_messages += 1
-                    if m.qos == 1:
-                        m.state = mqtt_ms_wait_for_puback
-                    elif m.qos == 2:
-                        m.state = mqtt_ms_wait_for_pubrec
-                    rc = self._send_publish(
-                        m.mid,
-                        m.topic.encode('utf-8'),
-                        m.payload,
-                        m.qos,
-                        m.retain,
-                        m.dup,
-                        properties=m.properties,
-                    )
-                    if rc != MQTTErrorCode.MQTT_ERR_SUCCESS:
-                        return rc
-            else:
-                return MQTTErrorCode.MQTT_ERR_SUCCESS
+        queue = self._out_queue
+        while queue and self._inflight_messages < self._max_inflight_messages:
+            m = queue.popleft()
+            self._out_inflight[m.mid] = m
+            self._inflight_messages += 1
+            if m.qos == 1:
+                m.state = mqtt_ms_wait_for_puback
+            elif m.qos == 2:
+                m.state = mqtt_ms_wait_for_pubrec
+            self._out_message_unqueued(m)
+            rc = self._send_publish(
+                m.mid,
+                m.topic.encode('utf-8'),
+                m.payload,
+                m.qos,
+                m.retain,
+                m.dup,
+                properties=m.properties,
+            )
+            if rc != MQTTErrorCode.MQTT_ERR_SUCCESS:
+                return rc
         return MQTTErrorCode.MQTT_ERR_SUCCESS
 
     def _handle_pubrec(self) -> MQTTErrorCode:
@@ -4270,10 +4869,12 @@ class Client:
         self._easy_log(MQTT_LOG_DEBUG, "Received PUBREC (Mid: %d)", mid)
 
         with self._out_message_mutex:
-            if mid in self._out_messages:
-                msg = self._out_messages[mid]
+            msg = self._out_inflight.get(mid)
+            if msg is not None:
                 msg.state = mqtt_ms_wait_for_pubcomp
                 msg.timestamp = time_func()
+                if self._persistence is not None:
+                    self._persistence.update_out(msg)
                 return self._send_pubrel(mid)
 
         return MQTTErrorCode.MQTT_ERR_SUCCESS
@@ -4291,7 +4892,7 @@ class Client:
             properties = Properties(UNSUBACK >> 4)
             props, props_len = properties.unpack(packet)
             reasoncodes_list = [
-                ReasonCode(UNSUBACK >> 4, identifier=c)
+                ReasonCode._cached(UNSUBACK >> 4, identifier=c)
                 for c in packet[props_len:]
             ]
         else:
@@ -4425,6 +5026,9 @@ class Client:
                         raise
 
         msg = self._out_messages.pop(mid)
+        del self._out_inflight[mid]
+        if self._persistence is not None:
+            self._persistence.remove_out(mid)
         msg.info._set_as_published()
         if msg.qos > 0:
             self._inflight_messages -= 1
@@ -4445,26 +5049,32 @@ class Client:
 
         packet_type_enum = PUBACK if cmd == "PUBACK" else PUBCOMP
         packet_type = packet_type_enum.value >> 4
-        mid, = struct.unpack("!H", self._in_packet['packet'][:2])
-        reasonCode = ReasonCode(packet_type)
+        mid, = _UINT16.unpack_from(self._in_packet['packet'])
+        reasonCode = ReasonCode._cached(packet_type)
         properties = Properties(packet_type)
         if self._protocol == MQTTv5:
             if self._in_packet['remaining_length'] > 2:
-                reasonCode.unpack(self._in_packet['packet'][2:])
+                reasonCode = ReasonCode._cached(packet_type, identifier=self._in_packet['packet'][2])
                 if self._in_packet['remaining_length'] > 3:
                     props, props_len = properties.unpack(
                         self._in_packet['packet'][3:])
         self._easy_log(MQTT_LOG_DEBUG, "Received %s (Mid: %d)", cmd, mid)
 
         with self._out_message_mutex:
-            if mid in self._out_messages:
+            if mid in self._out_inflight:
                 # Only inform the client the message has been sent once.
                 rc = self._do_on_publish(mid, reasonCode, properties)
                 return rc
 
         return MQTTErrorCode.MQTT_ERR_SUCCESS
 
-    def _handle_on_message(self, message: MQTTMessage) -> None:
+    def _handle_on_message(self, message: MQTTMessage) -> bool:
+        # Returns True if the message was handed to the dispatcher, which
+        # then sends the acknowledgement.
+        if self._message_batch is not None:
+            # Delivered by _flush_message_batch() at the end of loop_read()
+            self._message_batch.append(message)
+            return False
 
         try:
             topic = message.topic
@@ -4474,13 +5084,25 @@ class Client:
         on_message_callbacks = []
         with self._callback_mutex:
             if topic is not None:
-                on_message_callbacks = list(self._on_message_filtered.iter_match(message.topic))
+                on_message_callbacks = list(self._on_message_filtered.iter_match(topic))
 
             if len(on_message_callbacks) == 0:
                 on_message = self.on_message
             else:
                 on_message = None
 
+        dispatcher = self._dispatcher
+        if dispatcher is not None:
+            if on_message:
+                on_message_callbacks.append(on_message)
+            dispatcher._dispatch(self, message, on_message_callbacks)
+            return True
+
+        metrics = self._metrics
+        if metrics is not None:
+            start = time_func()
+            metrics.delivery_latency.record(start - message.timestamp)
+
         for callback in on_message_callbacks:
             with self._in_callback_mutex:
                 try:
@@ -4505,6 +5127,74 @@ class Client:
                     if not self.suppress_exceptions:
                         raise
 
+        if metrics is not None:
+            metrics.callback_time.record(time_func() - start)
+        return False
+
+    def _flush_message_batch(self) -> None:
+        messages = self._message_batch
+        self._message_batch = None
+        if not messages:
+            return
+
+        batch = []
+        filtered = []
+        with self._callback_mutex:
+            on_message_batch = self._on_message_batch
+            if on_message_batch is None:
+                # Callback removed while reading, use on_message instead
+                batch = messages
+            else:
+                for message in messages:
+                    try:
+                        topic = message.topic
+                    except UnicodeDecodeError:
+                        topic = None
+                    if topic is not None:
+                        callbacks = list(self._on_message_filtered.iter_match(topic))
+                        if callbacks:
+                            filtered.append((message, callbacks))
+                            continue
+                    batch.append(message)
+
+        if on_message_batch is None:
+            for message in batch:
+                self._handle_on_message(message)
+            return
+
+        metrics = self._metrics
+        if metrics is not None:
+            start = time_func()
+            for message in messages:
+                metrics.delivery_latency.record(start - message.timestamp)
+
+        with self._in_callback_mutex:
+            for message, callbacks in filtered:
+                for callback in callbacks:
+                    try:
+                        callback(self, self._userdata, message)
+                    except Exception as err:
+                        self._easy_log(
+                            MQTT_LOG_ERR,
+                            'Caught exception in user defined callback function %s: %s',
+                            callback.__name__,
+                            err
+                        )
+                        if not self.suppress_exceptions:
+                            raise
+
+            if batch:
+                try:
+                    on_message_batch(self, self._userdata, batch)
+                except Exception as err:
+                    self._easy_log(
+                        MQTT_LOG_ERR, 'Caught exception in on_message_batch: %s', err)
+                    if not self.suppress_exceptions:
+                        raise
+
+        if metrics is not None:
+            metrics.callback_time.record(time_func() - start)
+
 
     def _handle_on_connect_fail(self) -> None:
         with self._callback_mutex:
@@ -4538,13 +5228,18 @@ class Client:
 
             target_time = now + self._reconnect_delay
 
-        remaining = target_time - now
+        self._timers.schedule(_TIMER_RECONNECT, target_time)
+        target_time = self._timers.deadline(_TIMER_RECONNECT)
+        # Timers expiring meanwhile are those of the lost connection, they
+        # are scheduled again by reconnect().
         while (self._state not in (_ConnectionState.MQTT_CS_DISCONNECTING, _ConnectionState.MQTT_CS_DISCONNECTED)
                 and not self._thread_terminate
-                and remaining > 0):
+                and _TIMER_RECONNECT in self._timers):
 
-            time.sleep(min(remaining, 1))
-            remaining = target_time - time_func()
+            time.sleep(max(0.0, min(target_time - now, 1)))
+            now = time_func()
+            self._timers.advance(now)
+        self._timers.cancel(_TIMER_RECONNECT)
 
     @staticmethod
     def _proxy_is_valid(p) -> bool:  # type: ignore[no-untyped-def]
@@ -4678,6 +5373,19 @@ class Client:
 
         return ssl_sock
 
+def _websocket_mask(data: bytes | bytearray | memoryview, mask_key: bytes) -> bytes:
+    """Return data masked (or unmasked) with the 4 bytes mask_key.
+
+    The whole payload is XORed at once as a large integer, which is much
+    faster than a loop over the bytes.
+    """
+    length = len(data)
+    if length == 0:
+        return b""
+    key = (mask_key * (length // 4 + 1))[:length]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+
+
 class _WebsocketWrapper:
     OPCODE_CONTINUATION = 0x0
     OPCODE_TEXT = 0x1
@@ -4703,17 +5411,22 @@ class _WebsocketWrapper:
         self._socket = socket
         self._path = path
 
-        self._sendbuffer = bytearray()
+        self._sendbuffer = b""
         self._readbuffer = bytearray()
 
         self._requested_size = 0
-        self._payload_head = 0
+        # Data of _readbuffer before _readbuffer_head has been decoded
         self._readbuffer_head = 0
+        # State of the frame whose payload is being read
+        self._frame_opcode = 0
+        self._frame_remaining = 0
+        self._frame_mask: bytes | None = None
+        self._frame_offset = 0
 
         self._do_handshake(extra_headers)
 
     def __del__(self) -> None:
-        self._sendbuffer = bytearray()
+        self._sendbuffer = b""
         self._readbuffer = bytearray()
 
     def _do_handshake(self, extra_headers: WebSocketHeaders | None) -> None:
@@ -4817,135 +5530,163 @@ class _WebsocketWrapper:
         self.connected = True
 
     def _create_frame(
-        self, opcode: int, data: bytearray, do_masking: int = 1
-    ) -> bytearray:
-        header = bytearray()
+        self, opcode: int, data: bytes | bytearray | memoryview, do_masking: int = 1
+    ) -> bytes:
         length = len(data)
-
-        mask_key = bytearray(os.urandom(4))
         mask_flag = do_masking
 
         # 1 << 7 is the final flag, we don't send continuated data
-        header.append(1 << 7 | opcode)
-
         if length < 126:
-            header.append(mask_flag << 7 | length)
+            header = struct.pack("!BB", 1 << 7 | opcode, mask_flag << 7 | length)
 
         elif length < 65536:
-            header.append(mask_flag << 7 | 126)
-            header += struct.pack("!H", length)
+            header = struct.pack("!BBH", 1 << 7 | opcode, mask_flag << 7 | 126, length)
 
         elif length < 0x8000000000000001:
-            header.append(mask_flag << 7 | 127)
-            header += struct.pack("!Q", length)
+            header = struct.pack("!BBQ", 1 << 7 | opcode, mask_flag << 7 | 127, length)
 
         else:
             raise ValueError("Maximum payload size is 2^63")
 
         if mask_flag == 1:
-            for index in range(length):
-                data[index] ^= mask_key[index % 4]
-            data = mask_key + data
+            mask_key = os.urandom(4)
+            return header + mask_key + _websocket_mask(data, mask_key)
 
         return header + data
 
-    def _buffered_read(self, length: int) -> bytearray:
-
-        # try to recv and store needed bytes
-        wanted_bytes = length - (len(self._readbuffer) - self._readbuffer_head)
-        if wanted_bytes > 0:
+    def _parse_frame_header(self, pos: int) -> tuple[int, int, int, bytes | None] | None:
+        # Return the position of the payload, the opcode, the payload length
+        # and the mask of the frame starting at pos, or None if the header
+        # is not completely buffered.
+        buf = self._readbuffer
+        available = len(buf) - pos
+        if available < 2:
+            return None
 
-            data = self._socket.recv(wanted_bytes)
+        opcode = buf[pos] & 0x0f
+        maskbit = buf[pos + 1] & 0x80
+        payload_length = buf[pos + 1] & 0x7f
+        header_length = 2
+        if payload_length == 0x7e:
+            header_length += 2
+        elif payload_length == 0x7f:
+            header_length += 8
+        if maskbit:
+            header_length += 4
+        if available < header_length:
+            return None
 
-            if not data:
-                raise ConnectionAbortedError
-            else:
-                self._readbuffer.extend(data)
+        if payload_length == 0x7e:
+            payload_length, = struct.unpack_from("!H", buf, pos + 2)
+        elif payload_length == 0x7f:
+            payload_length, = struct.unpack_from("!Q", buf, pos + 2)
+
+        mask_key = None
+        if maskbit:
+            mask_key = bytes(buf[pos + header_length - 4:pos + header_length])
+
+        return pos + header_length, opcode, payload_length, mask_key
+
+    def _decode_frames(self, length: int) -> bytes:
+        # Return up to length bytes of binary payload from the buffered
+        # frames. Several frames are decoded at once, and a frame may be
+        # returned in parts as it arrives.
+        buf = self._readbuffer
+        pos = self._readbuffer_head
+        chunks: list[bytes | memoryview] = []
+        size = 0
+
+        with memoryview(buf) as view:
+            while size < length:
+                if self._frame_remaining == 0:
+                    header = self._parse_frame_header(pos)
+                    if header is None:
+                        break
+                    payload_pos, opcode, payload_length, mask_key = header
+
+                    if opcode & 0x08:
+                        # Control frames are small and handled once complete
+                        if len(buf) - payload_pos < payload_length:
+                            break
+                        payload = bytes(view[payload_pos:payload_pos + payload_length])
+                        if mask_key is not None:
+                            payload = _websocket_mask(payload, mask_key)
+                        pos = payload_pos + payload_length
+                        self._handle_control_frame(opcode, payload)
+                        continue
+
+                    pos = payload_pos
+                    self._frame_opcode = opcode
+                    self._frame_remaining = payload_length
+                    self._frame_mask = mask_key
+                    self._frame_offset = 0
+                    if payload_length == 0:
+                        continue
+
+                count = min(self._frame_remaining, len(buf) - pos, length - size)
+                if count == 0:
+                    break
 
-            if len(data) < wanted_bytes:
-                raise BlockingIOError
+                # This isn't *proper* handling of continuation frames, but given
+                # that we only support binary frames, it is *probably* good enough.
+                if self._frame_opcode == _WebsocketWrapper.OPCODE_BINARY \
+                        or self._frame_opcode == _WebsocketWrapper.OPCODE_CONTINUATION:
+                    if self._frame_mask is None:
+                        chunks.append(view[pos:pos + count])
+                    else:
+                        shift = self._frame_offset % 4
+                        chunks.append(_websocket_mask(
+                            view[pos:pos + count], self._frame_mask[shift:] + self._frame_mask[:shift]))
+                    size += count
+
+                pos += count
+                self._frame_remaining -= count
+                self._frame_offset += count
+
+            data = b"".join(chunks)
+            # Release the views of the buffer before resizing it
+            chunks.clear()
+
+        # Drop the decoded data, usually leaving at most a partial frame
+        if pos == len(buf):
+            buf.clear()
+            pos = 0
+        elif pos > _READ_BUFFER_SIZE:
+            del buf[:pos]
+            pos = 0
+        self._readbuffer_head = pos
+        return data
+
+    def _handle_control_frame(self, opcode: int, payload: bytes) -> None:
+        # respond to non-binary opcodes, their arrival is not guaranteed because of non-blocking sockets
+        if opcode == _WebsocketWrapper.OPCODE_CONNCLOSE:
+            frame = self._create_frame(
+                _WebsocketWrapper.OPCODE_CONNCLOSE, payload, 0)
+            self._socket.send(frame)
 
-        self._readbuffer_head += length
-        return self._readbuffer[self._readbuffer_head - length:self._readbuffer_head]
+        if opcode == _WebsocketWrapper.OPCODE_PING:
+            frame = self._create_frame(
+                _WebsocketWrapper.OPCODE_PONG, payload, 0)
+            self._socket.send(frame)
 
     def _recv_impl(self, length: int) -> bytes:
 
         # try to decode websocket payload part from data
         try:
+            result = self._decode_frames(length)
+            if result:
+                return result
 
-            self._readbuffer_head = 0
-
-            result = b""
-
-            chunk_startindex = self._payload_head
-            chunk_endindex = self._payload_head + length
-
-            header1 = self._buffered_read(1)
-            header2 = self._buffered_read(1)
-
-            opcode = (header1[0] & 0x0f)
-            maskbit = (header2[0] & 0x80) == 0x80
-            lengthbits = (header2[0] & 0x7f)
-            payload_length = lengthbits
-            mask_key = None
-
-            # read length
-            if lengthbits == 0x7e:
-
-                value = self._buffered_read(2)
-                payload_length, = struct.unpack("!H", value)
-
-            elif lengthbits == 0x7f:
-
-                value = self._buffered_read(8)
-                payload_length, = struct.unpack("!Q", value)
-
-            # read mask
-            if maskbit:
-                mask_key = self._buffered_read(4)
-
-            # if frame payload is shorter than the requested data, read only the possible part
-            readindex = chunk_endindex
-            if payload_length < readindex:
-                readindex = payload_length
-
-            if readindex > 0:
-                # get payload chunk
-                payload = self._buffered_read(readindex)
-
-                # unmask only the needed part
-                if mask_key is not None:
-                    for index in range(chunk_startindex, readindex):
-                        payload[index] ^= mask_key[index % 4]
-
-                result = payload[chunk_startindex:readindex]
-                self._payload_head = readindex
-            else:
-                payload = bytearray()
+            # Nothing complete is buffered, read as much as available at once
+            data = self._socket.recv(max(length, _READ_BUFFER_SIZE))
+            if not data:
+                raise ConnectionAbortedError
+            self._readbuffer += data
 
-            # check if full frame arrived and reset readbuffer and payloadhead if needed
-            if readindex == payload_length:
-                self._readbuffer = bytearray()
-                self._payload_head = 0
-
-                # respond to non-binary opcodes, their arrival is not guaranteed because of non-blocking sockets
-                if opcode == _WebsocketWrapper.OPCODE_CONNCLOSE:
-                    frame = self._create_frame(
-                        _WebsocketWrapper.OPCODE_CONNCLOSE, payload, 0)
-                    self._socket.send(frame)
-
-                if opcode == _WebsocketWrapper.OPCODE_PING:
-                    frame = self._create_frame(
-                        _WebsocketWrapper.OPCODE_PONG, payload, 0)
-                    self._socket.send(frame)
-
-            # This isn't *proper* handling of continuation frames, but given
-            # that we only support binary frames, it is *probably* good enough.
-            if (opcode == _WebsocketWrapper.OPCODE_BINARY or opcode == _WebsocketWrapper.OPCODE_CONTINUATION) \
-                    and payload_length > 0:
+            result = self._decode_frames(length)
+            if result:
                 return result
-            else:
-                raise BlockingIOError
+            raise BlockingIOError
 
         except ConnectionError:
             self.connected = False
@@ -4955,10 +5696,10 @@ class _WebsocketWrapper:
 
         # if previous frame was sent successfully
         if len(self._sendbuffer) == 0:
-            # create websocket frame
-            frame = self._create_frame(
-                _WebsocketWrapper.OPCODE_BINARY, bytearray(data))
-            self._sendbuffer.extend(frame)
+            # create websocket frame. Packets queued together are written
+            # with a single call, and so sent in a single frame.
+            self._sendbuffer = self._create_frame(
+                _WebsocketWrapper.OPCODE_BINARY, data)
             self._requested_size = len(data)
 
         # try to write out as much as possible
@@ -4992,13 +5733,24 @@ class _WebsocketWrapper:
         return self._socket.fileno()
 
     def pending(self) -> int:
+        # Payload already read from the socket but not returned yet, when
+        # the last read was limited by its length.
+        buffered = len(self._readbuffer) - self._readbuffer_head
+        if buffered and self._frame_remaining == 0:
+            header = self._parse_frame_header(self._readbuffer_head)
+            if header is None:
+                buffered = 0
+            elif header[1] & 0x08 and header[0] + header[2] > len(self._readbuffer):
+                # Incomplete control frame
+                buffered = 0
+
         # Fix for bug #131: a SSL socket may still have data available
         # for reading without select() being aware of it.
         if self._ssl:
-            return self._socket.pending()  # type: ignore[union-attr]
+            return buffered + self._socket.pending()  # type: ignore[union-attr]
         else:
             # normal socket rely only on select()
-            return 0
+            return buffered
 
     def setblocking(self, flag: bool) -> None:
         self._socket.setblocking(flag)
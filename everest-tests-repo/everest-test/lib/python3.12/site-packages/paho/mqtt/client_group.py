@@ -0,0 +1,264 @@
+# Copyright (c) 2026 Roger Light and others
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Eclipse Public License v2.0
+# and Eclipse Distribution License v1.0 which accompany this distribution.
+#
+# The Eclipse Public License is available at
+#    http://www.eclipse.org/legal/epl-v20.html
+# and the Eclipse Distribution License is available at
+#   http://www.eclipse.org/org/documents/edl-v10.php.
+
+"""
+This module provides `ClientGroup`, which runs the network loop of many
+`paho.mqtt.client.Client` instances from a single thread.
+
+All sockets are registered with one `selectors.DefaultSelector` (epoll on
+Linux, kqueue on BSD/macOS), and only the clients whose socket is ready are
+processed. Keepalive checks are driven by a timer wheel, so an idle client
+costs nothing until its keepalive deadline.
+
+Example::
+
+    group = ClientGroup()
+    for i in range(500):
+        client = Client(CallbackAPIVersion.VERSION2, client_id=f"evse-{i}")
+        group.add(client)
+        client.connect("localhost")
+    group.loop_forever()
+"""
+from __future__ import annotations
+
+import collections
+import selectors
+import threading
+from typing import Any, Callable
+
+from . import client as paho
+from .client import time_func
+from .timers import TimerWheel
+
+
+class ClientGroup:
+    """Run the network loop of many clients from a single thread.
+
+    Clients are attached with `add()`. The group installs the
+    ``on_socket_open``, ``on_socket_close``, ``on_socket_register_write`` and
+    ``on_socket_unregister_write`` callbacks of the client, which must not be
+    replaced while the client is part of the group. Clients may be connected
+    before or after being added, and `Client.reconnect()` works as usual.
+
+    Use `loop_forever()` or `loop_start()`/`loop_stop()` to run the group, in
+    the same way as a single client. Do not call the loop functions of the
+    individual clients.
+
+    :param float tick: resolution in seconds of the keepalive timer wheel.
+    """
+
+    def __init__(self, tick: float = 0.5) -> None:
+        self._selector = selectors.DefaultSelector()
+        self._clients: set[paho.Client] = set()
+        self._wheel = TimerWheel(tick)
+        self._pending: collections.deque[tuple[Callable[..., None], tuple[Any, ...]]] = collections.deque()
+        self._sockpairR, self._sockpairW = paho._socketpair_compat()
+        self._selector.register(self._sockpairR, selectors.EVENT_READ, None)
+        self._thread: threading.Thread | None = None
+        self._thread_ident: int | None = None
+        self._thread_terminate = False
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __contains__(self, client: paho.Client) -> bool:
+        return client in self._clients
+
+    def add(self, client: paho.Client) -> None:
+        """Attach a client to the group."""
+        if client in self._clients:
+            return
+        self._clients.add(client)
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+
+        sock = client.socket()
+        if sock is not None:
+            self._call_in_loop(self._register, client, sock)
+            if client.want_write():
+                self._call_in_loop(self._modify, client, sock, True)
+
+    def remove(self, client: paho.Client) -> None:
+        """Detach a client from the group. The connection is left open."""
+        if client not in self._clients:
+            return
+        self._clients.discard(client)
+        client.on_socket_open = None
+        client.on_socket_close = None
+        client.on_socket_register_write = None
+        client.on_socket_unregister_write = None
+
+        sock = client.socket()
+        if sock is not None:
+            self._call_in_loop(self._unregister, client, sock)
+
+    def close(self) -> None:
+        """Detach all clients and release the selector."""
+        self.loop_stop()
+        for client in list(self._clients):
+            self.remove(client)
+        self._run_pending()
+        self._selector.close()
+        self._sockpairR.close()
+        self._sockpairW.close()
+
+    def loop(self, timeout: float = 1.0) -> None:
+        """Wait up to timeout seconds for network events and process them."""
+        self._run_pending()
+
+        now = time_func()
+        timeout = min(timeout, self._wheel.next_expiry(now))
+        for key, mask in self._selector.select(timeout):
+            client = key.data
+            if client is None:
+                # Clear sockpairR, several wake-ups may be pending.
+                try:
+                    self._sockpairR.recv(10000)
+                except BlockingIOError:
+                    pass
+                continue
+            if client.socket() is not key.fileobj:
+                # Closed or reconnected since select() was called
+                continue
+            if mask & selectors.EVENT_READ:
+                self._do_read(client)
+            if mask & selectors.EVENT_WRITE and client.socket() is key.fileobj:
+                client.loop_write()
+
+        for client in self._wheel.advance(time_func()):
+            if client in self._clients:
+                client.loop_misc()
+                self._schedule_keepalive(client)
+
+        self._run_pending()
+
+    def loop_forever(self, timeout: float = 1.0) -> None:
+        """Process network events until `loop_stop()` is called."""
+        self._thread_ident = threading.get_ident()
+        try:
+            while not self._thread_terminate:
+                self.loop(timeout)
+        finally:
+            self._thread_ident = None
+
+    def loop_start(self) -> None:
+        """Start a thread running `loop_forever()`."""
+        if self._thread is not None:
+            return
+        self._thread_terminate = False
+        self._thread = threading.Thread(target=self.loop_forever, name="paho-mqtt-client-group")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def loop_stop(self) -> None:
+        """Stop the thread started by `loop_start()` and wait for it."""
+        if self._thread is None:
+            return
+        self._thread_terminate = True
+        self._wakeup()
+        if threading.current_thread() != self._thread:
+            self._thread.join()
+        self._thread = None
+
+    def _wakeup(self) -> None:
+        try:
+            self._sockpairW.send(paho.sockpair_data)
+        except BlockingIOError:
+            pass
+
+    def _call_in_loop(self, func: Callable[..., None], *args: Any) -> None:
+        # The selector is only touched by the thread running the loop. Calls
+        # made from other threads, e.g. publish() from the application, are
+        # queued and the loop is woken up to run them.
+        if self._thread_ident is None or self._thread_ident == threading.get_ident():
+            func(*args)
+        else:
+            self._pending.append((func, args))
+            self._wakeup()
+
+    def _run_pending(self) -> None:
+        while self._pending:
+            func, args = self._pending.popleft()
+            func(*args)
+
+    def _do_read(self, client: paho.Client) -> None:
+        sock = client.socket()
+        client.loop_read()
+        # A SSL socket may still have decrypted data that select() does not
+        # know about.
+        while sock is not None and sock is client.socket() and getattr(sock, "pending", lambda: 0)() > 0:
+            client.loop_read()
+
+    def _keepalive_deadline(self, client: paho.Client) -> float | None:
+        keepalive = client.keepalive
+        if keepalive == 0:
+            return None
+        deadline = min(client._last_msg_in, client._last_msg_out) + keepalive
+        if client._ping_t > 0:
+            deadline = min(deadline, client._ping_t + keepalive)
+        return deadline
+
+    def _schedule_keepalive(self, client: paho.Client) -> None:
+        if client.socket() is None:
+            self._wheel.cancel(client)
+            return
+        deadline = self._keepalive_deadline(client)
+        if deadline is None:
+            self._wheel.cancel(client)
+        else:
+            self._wheel.schedule(client, deadline)
+
+    def _register(self, client: paho.Client, sock: paho.SocketLike) -> None:
+        if sock is not client.socket():
+            return
+        try:
+            self._selector.register(sock, selectors.EVENT_READ, client)
+        except KeyError:
+            self._selector.modify(sock, selectors.EVENT_READ, client)
+        self._schedule_keepalive(client)
+
+    def _unregister(self, client: paho.Client, sock: paho.SocketLike) -> None:
+        try:
+            self._selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        self._wheel.cancel(client)
+
+    def _modify(self, client: paho.Client, sock: paho.SocketLike, write: bool) -> None:
+        if sock is not client.socket():
+            return
+        events = selectors.EVENT_READ
+        if write:
+            events |= selectors.EVENT_WRITE
+        try:
+            self._selector.modify(sock, events, client)
+        except (KeyError, ValueError):
+            pass
+
+    def _on_socket_open(self, client: paho.Client, userdata: Any, sock: paho.SocketLike) -> None:
+        self._call_in_loop(self._register, client, sock)
+
+    def _on_socket_close(self, client: paho.Client, userdata: Any, sock: paho.SocketLike) -> None:
+        # The socket is closed right after this callback returns, so it must
+        # be unregistered now even when called from another thread.
+        try:
+            self._selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        self._call_in_loop(self._wheel.cancel, client)
+
+    def _on_socket_register_write(self, client: paho.Client, userdata: Any, sock: paho.SocketLike) -> None:
+        self._call_in_loop(self._modify, client, sock, True)
+
+    def _on_socket_unregister_write(self, client: paho.Client, userdata: Any, sock: paho.SocketLike) -> None:
+        self._call_in_loop(self._modify, client, sock, False)
@@ -0,0 +1,228 @@
+# Copyright (c) 2026 Roger Light and others
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Eclipse Public License v2.0
+# and Eclipse Distribution License v1.0 which accompany this distribution.
+#
+# The Eclipse Public License is available at
+#    http://www.eclipse.org/legal/epl-v20.html
+# and the Eclipse Distribution License is available at
+#   http://www.eclipse.org/org/documents/edl-v10.php.
+
+"""
+This module provides `MessageDispatcher`, which runs the message callbacks of
+a `paho.mqtt.client.Client` on worker threads instead of the thread running
+the network loop.
+
+By default the message callbacks are called by the network loop, so a slow
+callback delays reading the socket and sending keepalives. With a dispatcher
+set, the network loop only queues the messages, and workers call the
+callbacks::
+
+    client.on_message = on_message
+    client.dispatcher = MessageDispatcher(workers=4, queue_size=1000)
+    client.connect("localhost")
+    client.loop_forever()
+
+Messages are assigned to a worker by topic, so the messages of a topic are
+still delivered in order, one at a time. Messages of different topics are
+delivered concurrently.
+
+The queues of the workers are bounded. When a queue is full, the network
+loop of the client (`loop()`, `loop_start()` or `loop_forever()`) stops
+reading from the socket until it is half empty, leaving the broker to hold
+back further messages. Applications running their own loop with
+`Client.loop_read()` should not wait for the socket to be readable while
+`MessageDispatcher.paused` is True, and call `loop_read()` once it is False:
+messages already received are kept until then.
+
+QoS 1 and 2 messages are acknowledged once their callbacks have returned, or
+raised, so that the broker sends them again if the client stops before. With
+`Client.manual_ack_set()` the callbacks still have to call `Client.ack()`.
+Messages received before a reconnection are not acknowledged on the new
+connection, where their message id may be used by another message: the
+broker sends them again if the session is kept.
+
+As the client doesn't read from the socket while paused, the other packets
+the broker sends meanwhile are held back too: the acknowledgements of
+publish(), subscribe() and unsubscribe(), and the PINGRESP. Workers
+delivering slower than the keepalive interval can make the client time out
+and reconnect. Only the CONNACK of a new connection is read while paused.
+"""
+from __future__ import annotations
+
+import collections
+import threading
+import zlib
+from typing import TYPE_CHECKING, Callable, Sequence
+
+from .client import MQTT_LOG_ERR, time_func
+
+if TYPE_CHECKING:
+    from .client import Client, MQTTMessage
+
+    _Item = tuple[Client, MQTTMessage, Sequence[Callable[..., object]], int]
+
+
+class _Worker:
+    __slots__ = ("queue", "condition", "unfinished", "full", "thread")
+
+    def __init__(self) -> None:
+        self.queue: collections.deque[_Item] = collections.deque()
+        self.condition = threading.Condition(threading.Lock())
+        # Messages queued or being delivered
+        self.unfinished = 0
+        # Set when the queue reaches queue_size, cleared once half empty
+        self.full = False
+        self.thread: threading.Thread | None = None
+
+
+class MessageDispatcher:
+    """Calls message callbacks on worker threads, see the module
+    documentation.
+
+    Callbacks run concurrently with the network loop and with each other,
+    and are not called with the lock that serializes the callbacks run by
+    the network loop. Exceptions raised by callbacks are logged, and can't
+    be propagated to the network loop whatever `Client.suppress_exceptions`.
+
+    The `Client.on_message_batch` callback is not used while a dispatcher
+    is set, messages are dispatched one by one.
+
+    :param int workers: number of worker threads.
+    :param int queue_size: number of messages queued for a worker above
+        which the client stops reading from the socket. As the messages read
+        at once are all queued, a queue may exceed this size by the number of
+        messages of one read.
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 1000) -> None:
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.queue_size = queue_size
+        self._workers = [_Worker() for _ in range(workers)]
+        # Number of workers whose full flag is set
+        self._full_lock = threading.Lock()
+        self._full_count = 0
+        self._closed = False
+        for index, worker in enumerate(self._workers):
+            worker.thread = threading.Thread(
+                target=self._run, args=(worker,), name=f"paho-mqtt-dispatch-{index}", daemon=True)
+            worker.thread.start()
+
+    @property
+    def paused(self) -> bool:
+        """True while the queue of a worker is full, and the client should
+        not read more messages."""
+        return self._full_count > 0
+
+    def pending(self) -> int:
+        """Return the number of messages queued and not yet delivered."""
+        return sum(len(worker.queue) for worker in self._workers)
+
+    def _dispatch(
+        self, client: Client, message: MQTTMessage, callbacks: Sequence[Callable[..., object]]
+    ) -> None:
+        # Called by the network loop
+        connection = client._connection_count
+        if self._closed:
+            self._deliver(client, message, callbacks, connection)
+            return
+        worker = self._workers[zlib.crc32(message._topic) % len(self._workers)]
+        with worker.condition:
+            worker.queue.append((client, message, callbacks, connection))
+            worker.unfinished += 1
+            if len(worker.queue) >= self.queue_size and not worker.full:
+                worker.full = True
+                with self._full_lock:
+                    self._full_count += 1
+            worker.condition.notify()
+
+    def _run(self, worker: _Worker) -> None:
+        low = self.queue_size // 2
+        while True:
+            wake = None
+            with worker.condition:
+                while not worker.queue and not self._closed:
+                    worker.condition.wait()
+                if not worker.queue:
+                    return
+                client, message, callbacks, connection = worker.queue.popleft()
+                if worker.full and len(worker.queue) <= low:
+                    worker.full = False
+                    with self._full_lock:
+                        self._full_count -= 1
+                        if self._full_count == 0:
+                            wake = client
+            if wake is not None:
+                # Let the network loop read the socket again
+                wake._wake_loop()
+            try:
+                self._deliver(client, message, callbacks, connection)
+            finally:
+                with worker.condition:
+                    worker.unfinished -= 1
+                    if worker.unfinished == 0:
+                        worker.condition.notify_all()
+
+    def _deliver(
+        self,
+        client: Client,
+        message: MQTTMessage,
+        callbacks: Sequence[Callable[..., object]],
+        connection: int,
+    ) -> None:
+        metrics = client._metrics
+        if metrics is not None:
+            start = time_func()
+            metrics.delivery_latency.record(start - message.timestamp)
+
+        userdata = client._userdata
+        for callback in callbacks:
+            try:
+                callback(client, userdata, message)
+            except Exception as err:
+                client._easy_log(
+                    MQTT_LOG_ERR,
+                    'Caught exception in user defined callback function %s: %s',
+                    getattr(callback, "__name__", callback),
+                    err
+                )
+
+        if metrics is not None:
+            metrics.callback_time.record(time_func() - start)
+
+        # The message id may belong to another message since a reconnection
+        if not client._manual_ack and connection == client._connection_count:
+            if message.qos == 1:
+                client._send_puback(message.mid)
+            elif message.qos == 2:
+                client._send_pubcomp(message.mid)
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until all queued messages have been delivered. Returns
+        False if timeout expired before."""
+        deadline = None if timeout is None else time_func() + timeout
+        for worker in self._workers:
+            with worker.condition:
+                remaining = None if deadline is None else max(deadline - time_func(), 0.0)
+                if not worker.condition.wait_for(lambda worker=worker: worker.unfinished == 0, remaining):
+                    return False
+        return True
+
+    def close(self, wait: bool = True) -> None:
+        """Stop the workers once the queued messages have been delivered.
+        Messages dispatched afterwards are delivered by the network loop.
+
+        :param bool wait: wait for the workers to stop.
+        """
+        self._closed = True
+        for worker in self._workers:
+            with worker.condition:
+                worker.condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                if worker.thread is not None and worker.thread is not threading.current_thread():
+                    worker.thread.join()
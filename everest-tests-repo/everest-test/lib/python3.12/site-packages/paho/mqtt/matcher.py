@@ -1,10 +1,19 @@
+import collections
+
+
 class MQTTMatcher:
     """Intended to manage topic filters including wildcards.
 
     Internally, MQTTMatcher use a prefix tree (trie) to store
     values associated with filters, and has an iter_match()
     method to iterate efficiently over all filters that match
-    some topic name."""
+    some topic name.
+
+    Filters without wildcards are also kept in a dict, so that
+    when no wildcard filter is registered a topic is matched with
+    a single lookup. Otherwise the results of iter_match() are
+    kept in a LRU cache of :cache_size topics, which is cleared
+    whenever a filter is added or removed."""
 
     class Node:
         __slots__ = '_children', '_content'
@@ -13,8 +22,16 @@ class MQTTMatcher:
             self._children = {}
             self._content = None
 
-    def __init__(self):
+    def __init__(self, cache_size=1024):
         self._root = self.Node()
+        self._exact = {}
+        self._wildcards = 0
+        self._cache = collections.OrderedDict()
+        self._cache_size = cache_size
+
+    @staticmethod
+    def _is_wildcard(key):
+        return '+' in key or '#' in key
 
     def __setitem__(self, key, value):
         """Add a topic filter :key to the prefix tree
@@ -22,7 +39,13 @@ class MQTTMatcher:
         node = self._root
         for sym in key.split('/'):
             node = node._children.setdefault(sym, self.Node())
+        if self._is_wildcard(key):
+            if node._content is None:
+                self._wildcards += 1
+        else:
+            self._exact[key] = value
         node._content = value
+        self._cache.clear()
 
     def __getitem__(self, key):
         """Retrieve the value associated with some topic filter :key"""
@@ -44,11 +67,17 @@ class MQTTMatcher:
             for k in key.split('/'):
                  parent, node = node, node._children[k]
                  lst.append((parent, k, node))
-            # TODO
+            if node._content is None:
+                raise KeyError(key)
             node._content = None
         except KeyError as ke:
             raise KeyError(key) from ke
         else:  # cleanup
+            if self._is_wildcard(key):
+                self._wildcards -= 1
+            else:
+                del self._exact[key]
+            self._cache.clear()
             for parent, k, node in reversed(lst):
                 if node._children or node._content is not None:
                      break
@@ -57,22 +86,55 @@ class MQTTMatcher:
     def iter_match(self, topic):
         """Return an iterator on all values associated with filters
         that match the :topic"""
+        if not self._wildcards:
+            content = self._exact.get(topic)
+            return iter(() if content is None else (content,))
+
+        cache = self._cache
+        try:
+            result = cache[topic]
+        except KeyError:
+            result = self._match(topic)
+            if self._cache_size > 0:
+                cache[topic] = result
+                if len(cache) > self._cache_size:
+                    cache.popitem(last=False)
+        else:
+            cache.move_to_end(topic)
+        return iter(result)
+
+    def _match(self, topic):
+        # Depth-first walk of the trie with an explicit stack. Children are
+        # pushed in reverse order so that values are found in the same order
+        # as a recursive walk: exact level, then '+', then '#'.
         lst = topic.split('/')
+        count = len(lst)
         normal = not topic.startswith('$')
-        def rec(node, i=0):
-            if i == len(lst):
+        result = []
+        stack = [(self._root, 0)]
+        while stack:
+            node, i = stack.pop()
+            if node is None:
+                # Value of a '#' filter, stacked in place of the level
+                result.append(i)
+                continue
+            children = node._children
+            wildcards = normal or i > 0
+            if i == count:
                 if node._content is not None:
-                    yield node._content
-            else:
-                part = lst[i]
-                if part in node._children:
-                    for content in rec(node._children[part], i + 1):
-                        yield content
-                if '+' in node._children and (normal or i > 0):
-                    for content in rec(node._children['+'], i + 1):
-                        yield content
-            if '#' in node._children and (normal or i > 0):
-                content = node._children['#']._content
+                    result.append(node._content)
+                if wildcards and '#' in children:
+                    content = children['#']._content
+                    if content is not None:
+                        result.append(content)
+                continue
+            if wildcards and '#' in children:
+                content = children['#']._content
                 if content is not None:
-                    yield content
-        return rec(self._root)
+                    stack.append((None, content))
+            if wildcards and '+' in children:
+                stack.append((children['+'], i + 1))
+            child = children.get(lst[i])
+            if child is not None:
+                stack.append((child, i + 1))
+        return tuple(result)
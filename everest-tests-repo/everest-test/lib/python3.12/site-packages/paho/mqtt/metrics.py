@@ -0,0 +1,330 @@
+# Copyright (c) 2026 Roger Light and others
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Eclipse Public License v2.0
+# and Eclipse Distribution License v1.0 which accompany this distribution.
+#
+# The Eclipse Public License is available at
+#    http://www.eclipse.org/legal/epl-v20.html
+# and the Eclipse Distribution License is available at
+#   http://www.eclipse.org/org/documents/edl-v10.php.
+
+"""
+This module provides `ClientMetrics`, counters and latency histograms of the
+traffic of a `paho.mqtt.client.Client`.
+
+Metrics are disabled by default. They are enabled by setting
+`Client.metrics`; until then the client only checks that the attribute is
+None.
+
+Example::
+
+    metrics = ClientMetrics(topic_filters=["everest/+/powermeter", "everest/#"])
+    client.metrics = metrics
+    ...
+    snapshot = metrics.snapshot()
+    print(snapshot["messages_in"], snapshot["callback_seconds"]["p99"])
+    ...
+    later = metrics.snapshot(since=snapshot)
+    print(later["topic_rates"]["everest/#"])
+    text = metrics.prometheus()
+
+The counters are updated by the thread running the network loop without
+locking, and may be read from any thread. The histograms are also updated by
+the workers of a `MessageDispatcher`, and are locked.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Iterable
+
+from .matcher import MQTTMatcher
+from .packettypes import PacketTypes
+
+if TYPE_CHECKING:
+    from .client import Client, MQTTMessage, _OutPacket
+
+_PERCENTILES = (("p50", 50.0), ("p90", 90.0), ("p99", 99.0), ("p999", 99.9))
+
+
+class Histogram:
+    """Histogram of durations with a bounded relative error, in the manner
+    of HDR histograms.
+
+    Values are counted in buckets: each power of two of the unit is divided
+    into 2**precision buckets of the same width, so that percentiles are
+    reported with a relative error below 2**-precision whatever the range of
+    the values. Recording a value is O(1) and the memory used only grows with
+    the logarithm of the largest value.
+
+    :param int precision: number of bits of precision, 5 (the default) gives
+        a relative error below 3.2%.
+    :param float unit: smallest value distinguished, in seconds.
+
+    A histogram may be updated and read from several threads.
+    """
+
+    def __init__(self, precision: int = 5, unit: float = 1e-6) -> None:
+        if precision < 1:
+            raise ValueError("precision must be at least 1")
+        self._lock = threading.Lock()
+        self._bits = precision
+        self._sub = 1 << precision
+        self._unit = unit
+        self._counts: dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        units = int(value / self._unit)
+        if units < 2 * self._sub:
+            return max(units, 0)
+        shift = units.bit_length() - self._bits - 1
+        return (shift + 1) * self._sub + (units >> shift) - self._sub
+
+    def _upper(self, index: int) -> float:
+        # Upper bound of the bucket
+        if index < 2 * self._sub:
+            return (index + 1) * self._unit
+        shift = index // self._sub - 1
+        return ((index % self._sub + self._sub + 1) << shift) * self._unit
+
+    def record(self, value: float) -> None:
+        """Add a duration, in seconds."""
+        index = self._index(value)
+        with self._lock:
+            counts = self._counts
+            counts[index] = counts.get(index, 0) + 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, percent: float) -> float:
+        """Return the value below which percent % of the values are, or 0.0
+        if no value has been recorded."""
+        with self._lock:
+            return self._percentile(percent)
+
+    def _percentile(self, percent: float) -> float:
+        counts = self._counts
+        total = self.count
+        if total == 0:
+            return 0.0
+        rank = max(math.ceil(total * percent / 100.0), 1)
+        seen = 0
+        for index in sorted(counts):
+            seen += counts[index]
+            if seen >= rank:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = {}
+            self.count = 0
+            self.sum = 0.0
+            self.min = math.inf
+            self.max = 0.0
+
+    def snapshot(self) -> dict[str, float]:
+        """Return the count, sum, min, max, mean and the 50th, 90th, 99th
+        and 99.9th percentiles."""
+        with self._lock:
+            count = self.count
+            result = {
+                "count": count,
+                "sum": self.sum,
+                "min": self.min if count else 0.0,
+                "max": self.max,
+                "mean": self.sum / count if count else 0.0,
+            }
+            for name, percent in _PERCENTILES:
+                result[name] = self._percentile(percent)
+        return result
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class ClientMetrics:
+    """Counters and latency histograms of a client, see the module
+    documentation.
+
+    Members:
+
+    bytes_in, bytes_out : Integers. Bytes read from and written to the
+        socket.
+
+    messages_in : Integer. PUBLISH packets received.
+
+    messages_out : Integer. PUBLISH packets written, including
+        retransmissions.
+
+    topic_messages : Dict. Number of messages received on topics matching
+        each of the topic filters given. `snapshot()` also reports their
+        rates.
+
+    callback_time : Histogram. Time spent in the message callbacks, per
+        message (per batch with `Client.on_message_batch`).
+
+    delivery_latency : Histogram. Time from the message being received
+        from the socket to its callback being called, including the time
+        spent in the queue of a `MessageDispatcher`.
+
+    :param topic_filters: topic filters for which received messages are
+        counted in `topic_messages`. A message is counted for every filter
+        it matches.
+    """
+
+    def __init__(self, topic_filters: Iterable[str] = ()) -> None:
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.messages_in = 0
+        self.messages_out = 0
+        self.topic_messages: dict[str, int] = {}
+        self.callback_time = Histogram()
+        self.delivery_latency = Histogram()
+        self._filters = MQTTMatcher()
+        for sub in topic_filters:
+            self.topic_messages[sub] = 0
+            self._filters[sub] = sub
+        # Start of the rates reported by snapshot() without since
+        self._start_time = time.monotonic()
+        self._client: weakref.ref[Client] | None = None
+
+    def _attach(self, client: Client) -> None:
+        self._client = weakref.ref(client)
+
+    def _message_received(self, message: MQTTMessage) -> None:
+        self.messages_in += 1
+        if self.topic_messages:
+            try:
+                topic = message.topic
+            except UnicodeDecodeError:
+                return
+            topic_messages = self.topic_messages
+            for sub in self._filters.iter_match(topic):
+                topic_messages[sub] += 1
+
+    def _packets_written(self, length: int, packets: list[_OutPacket]) -> None:
+        self.bytes_out += length
+        for packet in packets:
+            if packet["command"] >> 4 == PacketTypes.PUBLISH:
+                self.messages_out += 1
+
+    def reset(self) -> None:
+        """Set the counters and histograms back to zero."""
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.messages_in = 0
+        self.messages_out = 0
+        self.topic_messages = dict.fromkeys(self.topic_messages, 0)
+        self._start_time = time.monotonic()
+        self.callback_time.reset()
+        self.delivery_latency.reset()
+
+    def _gauges(self) -> dict[str, int]:
+        client = self._client() if self._client is not None else None
+        if client is None:
+            return {"out_packets": 0, "out_queue": 0, "inflight": 0}
+        return {
+            # Packets waiting to be written to the socket
+            "out_packets": len(client._out_packet),
+            # QoS > 0 messages waiting for a slot of the inflight window
+            "out_queue": len(client._out_queue),
+            "inflight": client._inflight_messages,
+        }
+
+    def snapshot(self, since: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Return the current value of all metrics as a dict.
+
+        The gauges out_packets (packets not written yet), out_queue
+        (messages waiting for a slot of the inflight window) and inflight are
+        read from the client at that time.
+
+        topic_rates is the number of messages per second received on topics
+        matching each topic filter, since the snapshot since if given, else
+        since the metrics were created or reset. Taking a snapshot doesn't
+        change the metrics, so several readers may each compute their rates
+        from their own previous snapshot.
+
+        time is the `time.monotonic()` value at which the snapshot was taken.
+
+        :param dict since: a snapshot previously returned by this method.
+        """
+        now = time.monotonic()
+        topic_messages = dict(self.topic_messages)
+        if since is None:
+            start = self._start_time
+            start_counts: dict[str, int] = {}
+        else:
+            start = since["time"]
+            start_counts = since["topic_messages"]
+        elapsed = now - start
+        topic_rates = {
+            sub: (count - start_counts.get(sub, 0)) / elapsed if elapsed > 0 else 0.0
+            for sub, count in topic_messages.items()
+        }
+
+        result: dict[str, Any] = {
+            "time": now,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "messages_in": self.messages_in,
+            "messages_out": self.messages_out,
+            "topic_messages": topic_messages,
+            "topic_rates": topic_rates,
+            "callback_seconds": self.callback_time.snapshot(),
+            "delivery_latency_seconds": self.delivery_latency.snapshot(),
+        }
+        result.update(self._gauges())
+        return result
+
+    def prometheus(self, prefix: str = "paho_mqtt") -> str:
+        """Return the metrics in the Prometheus text exposition format.
+        Histograms are exported as summaries. The rates of the topic filters
+        are left to Prometheus, from the topic_received_messages_total
+        counters."""
+        lines = []
+
+        def metric(name: str, kind: str, doc: str, samples: list[tuple[str, Any]]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {doc}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, value in samples:
+                lines.append(f"{prefix}_{name}{suffix} {value}")
+
+        metric("received_bytes_total", "counter", "Bytes read from the socket.", [("", self.bytes_in)])
+        metric("sent_bytes_total", "counter", "Bytes written to the socket.", [("", self.bytes_out)])
+        metric("received_messages_total", "counter", "PUBLISH packets received.", [("", self.messages_in)])
+        metric("sent_messages_total", "counter", "PUBLISH packets written.", [("", self.messages_out)])
+        if self.topic_messages:
+            metric(
+                "topic_received_messages_total", "counter", "Messages received by topic filter.",
+                [(f'{{filter="{_escape_label(sub)}"}}', count) for sub, count in self.topic_messages.items()])
+
+        for name, histogram, doc in (
+            ("callback_seconds", self.callback_time, "Time spent in the message callbacks."),
+            ("delivery_latency_seconds", self.delivery_latency,
+             "Time from the message being received to its callback."),
+        ):
+            snapshot = histogram.snapshot()
+            samples: list[tuple[str, Any]] = [
+                (f'{{quantile="{percent / 100:g}"}}', snapshot[key]) for key, percent in _PERCENTILES]
+            samples.append(("_sum", snapshot["sum"]))
+            samples.append(("_count", snapshot["count"]))
+            metric(name, "summary", doc, samples)
+
+        gauges = self._gauges()
+        metric("out_packets", "gauge", "Packets waiting to be written.", [("", gauges["out_packets"])])
+        metric("out_queue", "gauge", "Messages waiting for a slot of the inflight window.", [("", gauges["out_queue"])])
+        metric("inflight", "gauge", "Messages in the inflight window.", [("", gauges["inflight"])])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,402 @@
+# Copyright (c) 2026 Roger Light and others
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Eclipse Public License v2.0
+# and Eclipse Distribution License v1.0 which accompany this distribution.
+#
+# The Eclipse Public License is available at
+#    http://www.eclipse.org/legal/epl-v20.html
+# and the Eclipse Distribution License is available at
+#   http://www.eclipse.org/org/documents/edl-v10.php.
+
+"""
+This module provides persistence of the session state of a
+`paho.mqtt.client.Client`: the outgoing QoS 1 and 2 messages not yet
+acknowledged by the broker, and the incoming QoS 2 messages waiting for their
+PUBREL.
+
+`MessagePersistence` defines the interface used by the client, and
+`FilePersistence` implements it with an append-only segment log and a memory
+mapped index of message ids.
+
+Example::
+
+    client = Client(CallbackAPIVersion.VERSION2, client_id="evse-1", clean_session=False)
+    client.persistence = FilePersistence("/var/lib/evse/mqtt")
+    client.connect("localhost")
+
+With a persistence set, the client only keeps the payload of the messages of
+the inflight window in memory. The payload of queued messages is read back
+from the persistence when they are sent.
+"""
+from __future__ import annotations
+
+import io
+import mmap
+import os
+import struct
+import threading
+
+from .client import MQTTMessage, mqtt_ms_queued
+from .packettypes import PacketTypes
+from .properties import Properties
+
+INDEX_MAGIC = b"PAHOPST\x01"
+
+# Record of the segment log: sequence number, mid, flags (qos | retain << 2 |
+# dup << 3), topic length, properties length, payload length. Followed by the
+# topic, the packed properties and the payload.
+_RECORD = struct.Struct("<QHBHII")
+# Entry of the index: segment number (0 if unused), offset and length of the
+# record, sequence number, state, flags.
+_ENTRY = struct.Struct("<IIIQBB2x")
+
+_OUT = 0
+_IN = 1
+_MIDS = 65536
+
+
+class MessagePersistence:
+    """Interface of the session state persistence used by `Client`.
+
+    The client calls these methods with its message locks held, they should
+    not block for long. Messages are identified by their mid, which is unique
+    among outgoing and among incoming messages.
+    """
+
+    def load(self) -> tuple[list[MQTTMessage], list[MQTTMessage]]:
+        """Return the stored outgoing messages in the order they were
+        published, and the stored incoming messages.
+
+        The payload of outgoing messages in the ``mqtt_ms_queued`` state does
+        not need to be loaded, the client reads it with `payload()`.
+        """
+        raise NotImplementedError
+
+    def add_out(self, message: MQTTMessage) -> None:
+        """Store an outgoing message."""
+        raise NotImplementedError
+
+    def update_out(self, message: MQTTMessage) -> None:
+        """Store the new state and dup flag of an outgoing message."""
+        raise NotImplementedError
+
+    def remove_out(self, mid: int) -> None:
+        """Remove an outgoing message once it is acknowledged."""
+        raise NotImplementedError
+
+    def payload(self, mid: int) -> bytes:
+        """Return the payload of a stored outgoing message."""
+        raise NotImplementedError
+
+    def add_in(self, message: MQTTMessage) -> None:
+        """Store an incoming QoS 2 message."""
+        raise NotImplementedError
+
+    def remove_in(self, mid: int) -> None:
+        """Remove an incoming message once it is released."""
+        raise NotImplementedError
+
+    def clear_in(self) -> None:
+        """Remove all incoming messages."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the resources of the persistence."""
+
+
+class FilePersistence(MessagePersistence):
+    """Persist the session state in a directory.
+
+    Messages are appended to segment files of up to segment_size bytes, and
+    the position and state of each live message is kept in a memory mapped
+    index with one fixed size entry per mid. Adding, updating and removing a
+    message is therefore O(1), and removing a message does not touch the
+    segments.
+
+    A segment is deleted as soon as it holds no live message. When a new
+    segment is started, the live messages of older segments that are mostly
+    dead are copied to it (compaction), so that a few old messages, e.g. an
+    incoming message never released, do not keep whole segments on disk.
+
+    Each message is written with a single write() to the log, and only then
+    referenced by the index, so the state survives the process being killed.
+    Use sync to also survive the system crashing, at a high cost.
+
+    A directory must only be used by one client at a time.
+
+    :param str path: the directory, created if needed.
+    :param int segment_size: size in bytes at which a new segment is started.
+    :param float compact_ratio: segments with less than this fraction of
+        live data are compacted.
+    :param bool sync: if True, fsync() the log and the index after each
+        change.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        segment_size: int = 16 * 1024 * 1024,
+        compact_ratio: float = 0.5,
+        sync: bool = False,
+    ) -> None:
+        if segment_size < _RECORD.size:
+            raise ValueError("segment_size is too small")
+        if not 0.0 <= compact_ratio <= 1.0:
+            raise ValueError("compact_ratio must be between 0 and 1")
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._segment_size = segment_size
+        self._compact_ratio = compact_ratio
+        self._sync = sync
+        self._lock = threading.RLock()
+        self._seq = 0
+        self._segments: dict[int, io.BufferedRandom] = {}
+        # Bytes used by live records and total size of each segment
+        self._live: dict[int, int] = {}
+        self._size: dict[int, int] = {}
+
+        index_path = os.path.join(path, "index")
+        index_size = len(INDEX_MAGIC) + 2 * _MIDS * _ENTRY.size
+        with open(index_path, "ab+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                f.write(INDEX_MAGIC)
+                f.truncate(index_size)
+            elif f.tell() != index_size:
+                raise ValueError(f"{index_path} is not a message persistence index")
+            self._index = mmap.mmap(f.fileno(), index_size)
+        if self._index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            self._index.close()
+            raise ValueError(f"{index_path} is not a message persistence index")
+
+        self._load_index()
+
+    def __enter__(self) -> FilePersistence:
+        return self
+
+    def __exit__(self, exc_type: object, exc_value: object, traceback: object) -> None:
+        self.close()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self._path, f"{segment:08d}.log")
+
+    def _entry_offset(self, direction: int, mid: int) -> int:
+        return len(INDEX_MAGIC) + (direction * _MIDS + mid) * _ENTRY.size
+
+    def _load_index(self) -> None:
+        existing = set()
+        for name in os.listdir(self._path):
+            if name.endswith(".log") and name[:-4].isdigit():
+                segment = int(name[:-4])
+                existing.add(segment)
+                self._size[segment] = os.path.getsize(self._segment_path(segment))
+                self._live[segment] = 0
+
+        for i, (segment, offset, length, seq, _, _) in enumerate(_ENTRY.iter_unpack(self._index[len(INDEX_MAGIC):])):
+            if segment == 0:
+                continue
+            if segment not in existing or offset + length > self._size[segment]:
+                # Refers to a segment removed behind our back, forget it
+                _ENTRY.pack_into(self._index, len(INDEX_MAGIC) + i * _ENTRY.size, 0, 0, 0, 0, 0, 0)
+                continue
+            self._live[segment] += length
+            self._seq = max(self._seq, seq + 1)
+
+        self._current = max(existing, default=1)
+        for segment in existing:
+            if self._live[segment] == 0 and segment != self._current:
+                self._delete_segment(segment)
+        self._open_segment(self._current)
+
+    def _open_segment(self, segment: int) -> io.BufferedRandom:
+        f = self._segments.get(segment)
+        if f is None:
+            f = self._segments[segment] = open(self._segment_path(segment), "a+b")  # noqa: SIM115
+            self._live.setdefault(segment, 0)
+            self._size.setdefault(segment, 0)
+        return f
+
+    def _delete_segment(self, segment: int) -> None:
+        f = self._segments.pop(segment, None)
+        if f is not None:
+            f.close()
+        os.remove(self._segment_path(segment))
+        del self._live[segment]
+        del self._size[segment]
+
+    def _read(self, segment: int, offset: int, length: int) -> bytes:
+        f = self._open_segment(segment)
+        f.seek(offset)
+        return f.read(length)
+
+    def _write(self, record: bytes) -> tuple[int, int]:
+        segment = self._current
+        offset = self._size[segment]
+        f = self._segments[segment]
+        f.write(record)
+        f.flush()
+        if self._sync:
+            os.fsync(f.fileno())
+        self._size[segment] += len(record)
+        self._live[segment] += len(record)
+        return segment, offset
+
+    def _append(self, record: bytes) -> tuple[int, int]:
+        if self._size[self._current] > 0 and self._size[self._current] + len(record) > self._segment_size:
+            self._roll()
+        return self._write(record)
+
+    def _roll(self) -> None:
+        self._current += 1
+        self._open_segment(self._current)
+        self.compact()
+
+    def _sync_index(self) -> None:
+        if self._sync:
+            self._index.flush()
+
+    def _add(self, direction: int, message: MQTTMessage, state: int) -> None:
+        topic = bytes(message._topic)
+        payload = message.payload
+        if message.properties is not None:
+            properties = message.properties.pack()
+        else:
+            properties = b""
+        flags = message.qos | (message.retain << 2) | (message.dup << 3)
+        with self._lock:
+            self._remove(direction, message.mid)
+            seq = self._seq
+            self._seq += 1
+            record = b"".join((
+                _RECORD.pack(seq, message.mid, flags, len(topic), len(properties), len(payload)),
+                topic, properties, payload,
+            ))
+            segment, offset = self._append(record)
+            _ENTRY.pack_into(
+                self._index, self._entry_offset(direction, message.mid),
+                segment, offset, len(record), seq, state, flags)
+            self._sync_index()
+
+    def _remove(self, direction: int, mid: int) -> None:
+        pos = self._entry_offset(direction, mid)
+        segment, _, length, _, _, _ = _ENTRY.unpack_from(self._index, pos)
+        if segment == 0:
+            return
+        _ENTRY.pack_into(self._index, pos, 0, 0, 0, 0, 0, 0)
+        self._live[segment] -= length
+        if self._live[segment] == 0 and segment != self._current:
+            self._delete_segment(segment)
+
+    def _load_message(self, direction: int, mid: int, with_payload: bool) -> MQTTMessage:
+        segment, offset, length, _, state, flags = _ENTRY.unpack_from(
+            self._index, self._entry_offset(direction, mid))
+        if not with_payload:
+            _, _, _, _, _, payload_len = _RECORD.unpack(self._read(segment, offset, _RECORD.size))
+            length -= payload_len
+        record = self._read(segment, offset, length)
+        _, _, _, topic_len, properties_len, _ = _RECORD.unpack_from(record)
+        pos = _RECORD.size
+        message = MQTTMessage(mid, record[pos:pos + topic_len])
+        pos += topic_len
+        if properties_len:
+            message.properties = Properties(PacketTypes.PUBLISH)
+            message.properties.unpack(record[pos:pos + properties_len])
+        pos += properties_len
+        message.payload = record[pos:]
+        message.qos = flags & 0x03
+        message.retain = bool(flags & 0x04)
+        message.dup = bool(flags & 0x08)
+        message.state = state
+        return message
+
+    def _live_mids(self, direction: int) -> list[int]:
+        start = self._entry_offset(direction, 0)
+        entries = _ENTRY.iter_unpack(self._index[start:start + _MIDS * _ENTRY.size])
+        live = [(seq, mid) for mid, (segment, _, _, seq, _, _) in enumerate(entries) if segment != 0]
+        live.sort()
+        return [mid for _, mid in live]
+
+    def load(self) -> tuple[list[MQTTMessage], list[MQTTMessage]]:
+        with self._lock:
+            out_messages = []
+            for mid in self._live_mids(_OUT):
+                state = _ENTRY.unpack_from(self._index, self._entry_offset(_OUT, mid))[4]
+                out_messages.append(self._load_message(_OUT, mid, state != mqtt_ms_queued))
+            in_messages = [self._load_message(_IN, mid, True) for mid in self._live_mids(_IN)]
+            return out_messages, in_messages
+
+    def add_out(self, message: MQTTMessage) -> None:
+        self._add(_OUT, message, message.state)
+
+    def update_out(self, message: MQTTMessage) -> None:
+        with self._lock:
+            pos = self._entry_offset(_OUT, message.mid)
+            entry = _ENTRY.unpack_from(self._index, pos)
+            if entry[0] == 0:
+                return
+            flags = (entry[5] & ~0x08) | (message.dup << 3)
+            _ENTRY.pack_into(self._index, pos, *entry[:4], message.state, flags)
+            self._sync_index()
+
+    def remove_out(self, mid: int) -> None:
+        with self._lock:
+            self._remove(_OUT, mid)
+            self._sync_index()
+
+    def payload(self, mid: int) -> bytes:
+        with self._lock:
+            segment, offset, length, _, _, _ = _ENTRY.unpack_from(self._index, self._entry_offset(_OUT, mid))
+            if segment == 0:
+                raise KeyError(mid)
+            record = self._read(segment, offset, length)
+            _, _, _, topic_len, properties_len, _ = _RECORD.unpack_from(record)
+            return record[_RECORD.size + topic_len + properties_len:]
+
+    def add_in(self, message: MQTTMessage) -> None:
+        self._add(_IN, message, message.state)
+
+    def remove_in(self, mid: int) -> None:
+        with self._lock:
+            self._remove(_IN, mid)
+            self._sync_index()
+
+    def clear_in(self) -> None:
+        with self._lock:
+            for mid in self._live_mids(_IN):
+                self._remove(_IN, mid)
+            self._sync_index()
+
+    def compact(self) -> None:
+        """Copy the live messages of the segments that are mostly dead to
+        the current segment, and delete them."""
+        with self._lock:
+            victims = {
+                segment for segment in self._size
+                if segment != self._current
+                and self._live[segment] < self._size[segment] * self._compact_ratio
+            }
+            if not victims:
+                return
+            for direction in (_OUT, _IN):
+                for mid in self._live_mids(direction):
+                    pos = self._entry_offset(direction, mid)
+                    segment, offset, length, seq, state, flags = _ENTRY.unpack_from(self._index, pos)
+                    if segment not in victims:
+                        continue
+                    new_segment, new_offset = self._write(self._read(segment, offset, length))
+                    _ENTRY.pack_into(self._index, pos, new_segment, new_offset, length, seq, state, flags)
+                    self._live[segment] -= length
+            self._sync_index()
+            for segment in victims:
+                self._delete_segment(segment)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._index.closed:
+                return
+            self._index.flush()
+            self._index.close()
+            for f in self._segments.values():
+                f.close()
+            self._segments.clear()
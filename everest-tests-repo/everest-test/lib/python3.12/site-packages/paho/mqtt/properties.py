@@ -14,7 +14,9 @@
 #      Ian Craggs - initial implementation and/or documentation
 # *******************************************************************
 
+import re
 import struct
+from types import MappingProxyType
 
 from .packettypes import PacketTypes
 
@@ -27,6 +29,10 @@ class MalformedPacket(MQTTException):
     pass
 
 
+_UINT16 = struct.Struct("!H")
+_UINT32 = struct.Struct("!L")
+
+
 def writeInt16(length):
     # serialize a 16 bit integer to network format
     return bytearray(struct.pack("!H", length))
@@ -62,19 +68,39 @@ def readUTF(buffer, maxlen):
     maxlen -= 2
     if length > maxlen:
         raise MalformedPacket("Length delimited string too long")
-    buf = buffer[2:2+length].decode("utf-8")
-    # look for chars which are invalid for MQTT
-    for c in buf: # look for D800-DFFF in the UTF string
-        ord_c = ord(c)
-        if ord_c >= 0xD800 and ord_c <= 0xDFFF:
-            raise MalformedPacket("[MQTT-1.5.4-1] D800-DFFF found in UTF-8 data")
-        if ord_c == 0x00: # look for null in the UTF string
-            raise MalformedPacket("[MQTT-1.5.4-2] Null found in UTF-8 data")
-        if ord_c == 0xFEFF:
-            raise MalformedPacket("[MQTT-1.5.4-3] U+FEFF in UTF-8 data")
+    buf = str(buffer[2:2+length], "utf-8")
+    _checkUTF(buf)
     return buf, length+2
 
 
+# chars which are invalid for MQTT
+_INVALID_UTF = re.compile("[\ud800-\udfff\x00\ufeff]")
+
+
+def _checkUTF(buf):
+    invalid = _INVALID_UTF.search(buf)
+    if invalid is None:
+        return
+    ord_c = ord(invalid.group())
+    if ord_c >= 0xD800 and ord_c <= 0xDFFF:
+        raise MalformedPacket("[MQTT-1.5.4-1] D800-DFFF found in UTF-8 data")
+    if ord_c == 0x00: # look for null in the UTF string
+        raise MalformedPacket("[MQTT-1.5.4-2] Null found in UTF-8 data")
+    raise MalformedPacket("[MQTT-1.5.4-3] U+FEFF in UTF-8 data")
+
+
+def _readUTFFrom(buffer, pos, maxlen):
+    # Like readUTF(), reading at pos without slicing the buffer
+    if maxlen < 2:
+        raise MalformedPacket("Not enough data to read string length")
+    length, = _UINT16.unpack_from(buffer, pos)
+    if length > maxlen - 2:
+        raise MalformedPacket("Length delimited string too long")
+    buf = str(buffer[pos+2:pos+2+length], "utf-8")
+    _checkUTF(buf)
+    return buf, pos+2+length
+
+
 def writeBytes(buffer):
     return writeInt16(len(buffer)) + buffer
 
@@ -118,18 +144,163 @@ class VariableByteIntegers:  # Variable Byte Integer
 
           [MQTT-1.5.5-1] the encoded value MUST use the minimum number of bytes necessary to represent the value
         """
-        multiplier = 1
-        value = 0
-        bytes = 0
-        while 1:
-            bytes += 1
-            digit = buffer[0]
-            buffer = buffer[1:]
-            value += (digit & 127) * multiplier
-            if digit & 128 == 0:
-                break
-            multiplier *= 128
-        return (value, bytes)
+        value, pos = _decodeVBIFrom(buffer, 0)
+        return (value, pos)
+
+
+def _decodeVBIFrom(buffer, pos):
+    # Decode the variable byte integer at pos, return the value and the
+    # position following it.
+    multiplier = 1
+    value = 0
+    while 1:
+        digit = buffer[pos]
+        pos += 1
+        value += (digit & 127) * multiplier
+        if digit & 128 == 0:
+            break
+        multiplier *= 128
+    return value, pos
+
+
+# Property data types, the type of a property is its index in _TYPES
+_TYPES = ("Byte", "Two Byte Integer", "Four Byte Integer", "Variable Byte Integer",
+          "Binary Data", "UTF-8 Encoded String", "UTF-8 String Pair")
+(_BYTE, _TWO_BYTE_INTEGER, _FOUR_BYTE_INTEGER, _VARIABLE_BYTE_INTEGER,
+ _BINARY_DATA, _UTF8_STRING, _UTF8_STRING_PAIR) = range(len(_TYPES))
+
+_NAMES = MappingProxyType({
+    "Payload Format Indicator": 1,
+    "Message Expiry Interval": 2,
+    "Content Type": 3,
+    "Response Topic": 8,
+    "Correlation Data": 9,
+    "Subscription Identifier": 11,
+    "Session Expiry Interval": 17,
+    "Assigned Client Identifier": 18,
+    "Server Keep Alive": 19,
+    "Authentication Method": 21,
+    "Authentication Data": 22,
+    "Request Problem Information": 23,
+    "Will Delay Interval": 24,
+    "Request Response Information": 25,
+    "Response Information": 26,
+    "Server Reference": 28,
+    "Reason String": 31,
+    "Receive Maximum": 33,
+    "Topic Alias Maximum": 34,
+    "Topic Alias": 35,
+    "Maximum QoS": 36,
+    "Retain Available": 37,
+    "User Property": 38,
+    "Maximum Packet Size": 39,
+    "Wildcard Subscription Available": 40,
+    "Subscription Identifier Available": 41,
+    "Shared Subscription Available": 42
+})
+
+_PROPERTIES = MappingProxyType({
+    # id:  type, packets
+    # payload format indicator
+    1: (_BYTE, (PacketTypes.PUBLISH, PacketTypes.WILLMESSAGE)),
+    2: (_FOUR_BYTE_INTEGER, (PacketTypes.PUBLISH, PacketTypes.WILLMESSAGE)),
+    3: (_UTF8_STRING, (PacketTypes.PUBLISH, PacketTypes.WILLMESSAGE)),
+    8: (_UTF8_STRING, (PacketTypes.PUBLISH, PacketTypes.WILLMESSAGE)),
+    9: (_BINARY_DATA, (PacketTypes.PUBLISH, PacketTypes.WILLMESSAGE)),
+    11: (_VARIABLE_BYTE_INTEGER,
+         (PacketTypes.PUBLISH, PacketTypes.SUBSCRIBE)),
+    17: (_FOUR_BYTE_INTEGER,
+         (PacketTypes.CONNECT, PacketTypes.CONNACK, PacketTypes.DISCONNECT)),
+    18: (_UTF8_STRING, (PacketTypes.CONNACK,)),
+    19: (_TWO_BYTE_INTEGER, (PacketTypes.CONNACK,)),
+    21: (_UTF8_STRING,
+         (PacketTypes.CONNECT, PacketTypes.CONNACK, PacketTypes.AUTH)),
+    22: (_BINARY_DATA,
+         (PacketTypes.CONNECT, PacketTypes.CONNACK, PacketTypes.AUTH)),
+    23: (_BYTE,
+         (PacketTypes.CONNECT,)),
+    24: (_FOUR_BYTE_INTEGER, (PacketTypes.WILLMESSAGE,)),
+    25: (_BYTE, (PacketTypes.CONNECT,)),
+    26: (_UTF8_STRING, (PacketTypes.CONNACK,)),
+    28: (_UTF8_STRING,
+         (PacketTypes.CONNACK, PacketTypes.DISCONNECT)),
+    31: (_UTF8_STRING,
+         (PacketTypes.CONNACK, PacketTypes.PUBACK, PacketTypes.PUBREC,
+          PacketTypes.PUBREL, PacketTypes.PUBCOMP, PacketTypes.SUBACK,
+          PacketTypes.UNSUBACK, PacketTypes.DISCONNECT, PacketTypes.AUTH)),
+    33: (_TWO_BYTE_INTEGER,
+         (PacketTypes.CONNECT, PacketTypes.CONNACK)),
+    34: (_TWO_BYTE_INTEGER,
+         (PacketTypes.CONNECT, PacketTypes.CONNACK)),
+    35: (_TWO_BYTE_INTEGER, (PacketTypes.PUBLISH,)),
+    36: (_BYTE, (PacketTypes.CONNACK,)),
+    37: (_BYTE, (PacketTypes.CONNACK,)),
+    38: (_UTF8_STRING_PAIR,
+         (PacketTypes.CONNECT, PacketTypes.CONNACK,
+          PacketTypes.PUBLISH, PacketTypes.PUBACK,
+          PacketTypes.PUBREC, PacketTypes.PUBREL, PacketTypes.PUBCOMP,
+          PacketTypes.SUBSCRIBE, PacketTypes.SUBACK,
+          PacketTypes.UNSUBSCRIBE, PacketTypes.UNSUBACK,
+          PacketTypes.DISCONNECT, PacketTypes.AUTH, PacketTypes.WILLMESSAGE)),
+    39: (_FOUR_BYTE_INTEGER,
+         (PacketTypes.CONNECT, PacketTypes.CONNACK)),
+    40: (_BYTE, (PacketTypes.CONNACK,)),
+    41: (_BYTE, (PacketTypes.CONNACK,)),
+    42: (_BYTE, (PacketTypes.CONNACK,)),
+})
+
+# Properties which may appear more than once
+_MULTIPLE = frozenset((11, 38))
+
+# Lookup tables derived from _NAMES. Attributes use the property name without
+# spaces ("compressed" name), _COMPRESSED_NAMES is in the order properties are
+# packed and displayed.
+_COMPRESSED_NAMES = tuple((name.replace(' ', ''), identifier) for name, identifier in _NAMES.items())
+_IDENT_FROM_COMPRESSED = MappingProxyType(dict(_COMPRESSED_NAMES))
+_NAME_FROM_IDENT = MappingProxyType({identifier: name for name, identifier in _NAMES.items()})
+_COMPRESSED_FROM_IDENT = MappingProxyType({identifier: name for name, identifier in _COMPRESSED_NAMES})
+
+# Attributes which are not properties
+_PRIVATE_VARS = frozenset(("packetType", "types", "names", "properties", "_values", "_unpacked"))
+
+
+def _readProperties(buffer):
+    # Yield the identifier and value of the properties encoded in buffer
+    pos = 0
+    end = len(buffer)
+    try:
+        while pos < end:
+            identifier, pos = _decodeVBIFrom(buffer, pos)  # property identifier
+            try:
+                attr_type = _PROPERTIES[identifier][0]
+            except KeyError:
+                raise MalformedPacket(f"Unknown property identifier {identifier}") from None
+            if attr_type == _BYTE:
+                value = buffer[pos]
+                pos += 1
+            elif attr_type == _TWO_BYTE_INTEGER:
+                value, = _UINT16.unpack_from(buffer, pos)
+                pos += 2
+            elif attr_type == _FOUR_BYTE_INTEGER:
+                value, = _UINT32.unpack_from(buffer, pos)
+                pos += 4
+            elif attr_type == _VARIABLE_BYTE_INTEGER:
+                value, pos = _decodeVBIFrom(buffer, pos)
+            elif attr_type == _BINARY_DATA:
+                length, = _UINT16.unpack_from(buffer, pos)
+                value = buffer[pos+2:pos+2+length]
+                pos += 2 + length
+            elif attr_type == _UTF8_STRING:
+                value, pos = _readUTFFrom(buffer, pos, end - pos)
+            else:
+                value0, pos = _readUTFFrom(buffer, pos, end - pos)
+                value1, pos = _readUTFFrom(buffer, pos, end - pos)
+                value = (value0, value1)
+            if pos > end:
+                raise MalformedPacket("Property value exceeds the properties length")
+            yield identifier, value
+    except (struct.error, IndexError) as err:
+        raise MalformedPacket(f"Truncated property: {err}") from None
 
 
 class Properties:
@@ -149,239 +320,185 @@ class Properties:
     this point. Then properties are added as attributes, the name of which is the string property
     name without the spaces.
 
+    Properties received from the network are validated by unpack(), which raises
+    MalformedPacket if they are malformed, and only set when first accessed.
+
     """
 
+    __slots__ = ("packetType", "_values", "_unpacked")
+
+    # Shared by all instances, these can't be modified
+    types = _TYPES
+    names = _NAMES
+    properties = _PROPERTIES
+
     def __init__(self, packetType):
-        self.packetType = packetType
-        self.types = ["Byte", "Two Byte Integer", "Four Byte Integer", "Variable Byte Integer",
-                      "Binary Data", "UTF-8 Encoded String", "UTF-8 String Pair"]
-
-        self.names = {
-            "Payload Format Indicator": 1,
-            "Message Expiry Interval": 2,
-            "Content Type": 3,
-            "Response Topic": 8,
-            "Correlation Data": 9,
-            "Subscription Identifier": 11,
-            "Session Expiry Interval": 17,
-            "Assigned Client Identifier": 18,
-            "Server Keep Alive": 19,
-            "Authentication Method": 21,
-            "Authentication Data": 22,
-            "Request Problem Information": 23,
-            "Will Delay Interval": 24,
-            "Request Response Information": 25,
-            "Response Information": 26,
-            "Server Reference": 28,
-            "Reason String": 31,
-            "Receive Maximum": 33,
-            "Topic Alias Maximum": 34,
-            "Topic Alias": 35,
-            "Maximum QoS": 36,
-            "Retain Available": 37,
-            "User Property": 38,
-            "Maximum Packet Size": 39,
-            "Wildcard Subscription Available": 40,
-            "Subscription Identifier Available": 41,
-            "Shared Subscription Available": 42
-        }
-
-        self.properties = {
-            # id:  type, packets
-            # payload format indicator
-            1: (self.types.index("Byte"), [PacketTypes.PUBLISH, PacketTypes.WILLMESSAGE]),
-            2: (self.types.index("Four Byte Integer"), [PacketTypes.PUBLISH, PacketTypes.WILLMESSAGE]),
-            3: (self.types.index("UTF-8 Encoded String"), [PacketTypes.PUBLISH, PacketTypes.WILLMESSAGE]),
-            8: (self.types.index("UTF-8 Encoded String"), [PacketTypes.PUBLISH, PacketTypes.WILLMESSAGE]),
-            9: (self.types.index("Binary Data"), [PacketTypes.PUBLISH, PacketTypes.WILLMESSAGE]),
-            11: (self.types.index("Variable Byte Integer"),
-                 [PacketTypes.PUBLISH, PacketTypes.SUBSCRIBE]),
-            17: (self.types.index("Four Byte Integer"),
-                 [PacketTypes.CONNECT, PacketTypes.CONNACK, PacketTypes.DISCONNECT]),
-            18: (self.types.index("UTF-8 Encoded String"), [PacketTypes.CONNACK]),
-            19: (self.types.index("Two Byte Integer"), [PacketTypes.CONNACK]),
-            21: (self.types.index("UTF-8 Encoded String"),
-                 [PacketTypes.CONNECT, PacketTypes.CONNACK, PacketTypes.AUTH]),
-            22: (self.types.index("Binary Data"),
-                 [PacketTypes.CONNECT, PacketTypes.CONNACK, PacketTypes.AUTH]),
-            23: (self.types.index("Byte"),
-                 [PacketTypes.CONNECT]),
-            24: (self.types.index("Four Byte Integer"), [PacketTypes.WILLMESSAGE]),
-            25: (self.types.index("Byte"), [PacketTypes.CONNECT]),
-            26: (self.types.index("UTF-8 Encoded String"), [PacketTypes.CONNACK]),
-            28: (self.types.index("UTF-8 Encoded String"),
-                 [PacketTypes.CONNACK, PacketTypes.DISCONNECT]),
-            31: (self.types.index("UTF-8 Encoded String"),
-                 [PacketTypes.CONNACK, PacketTypes.PUBACK, PacketTypes.PUBREC,
-                  PacketTypes.PUBREL, PacketTypes.PUBCOMP, PacketTypes.SUBACK,
-                  PacketTypes.UNSUBACK, PacketTypes.DISCONNECT, PacketTypes.AUTH]),
-            33: (self.types.index("Two Byte Integer"),
-                 [PacketTypes.CONNECT, PacketTypes.CONNACK]),
-            34: (self.types.index("Two Byte Integer"),
-                 [PacketTypes.CONNECT, PacketTypes.CONNACK]),
-            35: (self.types.index("Two Byte Integer"), [PacketTypes.PUBLISH]),
-            36: (self.types.index("Byte"), [PacketTypes.CONNACK]),
-            37: (self.types.index("Byte"), [PacketTypes.CONNACK]),
-            38: (self.types.index("UTF-8 String Pair"),
-                 [PacketTypes.CONNECT, PacketTypes.CONNACK,
-                  PacketTypes.PUBLISH, PacketTypes.PUBACK,
-                  PacketTypes.PUBREC, PacketTypes.PUBREL, PacketTypes.PUBCOMP,
-                  PacketTypes.SUBSCRIBE, PacketTypes.SUBACK,
-                  PacketTypes.UNSUBSCRIBE, PacketTypes.UNSUBACK,
-                  PacketTypes.DISCONNECT, PacketTypes.AUTH, PacketTypes.WILLMESSAGE]),
-            39: (self.types.index("Four Byte Integer"),
-                 [PacketTypes.CONNECT, PacketTypes.CONNACK]),
-            40: (self.types.index("Byte"), [PacketTypes.CONNACK]),
-            41: (self.types.index("Byte"), [PacketTypes.CONNACK]),
-            42: (self.types.index("Byte"), [PacketTypes.CONNACK]),
-        }
+        object.__setattr__(self, "packetType", packetType)
+        object.__setattr__(self, "_values", {})
+        # Properties read by unpack(), not set yet
+        object.__setattr__(self, "_unpacked", None)
 
     def allowsMultiple(self, compressedName):
-        return self.getIdentFromName(compressedName) in [11, 38]
+        return self.getIdentFromName(compressedName) in _MULTIPLE
 
     def getIdentFromName(self, compressedName):
         # return the identifier corresponding to the property name
-        result = -1
-        for name in self.names.keys():
-            if compressedName == name.replace(' ', ''):
-                result = self.names[name]
-                break
-        return result
+        return _IDENT_FROM_COMPRESSED.get(compressedName, -1)
+
+    def __getattr__(self, name):
+        # Only called for names which aren't a slot or class attribute
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._unpacked is not None:
+            self._decode()
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(f"'Properties' object has no attribute '{name}'") from None
+
+    def __delattr__(self, name):
+        if self._unpacked is not None:
+            self._decode()
+        try:
+            del self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
 
     def __setattr__(self, name, value):
         name = name.replace(' ', '')
-        privateVars = ["packetType", "types", "names", "properties"]
-        if name in privateVars:
+        if name in _PRIVATE_VARS:
             object.__setattr__(self, name, value)
-        else:
-            # the name could have spaces in, or not.  Remove spaces before assignment
-            if name not in [aname.replace(' ', '') for aname in self.names.keys()]:
-                raise MQTTException(
-                    f"Property name must be one of {self.names.keys()}")
-            # check that this attribute applies to the packet type
-            if self.packetType not in self.properties[self.getIdentFromName(name)][1]:
-                raise MQTTException(f"Property {name} does not apply to packet type {PacketTypes.Names[self.packetType]}")
-
-            # Check for forbidden values
+            return
+        if self._unpacked is not None:
+            self._decode()
+        self._set(name, value)
+
+    def _set(self, name, value):
+        # the name could have spaces in, or not.  Remove spaces before assignment
+        identifier = _IDENT_FROM_COMPRESSED.get(name)
+        if identifier is None:
+            raise MQTTException(
+                f"Property name must be one of {list(self.names)}")
+        self._check_value(name, identifier, value)
+
+        if identifier in _MULTIPLE:
             if not isinstance(value, list):
-                if name in ["ReceiveMaximum", "TopicAlias"] \
-                        and (value < 1 or value > 65535):
+                value = [value]
+            if name in self._values:
+                value = self._values[name] + value
+        self._values[name] = value
 
-                    raise MQTTException(f"{name} property value must be in the range 1-65535")
-                elif name in ["TopicAliasMaximum"] \
-                        and (value < 0 or value > 65535):
+    def _check_value(self, name, identifier, value):
+        # check that this attribute applies to the packet type
+        if self.packetType not in _PROPERTIES[identifier][1]:
+            raise MQTTException(f"Property {name} does not apply to packet type {PacketTypes.Names[self.packetType]}")
 
-                    raise MQTTException(f"{name} property value must be in the range 0-65535")
-                elif name in ["MaximumPacketSize", "SubscriptionIdentifier"] \
-                        and (value < 1 or value > 268435455):
+        # Check for forbidden values
+        if not isinstance(value, list):
+            if name in ["ReceiveMaximum", "TopicAlias"] \
+                    and (value < 1 or value > 65535):
 
-                    raise MQTTException(f"{name} property value must be in the range 1-268435455")
-                elif name in ["RequestResponseInformation", "RequestProblemInformation", "PayloadFormatIndicator"] \
-                        and (value != 0 and value != 1):
+                raise MQTTException(f"{name} property value must be in the range 1-65535")
+            elif name in ["TopicAliasMaximum"] \
+                    and (value < 0 or value > 65535):
 
-                    raise MQTTException(
-                        f"{name} property value must be 0 or 1")
+                raise MQTTException(f"{name} property value must be in the range 0-65535")
+            elif name in ["MaximumPacketSize", "SubscriptionIdentifier"] \
+                    and (value < 1 or value > 268435455):
 
-            if self.allowsMultiple(name):
-                if not isinstance(value, list):
-                    value = [value]
-                if hasattr(self, name):
-                    value = object.__getattribute__(self, name) + value
-            object.__setattr__(self, name, value)
+                raise MQTTException(f"{name} property value must be in the range 1-268435455")
+            elif name in ["RequestResponseInformation", "RequestProblemInformation", "PayloadFormatIndicator"] \
+                    and (value != 0 and value != 1):
+
+                raise MQTTException(
+                    f"{name} property value must be 0 or 1")
+
+    def _items(self):
+        # (compressed name, identifier, value) of the properties set, in
+        # packing order
+        if self._unpacked is not None:
+            self._decode()
+        values = self._values
+        return [(name, identifier, values[name]) for name, identifier in _COMPRESSED_NAMES if name in values]
 
     def __str__(self):
         buffer = "["
         first = True
-        for name in self.names.keys():
-            compressedName = name.replace(' ', '')
-            if hasattr(self, compressedName):
-                if not first:
-                    buffer += ", "
-                buffer += f"{compressedName} : {getattr(self, compressedName)}"
-                first = False
+        for compressedName, _, value in self._items():
+            if not first:
+                buffer += ", "
+            buffer += f"{compressedName} : {value}"
+            first = False
         buffer += "]"
         return buffer
 
     def json(self):
         data = {}
-        for name in self.names.keys():
-            compressedName = name.replace(' ', '')
-            if hasattr(self, compressedName):
-                val = getattr(self, compressedName)
-                if compressedName == 'CorrelationData' and isinstance(val, bytes):
-                    data[compressedName] = val.hex()
-                else:
-                    data[compressedName] = val
+        for compressedName, _, val in self._items():
+            if compressedName == 'CorrelationData' and isinstance(val, bytes):
+                data[compressedName] = val.hex()
+            else:
+                data[compressedName] = val
         return data
 
     def isEmpty(self):
-        rc = True
-        for name in self.names.keys():
-            compressedName = name.replace(' ', '')
-            if hasattr(self, compressedName):
-                rc = False
-                break
-        return rc
+        if self._unpacked is not None:
+            self._decode()
+        return not self._values
 
     def clear(self):
-        for name in self.names.keys():
-            compressedName = name.replace(' ', '')
-            if hasattr(self, compressedName):
-                delattr(self, compressedName)
+        self._values.clear()
+        object.__setattr__(self, "_unpacked", None)
 
     def writeProperty(self, identifier, type, value):
         buffer = b""
         buffer += VariableByteIntegers.encode(identifier)  # identifier
-        if type == self.types.index("Byte"):  # value
+        if type == _BYTE:  # value
             buffer += bytes([value])
-        elif type == self.types.index("Two Byte Integer"):
+        elif type == _TWO_BYTE_INTEGER:
             buffer += writeInt16(value)
-        elif type == self.types.index("Four Byte Integer"):
+        elif type == _FOUR_BYTE_INTEGER:
             buffer += writeInt32(value)
-        elif type == self.types.index("Variable Byte Integer"):
+        elif type == _VARIABLE_BYTE_INTEGER:
             buffer += VariableByteIntegers.encode(value)
-        elif type == self.types.index("Binary Data"):
+        elif type == _BINARY_DATA:
             buffer += writeBytes(value)
-        elif type == self.types.index("UTF-8 Encoded String"):
+        elif type == _UTF8_STRING:
             buffer += writeUTF(value)
-        elif type == self.types.index("UTF-8 String Pair"):
+        elif type == _UTF8_STRING_PAIR:
             buffer += writeUTF(value[0]) + writeUTF(value[1])
         return buffer
 
     def pack(self):
         # serialize properties into buffer for sending over network
         buffer = b""
-        for name in self.names.keys():
-            compressedName = name.replace(' ', '')
-            if hasattr(self, compressedName):
-                identifier = self.getIdentFromName(compressedName)
-                attr_type = self.properties[identifier][0]
-                if self.allowsMultiple(compressedName):
-                    for prop in getattr(self, compressedName):
-                        buffer += self.writeProperty(identifier,
-                                                     attr_type, prop)
-                else:
-                    buffer += self.writeProperty(identifier, attr_type,
-                                                 getattr(self, compressedName))
+        for _, identifier, value in self._items():
+            attr_type = _PROPERTIES[identifier][0]
+            if identifier in _MULTIPLE:
+                for prop in value:
+                    buffer += self.writeProperty(identifier,
+                                                 attr_type, prop)
+            else:
+                buffer += self.writeProperty(identifier, attr_type, value)
         return VariableByteIntegers.encode(len(buffer)) + buffer
 
     def readProperty(self, buffer, type, propslen):
-        if type == self.types.index("Byte"):
+        if type == _BYTE:
             value = buffer[0]
             valuelen = 1
-        elif type == self.types.index("Two Byte Integer"):
+        elif type == _TWO_BYTE_INTEGER:
             value = readInt16(buffer)
             valuelen = 2
-        elif type == self.types.index("Four Byte Integer"):
+        elif type == _FOUR_BYTE_INTEGER:
             value = readInt32(buffer)
             valuelen = 4
-        elif type == self.types.index("Variable Byte Integer"):
+        elif type == _VARIABLE_BYTE_INTEGER:
             value, valuelen = VariableByteIntegers.decode(buffer)
-        elif type == self.types.index("Binary Data"):
+        elif type == _BINARY_DATA:
             value, valuelen = readBytes(buffer)
-        elif type == self.types.index("UTF-8 Encoded String"):
+        elif type == _UTF8_STRING:
             value, valuelen = readUTF(buffer, propslen)
-        elif type == self.types.index("UTF-8 String Pair"):
+        elif type == _UTF8_STRING_PAIR:
             value, valuelen = readUTF(buffer, propslen)
             buffer = buffer[valuelen:]  # strip the bytes used by the value
             value1, valuelen1 = readUTF(buffer, propslen - valuelen)
@@ -390,32 +507,46 @@ class Properties:
         return value, valuelen
 
     def getNameFromIdent(self, identifier):
-        rc = None
-        for name in self.names:
-            if self.names[name] == identifier:
-                rc = name
-        return rc
+        return _NAME_FROM_IDENT.get(identifier)
 
     def unpack(self, buffer):
+        # The properties are decoded and validated here, and only set when
+        # first accessed
         self.clear()
-        # deserialize properties into attributes from buffer received from network
-        propslen, VBIlen = VariableByteIntegers.decode(buffer)
-        buffer = buffer[VBIlen:]  # strip the bytes used by the VBI
-        propslenleft = propslen
-        while propslenleft > 0:  # properties length is 0 if there are none
-            identifier, VBIlen2 = VariableByteIntegers.decode(
-                buffer)  # property identifier
-            buffer = buffer[VBIlen2:]  # strip the bytes used by the VBI
-            propslenleft -= VBIlen2
-            attr_type = self.properties[identifier][0]
-            value, valuelen = self.readProperty(
-                buffer, attr_type, propslenleft)
-            buffer = buffer[valuelen:]  # strip the bytes used by the value
-            propslenleft -= valuelen
-            propname = self.getNameFromIdent(identifier)
-            compressedName = propname.replace(' ', '')
-            if not self.allowsMultiple(compressedName) and hasattr(self, compressedName):
-                raise MQTTException(
-                    f"Property '{property}' must not exist more than once")
-            setattr(self, propname, value)
-        return self, propslen + VBIlen
+        try:
+            propslen, VBIlen = VariableByteIntegers.decode(buffer)
+        except IndexError:
+            raise MalformedPacket("Truncated properties length") from None
+        end = VBIlen + propslen
+        if len(buffer) < end:
+            raise MalformedPacket("Properties length exceeds the packet")
+        if propslen > 0:  # properties length is 0 if there are none
+            object.__setattr__(self, "_unpacked", self._check(bytes(buffer[VBIlen:end])))
+        return self, end
+
+    def _check(self, buffer):
+        # Decode the properties, raising the errors _set() would raise for
+        # them. Return their (compressed name, identifier, value).
+        seen = set()
+        unpacked = []
+        for identifier, value in _readProperties(buffer):
+            compressedName = _COMPRESSED_FROM_IDENT[identifier]
+            if identifier not in _MULTIPLE:
+                if identifier in seen:
+                    raise MQTTException(
+                        f"Property '{compressedName}' must not exist more than once")
+                seen.add(identifier)
+            self._check_value(compressedName, identifier, value)
+            unpacked.append((compressedName, identifier, value))
+        return unpacked
+
+    def _decode(self):
+        # Set the properties read by unpack(), they are already validated
+        unpacked = self._unpacked
+        object.__setattr__(self, "_unpacked", None)
+        values = self._values
+        for compressedName, identifier, value in unpacked:
+            if identifier in _MULTIPLE:
+                values.setdefault(compressedName, []).append(value)
+            else:
+                values[compressedName] = value
@@ -21,10 +21,13 @@ broker, then disconnect and nothing else is required.
 from __future__ import annotations
 
 import collections
+import threading
+import zlib
+from array import array
 from collections.abc import Iterable
-from typing import TYPE_CHECKING, Any, List, Tuple, Union
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Tuple, Union
 
-from paho.mqtt.enums import CallbackAPIVersion, MQTTProtocolVersion
+from paho.mqtt.enums import CallbackAPIVersion, MQTTErrorCode, MQTTProtocolVersion
 from paho.mqtt.properties import Properties
 from paho.mqtt.reasoncodes import ReasonCode
 
@@ -196,6 +199,21 @@ def multiple(
     client.on_publish = _on_publish
     client.on_connect = _on_connect  # type: ignore
 
+    _client_setup(client, will, auth, tls, proxy_args)
+
+    client.connect(hostname, port, keepalive)
+    client.loop_forever()
+
+
+def _client_setup(
+    client: paho.Client,
+    will: MessageDict | None,
+    auth: AuthParameter | None,
+    tls: TLSParameter | None,
+    proxy_args: Any | None,
+) -> None:
+    """Internal function"""
+
     if proxy_args is not None:
         client.proxy_set(**proxy_args)
 
@@ -213,6 +231,7 @@ def multiple(
 
     if tls is not None:
         if isinstance(tls, dict):
+            tls = tls.copy()
             insecure = tls.pop('insecure', False)
             # mypy don't get that tls no longer contains the key insecure
             client.tls_set(**tls)  # type: ignore[misc]
@@ -224,8 +243,257 @@ def multiple(
             # Assume input is SSLContext object
             client.tls_set_context(tls)
 
-    client.connect(hostname, port, keepalive)
-    client.loop_forever()
+
+class PublishStats(NamedTuple):
+    """Statistics returned by `stream()`.
+
+    Times are in seconds. The latency of a message is the time from its
+    publication to its acknowledgement by the broker (for QoS 0, to its
+    writing to the network).
+    """
+    messages: int
+    payload_bytes: int
+    elapsed: float
+    latency_mean: float | None
+    latency_p50: float | None
+    latency_p99: float | None
+    latency_max: float | None
+    per_connection: tuple[int, ...]
+
+    @property
+    def rate(self) -> float:
+        """Messages per second."""
+        return self.messages / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Payload bytes per second."""
+        return self.payload_bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _StreamConnection:
+    """Internal class, one client of `stream()` and its inflight window."""
+
+    def __init__(self, client: paho.Client, inflight: int) -> None:
+        self.client = client
+        self.window = threading.Semaphore(inflight)
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.connected = threading.Event()
+        self.error: Exception | None = None
+        self.outstanding = 0
+        self.count = 0
+        self.payload_bytes = 0
+        self.latencies = array('d')
+        # Publication time of messages not yet acknowledged, and time of the
+        # acknowledgements received before publish() returned the mid.
+        self.started: dict[int, float] = {}
+        self.acked: dict[int, float] = {}
+        # QoS 0 messages published and not yet written. Those thrown away
+        # by a reconnection are marked as published but on_publish is not
+        # called for them, see release_lost().
+        self.qos0: dict[int, paho.MQTTMessageInfo] = {}
+        client.on_connect = self.on_connect
+        client.on_publish = self.on_publish
+
+    def on_connect(self, client: paho.Client, userdata: Any, flags: Any, reason_code: ReasonCode, properties: Any) -> None:
+        if reason_code != 0:
+            self.error = mqtt.MQTTException(paho.connack_string(reason_code))
+        self.connected.set()
+
+    def on_publish(self, client: paho.Client, userdata: Any, mid: int, reason_code: ReasonCode, properties: Properties) -> None:
+        now = paho.time_func()
+        with self.lock:
+            start = self.started.pop(mid, None)
+            if start is None:
+                self.acked[mid] = now
+            else:
+                self.latencies.append(now - start)
+            self.qos0.pop(mid, None)
+            self.outstanding -= 1
+            if self.outstanding == 0:
+                self.idle.notify_all()
+        self.window.release()
+
+    def check(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def wait_connected(self, timeout: float) -> None:
+        deadline = paho.time_func() + timeout
+        while not self.connected.wait(1.0):
+            if paho.time_func() >= deadline:
+                raise mqtt.MQTTException("No CONNACK received from the broker")
+        self.check()
+
+    def release_lost(self) -> None:
+        """Release the window slots of the QoS 0 messages thrown away by a
+        reconnection. Must be called with lock held."""
+        # on_publish returns before the message is marked as published, so
+        # a published message still here did not go through on_publish.
+        lost = [mid for mid, info in self.qos0.items() if info._published]
+        for mid in lost:
+            del self.qos0[mid]
+            del self.started[mid]
+            self.outstanding -= 1
+            self.window.release()
+        if lost and self.outstanding == 0:
+            self.idle.notify_all()
+
+    def publish(self, kwargs: dict[str, Any], payload_len: int) -> None:
+        while not self.window.acquire(timeout=1.0):
+            self.check()
+            with self.lock:
+                self.release_lost()
+        with self.lock:
+            self.outstanding += 1
+        qos = kwargs.get('qos', 0)
+        start = paho.time_func()
+        try:
+            info = self.client.publish(**kwargs)
+            # A QoS > 0 message is kept to be sent once reconnected, but a
+            # QoS 0 one is not queued while the connection is lost.
+            if not (info.rc == MQTTErrorCode.MQTT_ERR_SUCCESS
+                    or (info.rc == MQTTErrorCode.MQTT_ERR_NO_CONN and qos > 0)):
+                raise mqtt.MQTTException(paho.error_string(info.rc))
+        except BaseException:
+            # Not queued, on_publish will not be called
+            with self.lock:
+                self.outstanding -= 1
+            self.window.release()
+            raise
+        with self.lock:
+            end = self.acked.pop(info.mid, None)
+            if end is None:
+                self.started[info.mid] = start
+                if qos == 0:
+                    self.qos0[info.mid] = info
+            else:
+                self.latencies.append(end - start)
+        self.count += 1
+        self.payload_bytes += payload_len
+
+    def wait_idle(self) -> None:
+        with self.lock:
+            while self.outstanding > 0:
+                self.idle.wait(1.0)
+                self.check()
+                self.release_lost()
+
+
+def stream(
+    msgs: Iterable[MessageDict | MessageTuple],
+    hostname: str = "localhost",
+    port: int = 1883,
+    client_id: str = "",
+    keepalive: int = 60,
+    will: MessageDict | None = None,
+    auth: AuthParameter | None = None,
+    tls: TLSParameter | None = None,
+    protocol: MQTTProtocolVersion = paho.MQTTv311,
+    transport: Literal["tcp", "websockets"] = "tcp",
+    proxy_args: Any | None = None,
+    inflight: int = 100,
+    connections: int = 1,
+) -> PublishStats:
+    """Publish a stream of messages to a broker, then disconnect cleanly.
+
+    Unlike `multiple()`, which waits for each message to be delivered before
+    publishing the next one, up to inflight messages per connection are
+    published without waiting for their acknowledgement. msgs may be any
+    iterable, e.g. a generator, and is consumed as the window allows, so it
+    does not need to fit in memory.
+
+    With connections > 1, that many clients are connected and messages are
+    distributed among them by topic: all the messages of a topic are
+    published by the same client, so their order is kept.
+
+    Returns once all messages have been delivered, with the statistics of
+    the publication. QoS 0 messages not yet sent when the connection is lost
+    are not sent again, and publishing a QoS 0 message while disconnected
+    raises MQTTException, as does a broker not answering the connection
+    within the client connect_timeout plus keepalive seconds.
+
+    :param msgs: the messages to publish, in the form accepted by
+           `multiple()`.
+
+    :param int inflight: the maximum number of messages published and not yet
+           acknowledged, per connection.
+
+    :param int connections: the number of parallel connections. If client_id
+           is set, "-<n>" is appended to it for each connection.
+
+    The other parameters are those of `multiple()`.
+    """
+
+    if not isinstance(msgs, Iterable):
+        raise TypeError('msgs must be an iterable')
+    if inflight < 1:
+        raise ValueError('inflight must be at least 1')
+    if connections < 1:
+        raise ValueError('connections must be at least 1')
+
+    conns: list[_StreamConnection] = []
+    try:
+        for n in range(connections):
+            if client_id and connections > 1:
+                conn_id = f"{client_id}-{n}"
+            else:
+                conn_id = client_id
+            client = paho.Client(
+                CallbackAPIVersion.VERSION2,
+                client_id=conn_id,
+                protocol=protocol,
+                transport=transport,
+            )
+            client.enable_logger()
+            client.max_inflight_messages = inflight
+            conn = _StreamConnection(client, inflight)
+            _client_setup(client, will, auth, tls, proxy_args)
+            client.connect(hostname, port, keepalive)
+            client.loop_start()
+            conns.append(conn)
+
+        for conn in conns:
+            conn.wait_connected(conn.client.connect_timeout + keepalive)
+
+        started = paho.time_func()
+        for message in msgs:
+            if isinstance(message, dict):
+                kwargs = dict(message)
+            elif isinstance(message, (tuple, list)):
+                kwargs = dict(zip(("topic", "payload", "qos", "retain", "properties"), message))
+            else:
+                raise TypeError('message must be a dict, tuple, or list')
+            payload = paho._encode_payload(kwargs.get('payload'))
+            kwargs['payload'] = payload
+
+            if connections == 1:
+                conn = conns[0]
+            else:
+                conn = conns[zlib.crc32(kwargs['topic'].encode('utf-8')) % connections]
+            conn.publish(kwargs, len(payload))
+
+        for conn in conns:
+            conn.wait_idle()
+        elapsed = paho.time_func() - started
+    finally:
+        for conn in conns:
+            conn.client.disconnect()
+            conn.client.loop_stop()
+
+    latencies = sorted(latency for conn in conns for latency in conn.latencies)
+    count = len(latencies)
+    return PublishStats(
+        sum(conn.count for conn in conns),
+        sum(conn.payload_bytes for conn in conns),
+        elapsed,
+        sum(latencies) / count if count else None,
+        latencies[count // 2] if count else None,
+        latencies[min(count - 1, count * 99 // 100)] if count else None,
+        latencies[-1] if count else None,
+        tuple(conn.count for conn in conns),
+    )
 
 
 def single(
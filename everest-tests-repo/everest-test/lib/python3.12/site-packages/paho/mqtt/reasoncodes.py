@@ -16,11 +16,120 @@
 
 import functools
 import warnings
+from types import MappingProxyType
 from typing import Any
 
 from .packettypes import PacketTypes
 
 
+_NAMES = {
+    0: {"Success": [PacketTypes.CONNACK, PacketTypes.PUBACK,
+                    PacketTypes.PUBREC, PacketTypes.PUBREL, PacketTypes.PUBCOMP,
+                    PacketTypes.UNSUBACK, PacketTypes.AUTH],
+        "Normal disconnection": [PacketTypes.DISCONNECT],
+        "Granted QoS 0": [PacketTypes.SUBACK]},
+    1: {"Granted QoS 1": [PacketTypes.SUBACK]},
+    2: {"Granted QoS 2": [PacketTypes.SUBACK]},
+    4: {"Disconnect with will message": [PacketTypes.DISCONNECT]},
+    16: {"No matching subscribers":
+         [PacketTypes.PUBACK, PacketTypes.PUBREC]},
+    17: {"No subscription found": [PacketTypes.UNSUBACK]},
+    24: {"Continue authentication": [PacketTypes.AUTH]},
+    25: {"Re-authenticate": [PacketTypes.AUTH]},
+    128: {"Unspecified error": [PacketTypes.CONNACK, PacketTypes.PUBACK,
+                                PacketTypes.PUBREC, PacketTypes.SUBACK, PacketTypes.UNSUBACK,
+                                PacketTypes.DISCONNECT], },
+    129: {"Malformed packet":
+          [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
+    130: {"Protocol error":
+          [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
+    131: {"Implementation specific error": [PacketTypes.CONNACK,
+                                            PacketTypes.PUBACK, PacketTypes.PUBREC, PacketTypes.SUBACK,
+                                            PacketTypes.UNSUBACK, PacketTypes.DISCONNECT], },
+    132: {"Unsupported protocol version": [PacketTypes.CONNACK]},
+    133: {"Client identifier not valid": [PacketTypes.CONNACK]},
+    134: {"Bad user name or password": [PacketTypes.CONNACK]},
+    135: {"Not authorized": [PacketTypes.CONNACK, PacketTypes.PUBACK,
+                             PacketTypes.PUBREC, PacketTypes.SUBACK, PacketTypes.UNSUBACK,
+                             PacketTypes.DISCONNECT], },
+    136: {"Server unavailable": [PacketTypes.CONNACK]},
+    137: {"Server busy": [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
+    138: {"Banned": [PacketTypes.CONNACK]},
+    139: {"Server shutting down": [PacketTypes.DISCONNECT]},
+    140: {"Bad authentication method":
+          [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
+    141: {"Keep alive timeout": [PacketTypes.DISCONNECT]},
+    142: {"Session taken over": [PacketTypes.DISCONNECT]},
+    143: {"Topic filter invalid":
+          [PacketTypes.SUBACK, PacketTypes.UNSUBACK, PacketTypes.DISCONNECT]},
+    144: {"Topic name invalid":
+          [PacketTypes.CONNACK, PacketTypes.PUBACK,
+           PacketTypes.PUBREC, PacketTypes.DISCONNECT]},
+    145: {"Packet identifier in use":
+          [PacketTypes.PUBACK, PacketTypes.PUBREC,
+           PacketTypes.SUBACK, PacketTypes.UNSUBACK]},
+    146: {"Packet identifier not found":
+          [PacketTypes.PUBREL, PacketTypes.PUBCOMP]},
+    147: {"Receive maximum exceeded": [PacketTypes.DISCONNECT]},
+    148: {"Topic alias invalid": [PacketTypes.DISCONNECT]},
+    149: {"Packet too large": [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
+    150: {"Message rate too high": [PacketTypes.DISCONNECT]},
+    151: {"Quota exceeded": [PacketTypes.CONNACK, PacketTypes.PUBACK,
+                             PacketTypes.PUBREC, PacketTypes.SUBACK, PacketTypes.DISCONNECT], },
+    152: {"Administrative action": [PacketTypes.DISCONNECT]},
+    153: {"Payload format invalid":
+          [PacketTypes.PUBACK, PacketTypes.PUBREC, PacketTypes.DISCONNECT]},
+    154: {"Retain not supported":
+          [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
+    155: {"QoS not supported":
+          [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
+    156: {"Use another server":
+          [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
+    157: {"Server moved":
+          [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
+    158: {"Shared subscription not supported":
+          [PacketTypes.SUBACK, PacketTypes.DISCONNECT]},
+    159: {"Connection rate exceeded":
+          [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
+    160: {"Maximum connect time":
+          [PacketTypes.DISCONNECT]},
+    161: {"Subscription identifiers not supported":
+          [PacketTypes.SUBACK, PacketTypes.DISCONNECT]},
+    162: {"Wildcard subscription not supported":
+          [PacketTypes.SUBACK, PacketTypes.DISCONNECT]},
+}
+
+# Freeze the table, it is shared by all instances
+_NAMES = MappingProxyType({
+    identifier: MappingProxyType({name: tuple(packets) for name, packets in names.items()})
+    for identifier, names in _NAMES.items()
+})
+
+
+def _lookupTables():
+    # (packet type, identifier) -> name, for the identifiers which have
+    # exactly one name for the packet type, and (packet type, name) ->
+    # identifier, the first identifier matching.
+    nameFromIdent = {}
+    identFromName = {}
+    for identifier, names in _NAMES.items():
+        packetTypes = {packetType for packets in names.values() for packetType in packets}
+        for packetType in packetTypes:
+            namelist = [name for name, packets in names.items() if packetType in packets]
+            if len(namelist) == 1:
+                nameFromIdent[(packetType, identifier)] = namelist[0]
+        for name, packets in names.items():
+            for packetType in packets:
+                identFromName.setdefault((packetType, name), identifier)
+    return MappingProxyType(nameFromIdent), MappingProxyType(identFromName)
+
+
+_NAME_FROM_IDENT, _IDENT_FROM_NAME = _lookupTables()
+
+# Reason codes copied by ReasonCode._cached()
+_cache: dict = {}
+
+
 @functools.total_ordering
 class ReasonCode:
     """MQTT version 5.0 reason codes class.
@@ -30,6 +139,9 @@ class ReasonCode:
 
     """
 
+    # Shared by all instances
+    names = _NAMES
+
     def __init__(self, packetType: int, aName: str ="Success", identifier: int =-1):
         """
         packetType: the type of the packet, such as PacketTypes.CONNECT that
@@ -44,82 +156,6 @@ class ReasonCode:
         """
 
         self.packetType = packetType
-        self.names = {
-            0: {"Success": [PacketTypes.CONNACK, PacketTypes.PUBACK,
-                            PacketTypes.PUBREC, PacketTypes.PUBREL, PacketTypes.PUBCOMP,
-                            PacketTypes.UNSUBACK, PacketTypes.AUTH],
-                "Normal disconnection": [PacketTypes.DISCONNECT],
-                "Granted QoS 0": [PacketTypes.SUBACK]},
-            1: {"Granted QoS 1": [PacketTypes.SUBACK]},
-            2: {"Granted QoS 2": [PacketTypes.SUBACK]},
-            4: {"Disconnect with will message": [PacketTypes.DISCONNECT]},
-            16: {"No matching subscribers":
-                 [PacketTypes.PUBACK, PacketTypes.PUBREC]},
-            17: {"No subscription found": [PacketTypes.UNSUBACK]},
-            24: {"Continue authentication": [PacketTypes.AUTH]},
-            25: {"Re-authenticate": [PacketTypes.AUTH]},
-            128: {"Unspecified error": [PacketTypes.CONNACK, PacketTypes.PUBACK,
-                                        PacketTypes.PUBREC, PacketTypes.SUBACK, PacketTypes.UNSUBACK,
-                                        PacketTypes.DISCONNECT], },
-            129: {"Malformed packet":
-                  [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
-            130: {"Protocol error":
-                  [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
-            131: {"Implementation specific error": [PacketTypes.CONNACK,
-                                                    PacketTypes.PUBACK, PacketTypes.PUBREC, PacketTypes.SUBACK,
-                                                    PacketTypes.UNSUBACK, PacketTypes.DISCONNECT], },
-            132: {"Unsupported protocol version": [PacketTypes.CONNACK]},
-            133: {"Client identifier not valid": [PacketTypes.CONNACK]},
-            134: {"Bad user name or password": [PacketTypes.CONNACK]},
-            135: {"Not authorized": [PacketTypes.CONNACK, PacketTypes.PUBACK,
-                                     PacketTypes.PUBREC, PacketTypes.SUBACK, PacketTypes.UNSUBACK,
-                                     PacketTypes.DISCONNECT], },
-            136: {"Server unavailable": [PacketTypes.CONNACK]},
-            137: {"Server busy": [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
-            138: {"Banned": [PacketTypes.CONNACK]},
-            139: {"Server shutting down": [PacketTypes.DISCONNECT]},
-            140: {"Bad authentication method":
-                  [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
-            141: {"Keep alive timeout": [PacketTypes.DISCONNECT]},
-            142: {"Session taken over": [PacketTypes.DISCONNECT]},
-            143: {"Topic filter invalid":
-                  [PacketTypes.SUBACK, PacketTypes.UNSUBACK, PacketTypes.DISCONNECT]},
-            144: {"Topic name invalid":
-                  [PacketTypes.CONNACK, PacketTypes.PUBACK,
-                   PacketTypes.PUBREC, PacketTypes.DISCONNECT]},
-            145: {"Packet identifier in use":
-                  [PacketTypes.PUBACK, PacketTypes.PUBREC,
-                   PacketTypes.SUBACK, PacketTypes.UNSUBACK]},
-            146: {"Packet identifier not found":
-                  [PacketTypes.PUBREL, PacketTypes.PUBCOMP]},
-            147: {"Receive maximum exceeded": [PacketTypes.DISCONNECT]},
-            148: {"Topic alias invalid": [PacketTypes.DISCONNECT]},
-            149: {"Packet too large": [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
-            150: {"Message rate too high": [PacketTypes.DISCONNECT]},
-            151: {"Quota exceeded": [PacketTypes.CONNACK, PacketTypes.PUBACK,
-                                     PacketTypes.PUBREC, PacketTypes.SUBACK, PacketTypes.DISCONNECT], },
-            152: {"Administrative action": [PacketTypes.DISCONNECT]},
-            153: {"Payload format invalid":
-                  [PacketTypes.PUBACK, PacketTypes.PUBREC, PacketTypes.DISCONNECT]},
-            154: {"Retain not supported":
-                  [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
-            155: {"QoS not supported":
-                  [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
-            156: {"Use another server":
-                  [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
-            157: {"Server moved":
-                  [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
-            158: {"Shared subscription not supported":
-                  [PacketTypes.SUBACK, PacketTypes.DISCONNECT]},
-            159: {"Connection rate exceeded":
-                  [PacketTypes.CONNACK, PacketTypes.DISCONNECT]},
-            160: {"Maximum connect time":
-                  [PacketTypes.DISCONNECT]},
-            161: {"Subscription identifiers not supported":
-                  [PacketTypes.SUBACK, PacketTypes.DISCONNECT]},
-            162: {"Wildcard subscription not supported":
-                  [PacketTypes.SUBACK, PacketTypes.DISCONNECT]},
-        }
         if identifier == -1:
             if packetType == PacketTypes.DISCONNECT and aName == "Success":
                 aName = "Normal disconnection"
@@ -136,6 +172,10 @@ class ReasonCode:
 
         Used when displaying the reason code.
         """
+        try:
+            return _NAME_FROM_IDENT[(packetType, identifier)]
+        except KeyError:
+            pass
         if identifier not in self.names:
             raise KeyError(identifier)
         names = self.names[identifier]
@@ -151,11 +191,25 @@ class ReasonCode:
         Used when setting the reason code for a packetType
         check that only valid codes for the packet are set.
         """
-        for code in self.names.keys():
-            if name in self.names[code].keys():
-                if self.packetType in self.names[code][name]:
-                    return code
-        raise KeyError(f"Reason code name not found: {name}")
+        try:
+            return _IDENT_FROM_NAME[(self.packetType, name)]
+        except KeyError:
+            raise KeyError(f"Reason code name not found: {name}") from None
+
+    @classmethod
+    def _cached(cls, packetType: int, aName: str = "Success", identifier: int = -1) -> "ReasonCode":
+        # Like ReasonCode(), copying the packet type and value of a cached
+        # instance rather than looking up and checking the name again, for
+        # the reason codes created for each packet received.
+        key = (packetType, aName if identifier == -1 else identifier)
+        try:
+            cached = _cache[key]
+        except KeyError:
+            cached = _cache[key] = cls(packetType, aName, identifier)
+        code = cls.__new__(cls)
+        code.packetType = cached.packetType
+        code.value = cached.value
+        return code
 
     def set(self, name):
         self.value = self.getId(name)
@@ -0,0 +1,315 @@
+# Copyright (c) 2026 Roger Light and others
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Eclipse Public License v2.0
+# and Eclipse Distribution License v1.0 which accompany this distribution.
+#
+# The Eclipse Public License is available at
+#    http://www.eclipse.org/legal/epl-v20.html
+# and the Eclipse Distribution License is available at
+#   http://www.eclipse.org/org/documents/edl-v10.php.
+
+"""
+This module provides `Recorder`, which records the messages received by a
+client to a compact binary file, and `Recording`, which reads such a file back
+and replays it.
+
+A recording is made of two files. The log (``path``) holds the messages in
+the order they were received: timestamp, topic id, QoS/retain flags and
+payload. The index (``path + ".idx"``) holds the topic table, mapping topic ids
+to topic names, and an entry every ``index_interval`` messages that allows
+seeking in the log by time without reading it all.
+
+Example::
+
+    with Recorder("session.rec") as recorder:
+        client.on_message = recorder.on_message
+        client.loop_forever()
+
+    with Recording("session.rec") as recording:
+        recording.replay(client, speed=10.0)
+        publish.multiple(recording.messages(), hostname="localhost")
+"""
+from __future__ import annotations
+
+import bisect
+import mmap
+import struct
+import threading
+import time
+from typing import Any, Iterator, NamedTuple
+
+from . import client as paho
+from .client import time_func
+
+LOG_MAGIC = b"PAHOREC\x01"
+INDEX_MAGIC = b"PAHOIDX\x01"
+
+# timestamp, topic id, flags (qos | retain << 2), payload length
+_MESSAGE = struct.Struct("<dIBI")
+# b"T", topic id, topic length
+_TOPIC = struct.Struct("<cIH")
+# b"I", timestamp, log offset, message number
+_SEEK = struct.Struct("<cdQQ")
+
+
+class RecordedMessage(NamedTuple):
+    timestamp: float
+    topic: str
+    payload: bytes
+    qos: int
+    retain: bool
+
+
+class Recorder:
+    """Record received messages to a file.
+
+    Use `on_message` as the ``on_message`` callback of a client (or with
+    `Client.message_callback_add()`), or call `record()` directly. An existing
+    recording at path is overwritten.
+
+    Messages are written through a buffered file, call `flush()` or `close()`
+    to be sure they are on disk.
+
+    :param str path: the path of the log file. The index is written to
+        ``path + ".idx"``.
+    :param int index_interval: number of messages between two seek index
+        entries.
+    """
+
+    def __init__(self, path: str, index_interval: int = 1000) -> None:
+        if index_interval < 1:
+            raise ValueError("index_interval must be at least 1")
+        self._index_interval = index_interval
+        self._lock = threading.Lock()
+        self._topics: dict[bytes, int] = {}
+        self._count = 0
+        # Message timestamps come from the monotonic clock, they are stored
+        # as wall clock time.
+        self._clock_offset = time.time() - time_func()
+        self._log = open(path, "wb")  # noqa: SIM115
+        self._index = open(path + ".idx", "wb")  # noqa: SIM115
+        self._log.write(LOG_MAGIC)
+        self._index.write(INDEX_MAGIC)
+        self._offset = len(LOG_MAGIC)
+
+    def __enter__(self) -> Recorder:
+        return self
+
+    def __exit__(self, exc_type: object, exc_value: object, traceback: object) -> None:
+        self.close()
+
+    @property
+    def count(self) -> int:
+        """Number of messages recorded."""
+        return self._count
+
+    def on_message(self, client: paho.Client, userdata: Any, message: paho.MQTTMessage) -> None:
+        """Record message, with the signature of the on_message callback."""
+        self.record(message)
+
+    def on_message_batch(self, client: paho.Client, userdata: Any, messages: list[paho.MQTTMessage]) -> None:
+        """Record messages, with the signature of the on_message_batch callback."""
+        for message in messages:
+            self.record(message)
+
+    def record(self, message: paho.MQTTMessage) -> None:
+        """Append message to the recording."""
+        if message.timestamp:
+            timestamp = message.timestamp + self._clock_offset
+        else:
+            timestamp = time.time()
+        # Use the raw topic and payload, this avoids decoding the topic and
+        # copying the payload out of the received packet. The topic is a
+        # dictionary key, it must be bytes and not a view.
+        topic = bytes(message._topic)
+        payload = message._payload
+        flags = message.qos | (message.retain << 2)
+
+        with self._lock:
+            if self._log.closed:
+                raise ValueError("recorder is closed")
+            topic_id = self._topics.get(topic)
+            if topic_id is None:
+                topic_id = len(self._topics)
+                self._topics[topic] = topic_id
+                self._index.write(_TOPIC.pack(b"T", topic_id, len(topic)))
+                self._index.write(topic)
+
+            if self._count % self._index_interval == 0:
+                self._index.write(_SEEK.pack(b"I", timestamp, self._offset, self._count))
+
+            self._log.write(_MESSAGE.pack(timestamp, topic_id, flags, len(payload)))
+            self._log.write(payload)
+            self._offset += _MESSAGE.size + len(payload)
+            self._count += 1
+
+    def flush(self) -> None:
+        """Write buffered data to the files."""
+        with self._lock:
+            # Index first, so that the log on disk never refers to a topic
+            # missing from the index.
+            self._index.flush()
+            self._log.flush()
+
+    def close(self) -> None:
+        """Flush and close the recording."""
+        with self._lock:
+            if self._log.closed:
+                return
+            self._log.close()
+            self._index.close()
+
+
+class Recording:
+    """Read a recording written by `Recorder`.
+
+    The log file is mapped in memory, so opening a recording is cheap
+    regardless of its size. A recording still being written may be read,
+    a truncated last message is ignored.
+
+    :param str path: the path of the log file.
+
+    :raises ValueError: if the files are not a recording.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._topics: list[str] = []
+        self._seek_times: list[float] = []
+        self._seek_offsets: list[int] = []
+
+        with open(path + ".idx", "rb") as f:
+            index = f.read()
+        if not index.startswith(INDEX_MAGIC):
+            raise ValueError(f"{path}.idx is not a recording index")
+        self._load_index(index)
+
+        with open(path, "rb") as f:
+            if f.read(len(LOG_MAGIC)) != LOG_MAGIC:
+                raise ValueError(f"{path} is not a recording")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self) -> Recording:
+        return self
+
+    def __exit__(self, exc_type: object, exc_value: object, traceback: object) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[RecordedMessage]:
+        return self.iter_messages()
+
+    def _load_index(self, index: bytes) -> None:
+        pos = len(INDEX_MAGIC)
+        end = len(index)
+        while pos < end:
+            kind = index[pos:pos + 1]
+            if kind == b"T":
+                if pos + _TOPIC.size > end:
+                    break
+                _, topic_id, length = _TOPIC.unpack_from(index, pos)
+                pos += _TOPIC.size
+                if pos + length > end:
+                    break
+                if topic_id != len(self._topics):
+                    raise ValueError("corrupted recording index")
+                self._topics.append(str(index[pos:pos + length], "utf-8"))
+                pos += length
+            elif kind == b"I":
+                if pos + _SEEK.size > end:
+                    break
+                _, timestamp, offset, _ = _SEEK.unpack_from(index, pos)
+                self._seek_times.append(timestamp)
+                self._seek_offsets.append(offset)
+                pos += _SEEK.size
+            else:
+                raise ValueError("corrupted recording index")
+
+    @property
+    def topics(self) -> list[str]:
+        """The topics found in the recording."""
+        return list(self._topics)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def _seek(self, start: float | None) -> int:
+        if start is None or not self._seek_times:
+            return len(LOG_MAGIC)
+        i = bisect.bisect_right(self._seek_times, start) - 1
+        if i < 0:
+            return len(LOG_MAGIC)
+        return self._seek_offsets[i]
+
+    def iter_messages(self, start: float | None = None, end: float | None = None) -> Iterator[RecordedMessage]:
+        """Iterate over the recorded messages.
+
+        :param float start: if set, skip messages received before this time
+            (as returned by time.time()).
+        :param float end: if set, stop at the first message received at or
+            after this time.
+        """
+        data = self._mmap
+        size = len(data)
+        topics = self._topics
+        pos = self._seek(start)
+        while pos + _MESSAGE.size <= size:
+            timestamp, topic_id, flags, length = _MESSAGE.unpack_from(data, pos)
+            pos += _MESSAGE.size
+            if pos + length > size or topic_id >= len(topics):
+                # Incomplete write at the end of the recording
+                return
+            if end is not None and timestamp >= end:
+                return
+            if start is None or timestamp >= start:
+                yield RecordedMessage(
+                    timestamp, topics[topic_id], data[pos:pos + length], flags & 0x03, bool(flags & 0x04))
+            pos += length
+
+    def messages(self, start: float | None = None, end: float | None = None) -> list[dict[str, Any]]:
+        """Return the recorded messages in the form accepted by
+        `paho.mqtt.publish.multiple()`.
+
+        :param float start: see `iter_messages()`.
+        :param float end: see `iter_messages()`.
+        """
+        return [
+            {"topic": msg.topic, "payload": msg.payload, "qos": msg.qos, "retain": msg.retain}
+            for msg in self.iter_messages(start, end)
+        ]
+
+    def replay(
+        self,
+        client: paho.Client,
+        speed: float | None = 1.0,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> int:
+        """Publish the recorded messages with client, keeping their timing.
+
+        The client must be connected and its network loop running, e.g. with
+        `Client.loop_start()`. This function blocks until all messages have
+        been passed to `Client.publish()`.
+
+        :param float speed: replay speed factor, 2.0 replays twice as fast as
+            recorded. None replays as fast as possible.
+        :param float start: see `iter_messages()`.
+        :param float end: see `iter_messages()`.
+
+        Returns the number of messages published.
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be greater than 0")
+
+        count = 0
+        first: float | None = None
+        started = time_func()
+        for msg in self.iter_messages(start, end):
+            if speed is not None:
+                if first is None:
+                    first = msg.timestamp
+                delay = started + (msg.timestamp - first) / speed - time_func()
+                if delay > 0:
+                    time.sleep(delay)
+            client.publish(msg.topic, msg.payload, msg.qos, msg.retain)
+            count += 1
+        return count
@@ -14,14 +14,23 @@
 
 """
 This module provides some helper functions to allow straightforward subscribing
-to topics and retrieving messages. The two functions are simple(), which
-returns one or messages matching a set of topics, and callback() which allows
-you to pass a callback for processing of messages.
+to topics and retrieving messages. The functions are simple(), which
+returns one or messages matching a set of topics, callback() which allows
+you to pass a callback for processing of messages, and stream() which returns
+an iterator over the messages as they arrive.
 """
 
+import asyncio
+import collections
+import threading
+
 from .. import mqtt
 from . import client as paho
 
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
 
 def _on_connect(client, userdata, flags, reason_code, properties):
     """Internal callback"""
@@ -139,19 +148,29 @@ def callback(callback, topics, qos=0, userdata=None, hostname="localhost",
         'qos':qos,
         'userdata':userdata}
 
+    client = _create_client(callback_userdata, client_id, will, auth, tls,
+                            protocol, transport, clean_session, proxy_args)
+    client.on_message = _on_message_callback
+    client.on_connect = _on_connect
+
+    client.connect(hostname, port, keepalive)
+    client.loop_forever()
+
+
+def _create_client(userdata, client_id, will, auth, tls, protocol, transport,
+                   clean_session, proxy_args):
+    """Internal function"""
+
     client = paho.Client(
         paho.CallbackAPIVersion.VERSION2,
         client_id=client_id,
-        userdata=callback_userdata,
+        userdata=userdata,
         protocol=protocol,
         transport=transport,
         clean_session=clean_session,
     )
     client.enable_logger()
 
-    client.on_message = _on_message_callback
-    client.on_connect = _on_connect
-
     if proxy_args is not None:
         client.proxy_set(**proxy_args)
 
@@ -179,8 +198,7 @@ def callback(callback, topics, qos=0, userdata=None, hostname="localhost",
             # Assume input is SSLContext object
             client.tls_set_context(tls)
 
-    client.connect(hostname, port, keepalive)
-    client.loop_forever()
+    return client
 
 
 def simple(topics, qos=0, msg_count=1, retained=True, hostname="localhost",
@@ -279,3 +297,217 @@ def simple(topics, qos=0, msg_count=1, retained=True, hostname="localhost",
              clean_session, proxy_args)
 
     return userdata['messages']
+
+
+def _on_connect_stream(client, userdata, flags, reason_code, properties):
+    """Internal callback"""
+    if reason_code != 0:
+        userdata['stream']._fail(mqtt.MQTTException(paho.connack_string(reason_code)))
+        return
+    _on_connect(client, userdata, flags, reason_code, properties)
+
+
+def _on_message_stream(client, userdata, message):
+    """Internal callback"""
+    # Don't process stale retained messages if 'retained' was false
+    if message.retain and not userdata['retained']:
+        return
+    userdata['stream']._put(message)
+
+
+class MessageStream:
+    """Iterator over the messages received by `stream()`.
+
+    Messages are kept in a queue of at most queue_size messages until they
+    are consumed, so memory use is bounded however long the stream runs.
+    Iterate over it with ``for`` or ``async for``. Iteration stops once
+    `close()` has been called and the queued messages are consumed.
+
+    The stream is also a context manager, which closes it on exit.
+    """
+
+    def __init__(self, queue_size, overflow):
+        if queue_size < 1:
+            raise ValueError('queue_size must be > 0')
+        if overflow not in (BLOCK, DROP_OLDEST, DROP_NEWEST):
+            raise ValueError('overflow must be one of BLOCK, DROP_OLDEST or DROP_NEWEST')
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.received = 0
+        """Number of messages received, including dropped messages."""
+        self.dropped = 0
+        """Number of messages dropped because the queue was full."""
+        self.client = None
+        """The `Client` receiving the messages."""
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._error = None
+        self._waiters = []
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._queue or self._closed:
+                    try:
+                        return self._get()
+                    except StopIteration:
+                        raise StopAsyncIteration from None
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            await future
+
+    @property
+    def closed(self):
+        """True once `close()` has been called."""
+        return self._closed
+
+    def get(self, timeout=None):
+        """Return the next message, waiting up to timeout seconds for it.
+
+        Raises StopIteration if the stream is closed and the queue is
+        empty, and TimeoutError if no message arrived in time.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._queue or self._closed, timeout):
+                raise TimeoutError('no message received')
+            return self._get()
+
+    def _get(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        if not self._queue:
+            raise StopIteration
+        message = self._queue.popleft()
+        if self.overflow == BLOCK:
+            self._cond.notify_all()
+        return message
+
+    def _wakeup(self):
+        # Called with _cond held
+        self._cond.notify_all()
+        for loop, future in self._waiters:
+            loop.call_soon_threadsafe(_set_future, future)
+        self._waiters.clear()
+
+    def _put(self, message):
+        with self._cond:
+            self.received += 1
+            if len(self._queue) >= self.queue_size:
+                if self.overflow == DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                elif self.overflow == DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    # Stop reading from the network until there is room
+                    self._cond.wait_for(lambda: len(self._queue) < self.queue_size or self._closed)
+                    if self._closed:
+                        return
+            self._queue.append(message)
+            self._wakeup()
+
+    def _fail(self, error):
+        with self._cond:
+            self._error = error
+            self._closed = True
+            self._wakeup()
+        self.client.disconnect()
+
+    def close(self):
+        """Disconnect from the broker. Messages already queued can still be
+        consumed."""
+        with self._cond:
+            self._closed = True
+            self._wakeup()
+        if self.client is not None:
+            self.client.disconnect()
+            self.client.loop_stop()
+
+
+def _set_future(future):
+    """Internal function"""
+    if not future.done():
+        future.set_result(None)
+
+
+def stream(topics, qos=0, retained=True, queue_size=1000, overflow=BLOCK,
+           hostname="localhost", port=1883, client_id="", keepalive=60,
+           will=None, auth=None, tls=None, protocol=paho.MQTTv311,
+           transport="tcp", clean_session=True, proxy_args=None):
+    """Subscribe to a list of topics and iterate over the messages received.
+
+    This function creates an MQTT client, connects to a broker in a
+    background thread and subscribes to a list of topics. It returns a
+    `MessageStream`, which yields the messages as they arrive until it is
+    closed, e.g.::
+
+        with subscribe.stream("everest/#", queue_size=10000, overflow=subscribe.DROP_OLDEST) as messages:
+            for message in messages:
+                ...
+        print(messages.dropped)
+
+    :param topics: either a string containing a single topic to subscribe to, or a
+             list of topics to subscribe to.
+
+    :param int qos: the qos to use when subscribing. This is applied to all topics.
+
+    :param bool retained: If set to False, retained messages will be ignored.
+
+    :param int queue_size: the maximum number of messages received and not yet
+             consumed.
+
+    :param overflow: what to do with a message received while the queue is full.
+             BLOCK stops reading from the network until a message is consumed,
+             which stops keepalive processing as well. DROP_OLDEST drops the
+             oldest message of the queue, and DROP_NEWEST drops the message
+             received. Dropped messages are counted in `MessageStream.dropped`.
+
+    The other parameters are those of `simple()`.
+    """
+
+    if qos < 0 or qos > 2:
+        raise ValueError('qos must be in the range 0-2')
+
+    messages = MessageStream(queue_size, overflow)
+
+    # Ignore clean_session if protocol is MQTTv50, otherwise Client will raise
+    if protocol == paho.MQTTv5:
+        clean_session = None
+
+    userdata = {
+        'stream':messages,
+        'topics':topics,
+        'qos':qos,
+        'retained':retained}
+
+    client = _create_client(userdata, client_id, will, auth, tls, protocol,
+                            transport, clean_session, proxy_args)
+    client.on_message = _on_message_stream
+    client.on_connect = _on_connect_stream
+    messages.client = client
+
+    client.connect(hostname, port, keepalive)
+    client.loop_start()
+    return messages
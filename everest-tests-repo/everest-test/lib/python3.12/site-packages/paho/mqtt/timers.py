@@ -0,0 +1,186 @@
+# Copyright (c) 2026 Roger Light and others
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Eclipse Public License v2.0
+# and Eclipse Distribution License v1.0 which accompany this distribution.
+#
+# The Eclipse Public License is available at
+#    http://www.eclipse.org/legal/epl-v20.html
+# and the Eclipse Distribution License is available at
+#   http://www.eclipse.org/org/documents/edl-v10.php.
+
+"""
+This module provides `TimerWheel`, the timer queue used by the client for
+keepalive and reconnect delays, and by `ClientGroup` for the keepalive of
+many clients.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any
+
+_BITS = 6
+_SLOTS = 1 << _BITS
+_MASK = _SLOTS - 1
+_LEVELS = 4
+_SPAN = 1 << (_BITS * _LEVELS)
+
+
+class TimerWheel:
+    """Hierarchical timer wheel.
+
+    Time is divided in ticks. Timers are kept in levels of 64 slots: a slot
+    of level 0 holds the timers of one tick, a slot of level n the timers of
+    64**n ticks. A timer is stored in the lowest level covering its deadline,
+    and moved down a level when the wheel reaches its slot. Scheduling and
+    cancelling a timer is O(1), and advancing the wheel costs O(1) per timer
+    expired or moved plus, at most, one step per slot reached. Deadlines
+    further than 64**4 ticks away are moved down from the last level until
+    they are in range.
+
+    Timers are identified by a key, any hashable object. The wheel may be
+    used from several threads, such as the network loop and a thread calling
+    `Client.reconnect()`.
+
+    :param float tick: resolution of the wheel, in seconds. Timers expire at
+        the first tick at or after their deadline.
+    :param float now: current time, defaults to `time.monotonic()`.
+    """
+
+    def __init__(self, tick: float, now: float | None = None) -> None:
+        if tick <= 0:
+            raise ValueError("tick must be greater than 0")
+        self._tick = tick
+        self._levels: list[list[dict[Any, int]]] = [[{} for _ in range(_SLOTS)] for _ in range(_LEVELS)]
+        self._counts = [0] * _LEVELS
+        # Key -> (level, slot), and key -> tick of the deadline
+        self._where: dict[Any, tuple[int, int]] = {}
+        self._when: dict[Any, int] = {}
+        self._current = int((time.monotonic() if now is None else now) / tick)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._when)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._when
+
+    def deadline(self, key: Any) -> float:
+        """Return the time at which the timer of key expires."""
+        with self._lock:
+            return self._when[key] * self._tick
+
+    def schedule(self, key: Any, deadline: float) -> None:
+        """Schedule key to expire at deadline, replacing any previous timer."""
+        with self._lock:
+            self._cancel(key)
+            when = max(math.ceil(deadline / self._tick), self._current + 1)
+            self._when[key] = when
+            self._insert(key, when)
+
+    def cancel(self, key: Any) -> None:
+        with self._lock:
+            self._cancel(key)
+
+    def _cancel(self, key: Any) -> None:
+        where = self._where.pop(key, None)
+        if where is not None:
+            level, slot = where
+            del self._levels[level][slot][key]
+            self._counts[level] -= 1
+            del self._when[key]
+
+    def _insert(self, key: Any, when: int) -> None:
+        delta = when - self._current
+        if delta >= _SPAN:
+            # Parked in the last level, moved down again when reached
+            when = self._current + _SPAN - 1
+            delta = _SPAN - 1
+        level = 0
+        while delta >= _SLOTS:
+            delta >>= _BITS
+            level += 1
+        slot = (max(when, self._current) >> (_BITS * level)) & _MASK
+        self._levels[level][slot][key] = when
+        self._where[key] = (level, slot)
+        self._counts[level] += 1
+
+    def _cascade(self, level: int) -> None:
+        slot = (self._current >> (_BITS * level)) & _MASK
+        timers = self._levels[level][slot]
+        if not timers:
+            return
+        self._levels[level][slot] = {}
+        self._counts[level] -= len(timers)
+        for key in timers:
+            self._insert(key, self._when[key])
+
+    def advance(self, now: float) -> list[Any]:
+        """Move the wheel to now and return the keys that expired."""
+        with self._lock:
+            return self._advance(now)
+
+    def _advance(self, now: float) -> list[Any]:
+        target = int(now / self._tick)
+        if target <= self._current:
+            return []
+        if not self._when:
+            self._current = target
+            return []
+
+        expired: list[Any] = []
+        while self._current < target:
+            # Skip the ticks where nothing can happen: up to the next slot
+            # of the lowest level that holds timers.
+            lowest = next((level for level in range(_LEVELS) if self._counts[level]), None)
+            if lowest is None:
+                self._current = target
+                break
+            if lowest > 0:
+                step = 1 << (_BITS * lowest)
+                boundary = (self._current | (step - 1)) + 1
+                if boundary > target:
+                    self._current = target
+                    break
+                self._current = boundary - 1
+
+            self._current += 1
+            current = self._current
+            for level in range(_LEVELS - 1, 0, -1):
+                if current & ((1 << (_BITS * level)) - 1) == 0:
+                    self._cascade(level)
+
+            slot = self._levels[0][current & _MASK]
+            if slot:
+                self._levels[0][current & _MASK] = {}
+                self._counts[0] -= len(slot)
+                for key in slot:
+                    del self._where[key]
+                    del self._when[key]
+                expired.extend(slot)
+        return expired
+
+    def next_expiry(self, now: float) -> float:
+        """Return the time until the wheel next needs to be advanced, which
+        is at or before the next deadline. Returns math.inf if there is no
+        timer."""
+        with self._lock:
+            return self._next_expiry(now)
+
+    def _next_expiry(self, now: float) -> float:
+        if not self._when:
+            return math.inf
+        when = math.inf
+        if self._counts[0]:
+            for i in range(1, _SLOTS + 1):
+                if self._levels[0][(self._current + i) & _MASK]:
+                    when = self._current + i
+                    break
+        # Timers of the upper levels may move down at the next slot boundary
+        upper = next((level for level in range(1, _LEVELS) if self._counts[level]), None)
+        if upper is not None:
+            step = 1 << (_BITS * upper)
+            when = min(when, (self._current | (step - 1)) + 1)
+        return max(0.0, when * self._tick - now)
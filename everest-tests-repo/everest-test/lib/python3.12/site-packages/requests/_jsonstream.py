@@ -0,0 +1,275 @@
+"""
+requests._jsonstream
+~~~~~~~~~~~~~~~~~~~~
+
+Incremental decoding of JSON documents, used by :meth:`Response.iter_json`
+to yield the values of a document while its body is still being received.
+"""
+import codecs
+import itertools
+import re
+
+from .compat import JSONDecodeError
+from .compat import json as complexjson
+from .exceptions import JSONDecodeError as RequestsJSONDecodeError
+from .utils import guess_json_utf
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DELIMITERS = frozenset(" \t\n\r,:]}")
+_SEPARATOR = re.compile(r"[ \t\n\r]*(?:(,)[ \t\n\r]*(?=[^ \t\n\r])|([\]}]))")
+# A string, number or literal, and the text of a container up to its next
+# bracket, skipped without being decoded.
+_SCALAR = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[^ \t\n\r,:\[\]{}"]+')
+_CONTENT = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+_PATH_STEP = re.compile(
+    r"\.(?P<name>[A-Za-z_$][\w$-]*)"
+    r"|\.\*|\[\*\]"
+    r"|\[(?P<index>\d+)\]"
+    r"|\[(?P<quote>['\"])(?P<key>.*?)(?P=quote)\]"
+)
+
+#: Matches any member of an object or item of an array in a parsed path.
+ANY = object()
+
+
+def parse_json_path(path):
+    """Parses the subset of JSONPath supported by :meth:`Response.iter_json`
+    into a tuple of steps.
+
+    A path starts with ``$``, the document, followed by ``.name`` or
+    ``['name']`` to select a member of an object, ``[n]`` to select an item
+    of an array, and ``[*]`` or ``.*`` to select every item of an array or
+    every member of an object, e.g. ``$.data[*]``.
+
+    :rtype: tuple
+    :raises ValueError: if the path is not supported.
+    """
+    if not path.startswith("$"):
+        raise ValueError(f"JSON path must start with '$': {path!r}")
+    steps = []
+    pos = 1
+    while pos < len(path):
+        match = _PATH_STEP.match(path, pos)
+        if match is None:
+            raise ValueError(f"Unsupported JSON path {path!r} at position {pos}")
+        if match.group("name") is not None:
+            steps.append(match.group("name"))
+        elif match.group("index") is not None:
+            steps.append(int(match.group("index")))
+        elif match.group("quote") is not None:
+            steps.append(match.group("key"))
+        else:
+            steps.append(ANY)
+        pos = match.end()
+    return tuple(steps)
+
+
+class JSONStreamDecoder:
+    """Decodes the values selected by a path from a JSON document received
+    as an iterable of byte chunks.
+
+    Only the selected values are decoded. The other values are scanned
+    for their end, without being decoded nor validated, and the text is
+    discarded as it is consumed, so memory use is bounded by the largest
+    selected value, or skipped string, rather than the whole document.
+
+    :param chunks: iterable of the bytes of the document.
+    :param steps: path, as returned by :func:`parse_json_path`.
+    :param encoding: (optional) encoding of the document. If None, it is
+        detected from the first bytes with :func:`guess_json_utf`.
+    :param \\*\\*kwargs: Optional arguments that ``json.loads`` takes.
+    """
+
+    def __init__(self, chunks, steps, encoding=None, **kwargs):
+        cls = kwargs.pop("cls", None) or complexjson.JSONDecoder
+        self.decoder = cls(**kwargs)
+        self.steps = steps
+        self.encoding = encoding
+        self._chunks = iter(chunks)
+        self._text = None
+        self._eof = False
+        self.buf = ""
+        self.pos = 0
+
+    def __iter__(self):
+        if not self._skip_whitespace():
+            raise RequestsJSONDecodeError("Expecting value", self.buf, self.pos)
+        yield from self._select(self.steps)
+        if self._skip_whitespace():
+            raise RequestsJSONDecodeError("Extra data", self.buf, self.pos)
+
+    def _iter_text(self):
+        # guess_json_utf looks at the first four bytes
+        head = b""
+        for chunk in self._chunks:
+            head += chunk
+            if len(head) >= 4:
+                break
+        decoder = self._get_decoder(head)
+        for chunk in itertools.chain((head,), self._chunks):
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
+
+    def _get_decoder(self, head):
+        encoding = self.encoding or guess_json_utf(head) or "utf-8"
+        try:
+            return codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def _fill(self, size=1):
+        """Appends at least ``size`` characters to the buffer, or what is
+        left of the document, returning False at the end of the document."""
+        if self._eof:
+            return False
+        if self._text is None:
+            self._text = self._iter_text()
+        # Drop the text already consumed, and join the new text once.
+        pieces = [self.buf[self.pos :]]
+        count = 0
+        for text in self._text:
+            pieces.append(text)
+            count += len(text)
+            if count >= size:
+                break
+        else:
+            self._eof = True
+        if count:
+            self.buf = "".join(pieces)
+            self.pos = 0
+        return count > 0
+
+    def _skip_whitespace(self):
+        """Moves to the next significant character and returns it, or an
+        empty string at the end of the document."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def _next(self, close):
+        """Consumes the separator following an item of an array or member
+        of an object, returning False after the last one."""
+        match = _SEPARATOR.match(self.buf, self.pos)
+        # Fast path: the separator and the start of the next item are in
+        # the buffer.
+        if match is not None and (match.group(1) or match.group(2) == close):
+            self.pos = match.end()
+            return match.group(2) is None
+        if self._expect("," + close, "Expecting ',' delimiter") == close:
+            return False
+        self._skip_whitespace()
+        return True
+
+    def _expect(self, chars, message):
+        char = self._skip_whitespace()
+        if not char or char not in chars:
+            raise RequestsJSONDecodeError(message, self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def _decode(self):
+        """Decodes the value starting at the current position."""
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except JSONDecodeError as e:
+                if self._eof:
+                    raise RequestsJSONDecodeError(e.msg, e.doc, e.pos)
+            else:
+                # A number may continue in the next chunk ("1" of "1.5"), so
+                # wait for the character following the value.
+                if self._eof or self.buf[end : end + 1] in _DELIMITERS:
+                    self.pos = end
+                    return value
+            # Wait for the value to double in size before decoding it again,
+            # so that large values are not decoded once per chunk.
+            self._fill(len(self.buf) - self.pos + 1)
+
+    def _skip(self):
+        """Moves past the value starting at the current position, without
+        decoding it."""
+        if self.buf[self.pos] not in "[{":
+            while True:
+                match = _SCALAR.match(self.buf, self.pos)
+                # A number may continue in the next chunk, and a string may
+                # end in it.
+                if match is not None and (match.end() < len(self.buf) or self._eof):
+                    self.pos = match.end()
+                    return
+                if not self._fill(len(self.buf) - self.pos + 1) and match is None:
+                    raise RequestsJSONDecodeError("Expecting value", self.buf, self.pos)
+
+        depth = 0
+        while True:
+            char = self.buf[self.pos : self.pos + 1]
+            if char in ("[", "{"):
+                depth += 1
+                self.pos += 1
+            elif char in ("]", "}"):
+                depth -= 1
+                self.pos += 1
+                if depth == 0:
+                    return
+            elif not self._fill(len(self.buf) - self.pos + 1):
+                # End of the document, or in an unterminated string
+                raise RequestsJSONDecodeError("Expecting value", self.buf, self.pos)
+            self.pos = _CONTENT.match(self.buf, self.pos).end()
+
+    def _select(self, steps):
+        if not steps:
+            yield self._decode()
+            return
+
+        step, rest = steps[0], steps[1:]
+        char = self._skip_whitespace()
+        if char == "[":
+            self.pos += 1
+            if self._skip_whitespace() == "]":
+                self.pos += 1
+                return
+            index = 0
+            while True:
+                if step is ANY or step == index:
+                    if rest:
+                        yield from self._select(rest)
+                    else:
+                        yield self._decode()
+                else:
+                    self._skip()
+                if not self._next("]"):
+                    return
+                index += 1
+        elif char == "{":
+            self.pos += 1
+            if self._skip_whitespace() == "}":
+                self.pos += 1
+                return
+            while True:
+                if self._skip_whitespace() != '"':
+                    raise RequestsJSONDecodeError(
+                        "Expecting property name enclosed in double quotes",
+                        self.buf,
+                        self.pos,
+                    )
+                key = self._decode()
+                self._expect(":", "Expecting ':' delimiter")
+                self._skip_whitespace()
+                if step is ANY or step == key:
+                    if rest:
+                        yield from self._select(rest)
+                    else:
+                        yield self._decode()
+                else:
+                    self._skip()
+                if not self._next("}"):
+                    return
+        else:
+            # Not a container, nothing to select in it
+            self._skip()
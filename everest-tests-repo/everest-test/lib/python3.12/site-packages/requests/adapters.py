@@ -6,6 +6,7 @@ This module contains the transport adapters that Requests uses to define
 and maintain connections.
 """
 
+import contextlib
 import os.path
 import socket  # noqa: F401
 import typing
@@ -110,6 +111,71 @@ def _urllib3_request_context(
     return host_params, pool_kwargs
 
 
+def _urllib3_timeout(timeout):
+    """Converts the timeout argument of :meth:`HTTPAdapter.send` to a urllib3
+    ``Timeout``.
+    """
+    if isinstance(timeout, tuple):
+        try:
+            connect, read = timeout
+            return TimeoutSauce(connect=connect, read=read)
+        except ValueError:
+            raise ValueError(
+                f"Invalid timeout {timeout}. Pass a (connect, read) timeout tuple, "
+                f"or a single float to set both timeouts to the same value."
+            )
+    elif isinstance(timeout, TimeoutSauce):
+        return timeout
+    else:
+        return TimeoutSauce(connect=timeout, read=timeout)
+
+
+@contextlib.contextmanager
+def _translate_urllib3_errors(request):
+    """Raises the Requests exception matching any urllib3 or socket error
+    raised while sending request.
+    """
+    try:
+        yield
+    except (ProtocolError, OSError) as err:
+        raise ConnectionError(err, request=request)
+
+    except MaxRetryError as e:
+        if isinstance(e.reason, ConnectTimeoutError):
+            # TODO: Remove this in 3.0.0: see #2811
+            if not isinstance(e.reason, NewConnectionError):
+                raise ConnectTimeout(e, request=request)
+
+        if isinstance(e.reason, ResponseError):
+            raise RetryError(e, request=request)
+
+        if isinstance(e.reason, _ProxyError):
+            raise ProxyError(e, request=request)
+
+        if isinstance(e.reason, _SSLError):
+            # This branch is for urllib3 v1.22 and later.
+            raise SSLError(e, request=request)
+
+        raise ConnectionError(e, request=request)
+
+    except ClosedPoolError as e:
+        raise ConnectionError(e, request=request)
+
+    except _ProxyError as e:
+        raise ProxyError(e)
+
+    except (_SSLError, _HTTPError) as e:
+        if isinstance(e, _SSLError):
+            # This branch is for urllib3 versions earlier than v1.22
+            raise SSLError(e, request=request)
+        elif isinstance(e, ReadTimeoutError):
+            raise ReadTimeout(e, request=request)
+        elif isinstance(e, _InvalidHeader):
+            raise InvalidHeader(e, request=request)
+        else:
+            raise
+
+
 class BaseAdapter:
     """The Base Transport Adapter"""
 
@@ -626,21 +692,9 @@ class HTTPAdapter(BaseAdapter):
 
         chunked = not (request.body is None or "Content-Length" in request.headers)
 
-        if isinstance(timeout, tuple):
-            try:
-                connect, read = timeout
-                timeout = TimeoutSauce(connect=connect, read=read)
-            except ValueError:
-                raise ValueError(
-                    f"Invalid timeout {timeout}. Pass a (connect, read) timeout tuple, "
-                    f"or a single float to set both timeouts to the same value."
-                )
-        elif isinstance(timeout, TimeoutSauce):
-            pass
-        else:
-            timeout = TimeoutSauce(connect=timeout, read=timeout)
+        timeout = _urllib3_timeout(timeout)
 
-        try:
+        with _translate_urllib3_errors(request):
             resp = conn.urlopen(
                 method=request.method,
                 url=url,
@@ -655,42 +709,4 @@ class HTTPAdapter(BaseAdapter):
                 chunked=chunked,
             )
 
-        except (ProtocolError, OSError) as err:
-            raise ConnectionError(err, request=request)
-
-        except MaxRetryError as e:
-            if isinstance(e.reason, ConnectTimeoutError):
-                # TODO: Remove this in 3.0.0: see #2811
-                if not isinstance(e.reason, NewConnectionError):
-                    raise ConnectTimeout(e, request=request)
-
-            if isinstance(e.reason, ResponseError):
-                raise RetryError(e, request=request)
-
-            if isinstance(e.reason, _ProxyError):
-                raise ProxyError(e, request=request)
-
-            if isinstance(e.reason, _SSLError):
-                # This branch is for urllib3 v1.22 and later.
-                raise SSLError(e, request=request)
-
-            raise ConnectionError(e, request=request)
-
-        except ClosedPoolError as e:
-            raise ConnectionError(e, request=request)
-
-        except _ProxyError as e:
-            raise ProxyError(e)
-
-        except (_SSLError, _HTTPError) as e:
-            if isinstance(e, _SSLError):
-                # This branch is for urllib3 versions earlier than v1.22
-                raise SSLError(e, request=request)
-            elif isinstance(e, ReadTimeoutError):
-                raise ReadTimeout(e, request=request)
-            elif isinstance(e, _InvalidHeader):
-                raise InvalidHeader(e, request=request)
-            else:
-                raise
-
         return self.build_response(request, resp)
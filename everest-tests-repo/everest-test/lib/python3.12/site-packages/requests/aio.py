@@ -0,0 +1,954 @@
+"""
+requests.aio
+~~~~~~~~~~~~
+
+This module provides an asyncio transport adapter and session. They prepare
+requests, follow redirects and handle cookies, retries and timeouts as
+:class:`Session <requests.Session>` and :class:`HTTPAdapter
+<requests.adapters.HTTPAdapter>` do, but perform I/O with asyncio streams, so
+that many requests can be in flight on a single thread. Response bodies are
+read before the response is returned, ``stream=True`` is not supported.
+
+Usage::
+
+  >>> import asyncio
+  >>> from requests.aio import AsyncSession
+  >>> async def main():
+  ...     async with AsyncSession() as s:
+  ...         responses = await asyncio.gather(*(s.get(url) for url in urls))
+  >>> asyncio.run(main())
+"""
+
+import asyncio
+import http.client
+import io
+import re
+import socket
+import ssl
+import sys
+from collections import OrderedDict, deque
+from datetime import timedelta
+
+from urllib3._collections import HTTPHeaderDict, RecentlyUsedContainer
+from urllib3.connection import port_by_scheme
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    LocationValueError,
+    MaxRetryError,
+    NameResolutionError,
+    NewConnectionError,
+    ProtocolError,
+    ReadTimeoutError,
+)
+from urllib3.exceptions import SSLError as _SSLError
+from urllib3.exceptions import TimeoutError as _TimeoutError
+from urllib3.poolmanager import key_fn_by_scheme
+from urllib3.response import HTTPResponse
+from urllib3.util.request import body_to_chunks, set_file_position
+from urllib3.util.retry import Retry
+from urllib3.util.ssl_ import create_urllib3_context, resolve_cert_reqs
+
+from .adapters import (
+    DEFAULT_POOLBLOCK,
+    DEFAULT_POOLSIZE,
+    DEFAULT_RETRIES,
+    HTTPAdapter,
+    _translate_urllib3_errors,
+    _urllib3_timeout,
+)
+from .compat import urlparse
+from .cookies import extract_cookies_to_jar
+from .exceptions import InvalidSchema, InvalidURL, ProxyError
+from .hooks import dispatch_hook
+from .models import Request
+from .sessions import MapResult, Session, _host_key, preferred_clock
+from .utils import resolve_proxies
+
+#: Size of the blocks in which file-like request bodies are read.
+_BLOCKSIZE = 16384
+
+# Characters not allowed in the request line, as in http.client
+_CONTROL_CHARS = re.compile("[\x00-\x20\x7f]")
+
+
+async def _wait(awaitable, timeout):
+    """Awaits awaitable, raising :class:`socket.timeout` after timeout
+    seconds as a blocking socket would.
+    """
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise socket.timeout("timed out") from None
+
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("latin-1")
+
+
+class _BufferSocket:
+    """Socket-like object over a received response, from which
+    :class:`http.client.HTTPResponse` parses it.
+    """
+
+    def __init__(self, data):
+        self._data = data
+
+    def makefile(self, mode):
+        return io.BytesIO(self._data)
+
+
+class AsyncConnection:
+    """A connection of an :class:`AsyncConnectionPool`."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.loop = asyncio.get_running_loop()
+
+    def is_dropped(self):
+        """Returns True if the connection can't be reused: the server closed
+        it, or it belongs to another event loop.
+        """
+        return (
+            self.reader.at_eof()
+            or self.writer.is_closing()
+            or self.loop is not asyncio.get_running_loop()
+        )
+
+    def close(self):
+        if not self.loop.is_closed():
+            self.writer.close()
+
+
+class AsyncConnectionPool:
+    """The asyncio counterpart of :class:`urllib3.HTTPConnectionPool`, for
+    HTTP/1.1 connections to one host.
+
+    Responses are read completely before :meth:`urlopen` returns, and the
+    connection is put back in the pool at once.
+
+    :param scheme: ``"http"`` or ``"https"``.
+    :param host: Host used for this pool.
+    :param port: Port used for this pool.
+    :param maxsize: Number of idle connections kept for reuse.
+    :param block: If True, no more than maxsize connections are used at
+        once, and requests wait for one to be free.
+    """
+
+    def __init__(
+        self,
+        scheme,
+        host,
+        port,
+        maxsize=1,
+        block=False,
+        cert_reqs=None,
+        ca_certs=None,
+        ca_cert_dir=None,
+        cert_file=None,
+        key_file=None,
+        **kwargs,
+    ):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self.block = block
+
+        # TLS settings, set by HTTPAdapter.cert_verify before each request
+        self.cert_reqs = cert_reqs
+        self.ca_certs = ca_certs
+        self.ca_cert_dir = ca_cert_dir
+        self.cert_file = cert_file
+        self.key_file = key_file
+        self._ssl_context = None
+        self._ssl_settings = None
+
+        self._idle = deque()
+        self._semaphore = asyncio.Semaphore(maxsize) if block else None
+
+    def __repr__(self):
+        return f"{type(self).__name__}(host={self.host!r}, port={self.port!r})"
+
+    def _host_header(self):
+        try:
+            host = self.host.encode("ascii")
+        except UnicodeEncodeError:
+            host = self.host.encode("idna")
+        if b":" in host:
+            host = b"[%s]" % host
+        if self.port != port_by_scheme.get(self.scheme):
+            host = b"%s:%d" % (host, self.port)
+        return host
+
+    def _get_ssl_context(self):
+        settings = (
+            self.cert_reqs,
+            self.ca_certs,
+            self.ca_cert_dir,
+            self.cert_file,
+            self.key_file,
+        )
+        if self._ssl_context is None or settings != self._ssl_settings:
+            context = create_urllib3_context(cert_reqs=resolve_cert_reqs(self.cert_reqs))
+            if context.verify_mode != ssl.CERT_NONE:
+                if self.ca_certs or self.ca_cert_dir:
+                    context.load_verify_locations(self.ca_certs, self.ca_cert_dir)
+                else:
+                    context.load_default_certs()
+            if self.cert_file:
+                context.load_cert_chain(self.cert_file, self.key_file)
+            context.set_alpn_protocols(["http/1.1"])
+            self._ssl_context = context
+            self._ssl_settings = settings
+        return self._ssl_context
+
+    async def _get_conn(self, timeout):
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+        try:
+            while self._idle:
+                conn = self._idle.pop()
+                if not conn.is_dropped():
+                    return conn
+                conn.close()
+            return await self._new_conn(timeout)
+        except BaseException:
+            if self._semaphore is not None:
+                self._semaphore.release()
+            raise
+
+    async def _new_conn(self, timeout):
+        ssl_context = None
+        if self.scheme == "https":
+            ssl_context = self._get_ssl_context()
+        try:
+            reader, writer = await _wait(
+                asyncio.open_connection(
+                    self.host,
+                    self.port,
+                    ssl=ssl_context,
+                    server_hostname=self.host if ssl_context else None,
+                ),
+                timeout,
+            )
+        except socket.timeout:
+            raise ConnectTimeoutError(
+                self,
+                f"Connection to {self.host} timed out. (connect timeout={timeout})",
+            )
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except ssl.SSLError as e:
+            raise _SSLError(e) from e
+        except OSError as e:
+            raise NewConnectionError(
+                self, f"Failed to establish a new connection: {e}"
+            ) from e
+        return AsyncConnection(reader, writer)
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            if len(self._idle) < self.maxsize and not conn.is_dropped():
+                self._idle.append(conn)
+            else:
+                conn.close()
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def close(self):
+        """Closes the idle connections."""
+        while self._idle:
+            self._idle.pop().close()
+
+    async def urlopen(
+        self,
+        method,
+        url,
+        body=None,
+        headers=None,
+        retries=None,
+        timeout=None,
+        chunked=False,
+        decode_content=True,
+    ):
+        """Sends a request and reads its response, retrying as
+        :meth:`urllib3.HTTPConnectionPool.urlopen` does. Redirects are not
+        followed.
+
+        :param retries: A :class:`urllib3.util.Retry`, or a number of retries.
+        :param timeout: A :class:`urllib3.util.Timeout`, a float or a
+            (connect, read) tuple.
+        :rtype: urllib3.HTTPResponse
+        """
+        retries = Retry.from_int(retries)
+        timeout = _urllib3_timeout(timeout)
+        body_pos = None
+        while True:
+            body_pos = set_file_position(body, body_pos)
+            timeout_obj = timeout.clone()
+            conn = None
+            try:
+                timeout_obj.start_connect()
+                conn = await self._get_conn(
+                    timeout_obj.resolve_default_timeout(timeout_obj.connect_timeout)
+                )
+                response, reusable = await self._make_request(
+                    conn, method, url, body, headers, chunked, timeout_obj, decode_content
+                )
+            except BaseException as e:
+                # Discard the connection, a new one is opened if retried
+                if conn is not None:
+                    conn.close()
+                    self._put_conn(None)
+                if not isinstance(
+                    e,
+                    (
+                        _TimeoutError,
+                        http.client.HTTPException,
+                        OSError,
+                        ProtocolError,
+                        _SSLError,
+                    ),
+                ):
+                    raise
+                new_e = e
+                if isinstance(e, ssl.SSLError):
+                    new_e = _SSLError(e)
+                elif isinstance(e, (OSError, http.client.HTTPException)):
+                    new_e = ProtocolError("Connection aborted.", e)
+                retries = retries.increment(
+                    method, url, error=new_e, _pool=self, _stacktrace=sys.exc_info()[2]
+                )
+                await asyncio.sleep(retries.get_backoff_time())
+                continue
+
+            if not reusable:
+                conn.close()
+                conn = None
+            self._put_conn(conn)
+
+            has_retry_after = bool(response.headers.get("Retry-After"))
+            if retries.is_retry(method, response.status, has_retry_after):
+                try:
+                    retries = retries.increment(
+                        method, url, response=response, _pool=self
+                    )
+                except MaxRetryError:
+                    if retries.raise_on_status:
+                        raise
+                    return response
+                delay = None
+                if retries.respect_retry_after_header:
+                    delay = retries.get_retry_after(response)
+                await asyncio.sleep(delay or retries.get_backoff_time())
+                continue
+
+            response.retries = retries
+            return response
+
+    async def _make_request(
+        self, conn, method, url, body, headers, chunked, timeout_obj, decode_content
+    ):
+        if _CONTROL_CHARS.search(method) or _CONTROL_CHARS.search(url):
+            raise http.client.InvalidURL(
+                f"URL can't contain control characters. {url!r}"
+            )
+        header_keys = frozenset(_encode(k).lower() for k in headers)
+        lines = [b"%s %s HTTP/1.1" % (method.encode("ascii"), url.encode("ascii"))]
+        if b"host" not in header_keys:
+            lines.append(b"Host: " + self._host_header())
+        if b"accept-encoding" not in header_keys:
+            lines.append(b"Accept-Encoding: identity")
+
+        # Framing, as urllib3.HTTPConnection.request does
+        chunks, content_length = body_to_chunks(body, method=method, blocksize=_BLOCKSIZE)
+        if chunked:
+            if b"transfer-encoding" not in header_keys:
+                lines.append(b"Transfer-Encoding: chunked")
+        elif b"content-length" in header_keys:
+            chunked = False
+        elif b"transfer-encoding" in header_keys:
+            chunked = True
+        elif content_length is None:
+            if chunks is not None:
+                chunked = True
+                lines.append(b"Transfer-Encoding: chunked")
+        else:
+            lines.append(b"Content-Length: %d" % content_length)
+
+        for name, value in headers.items():
+            lines.append(b"%s: %s" % (_encode(name), _encode(value)))
+        lines.append(b"\r\n")
+
+        # The request is sent within the connect timeout, as urllib3 does
+        write_timeout = timeout_obj.resolve_default_timeout(timeout_obj.connect_timeout)
+        writer = conn.writer
+        try:
+            writer.write(b"\r\n".join(lines))
+            if chunks is not None:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode("utf-8")
+                    if chunked:
+                        writer.write(b"%x\r\n%b\r\n" % (len(chunk), chunk))
+                    else:
+                        writer.write(chunk)
+                    await _wait(writer.drain(), write_timeout)
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+            await _wait(writer.drain(), write_timeout)
+        except (BrokenPipeError, ConnectionResetError):
+            # The server may have responded before reading the whole body
+            pass
+
+        read_timeout = timeout_obj.resolve_default_timeout(timeout_obj.read_timeout)
+        try:
+            data, will_close = await self._read_response(conn.reader, method, read_timeout)
+        except socket.timeout:
+            raise ReadTimeoutError(
+                self, url, f"Read timed out. (read timeout={read_timeout})"
+            )
+
+        # Parse the response with http.client, as urllib3 does
+        httplib_response = http.client.HTTPResponse(_BufferSocket(data), method=method)
+        httplib_response.begin()
+        response = HTTPResponse(
+            body=httplib_response,
+            headers=HTTPHeaderDict(httplib_response.msg.items()),
+            status=httplib_response.status,
+            version=httplib_response.version,
+            version_string=f"HTTP/{httplib_response.version / 10:.1f}",
+            reason=httplib_response.reason,
+            preload_content=False,
+            decode_content=decode_content,
+            original_response=httplib_response,
+            enforce_content_length=True,
+            request_method=method,
+            request_url=url,
+        )
+        return response, not will_close
+
+    async def _read_response(self, reader, method, timeout):
+        """Reads a response up to the end of its body. Returns its bytes, and
+        whether the connection must be closed afterwards.
+        """
+        while True:
+            try:
+                head = await _wait(reader.readuntil(b"\r\n\r\n"), timeout)
+            except asyncio.IncompleteReadError:
+                raise http.client.RemoteDisconnected(
+                    "Remote end closed connection without response"
+                )
+            except asyncio.LimitOverrunError:
+                raise http.client.LineTooLong("header block")
+            status_line, _, header_block = head.partition(b"\r\n")
+            try:
+                version, status = status_line.split(None, 2)[:2]
+                status = int(status)
+            except ValueError:
+                raise http.client.BadStatusLine(repr(status_line))
+            # Skip interim responses, as http.client does
+            if not (100 <= status < 200) or status == 101:
+                break
+        msg = http.client.parse_headers(io.BytesIO(header_block))
+
+        connection = msg.get("Connection", "").lower()
+        will_close = "close" in connection or (
+            version == b"HTTP/1.0" and "keep-alive" not in connection
+        )
+
+        length = msg.get("Content-Length")
+        parts = [head]
+        try:
+            if method == "HEAD" or status in (101, 204, 304):
+                will_close = will_close or status == 101
+            elif "chunked" in msg.get("Transfer-Encoding", "").lower():
+                while True:
+                    line = await _wait(reader.readuntil(b"\r\n"), timeout)
+                    parts.append(line)
+                    try:
+                        size = int(line.split(b";", 1)[0], 16)
+                    except ValueError:
+                        # Left for http.client to report
+                        will_close = True
+                        break
+                    if size == 0:
+                        # Trailers, up to an empty line
+                        while line != b"\r\n":
+                            line = await _wait(reader.readuntil(b"\r\n"), timeout)
+                            parts.append(line)
+                        break
+                    parts.append(await _wait(reader.readexactly(size + 2), timeout))
+            elif length is not None and length.strip().isdigit():
+                parts.append(await _wait(reader.readexactly(int(length)), timeout))
+            else:
+                # Delimited by the end of the connection
+                will_close = True
+                while True:
+                    data = await _wait(reader.read(_BLOCKSIZE), timeout)
+                    if not data:
+                        break
+                    parts.append(data)
+        except asyncio.IncompleteReadError as e:
+            # Reported by urllib3 when the body is read
+            parts.append(e.partial)
+            will_close = True
+        except asyncio.LimitOverrunError:
+            raise http.client.LineTooLong("chunk size")
+        return b"".join(parts), will_close
+
+
+class AsyncPoolManager:
+    """Keeps an :class:`AsyncConnectionPool` per host, keyed as
+    :class:`urllib3.PoolManager` keys its pools.
+
+    :param num_pools: Number of connection pools to cache before discarding
+        the least recently used pool.
+    :param connection_pool_kw: Additional parameters are used to create fresh
+        :class:`AsyncConnectionPool` instances.
+    """
+
+    def __init__(self, num_pools=10, **connection_pool_kw):
+        self.connection_pool_kw = connection_pool_kw
+        self.pools = RecentlyUsedContainer(num_pools, dispose_func=lambda p: p.close())
+        self.key_fn_by_scheme = key_fn_by_scheme.copy()
+
+    def connection_from_host(self, host, port=None, scheme="http", pool_kwargs=None):
+        """Returns the :class:`AsyncConnectionPool` for host, port and
+        scheme, creating it if needed.
+        """
+        if not host:
+            raise LocationValueError("No host specified.")
+
+        request_context = self.connection_pool_kw.copy()
+        request_context.update(pool_kwargs or {})
+        request_context["scheme"] = (scheme or "http").lower()
+        if not port:
+            port = port_by_scheme.get(request_context["scheme"], 80)
+        request_context["port"] = port
+        request_context["host"] = host
+
+        pool_key_constructor = self.key_fn_by_scheme.get(request_context["scheme"])
+        if not pool_key_constructor:
+            raise LocationValueError(f"Unsupported scheme {scheme!r}.")
+        pool_key = pool_key_constructor(request_context)
+
+        with self.pools.lock:
+            pool = self.pools.get(pool_key)
+            if pool is None:
+                pool = AsyncConnectionPool(**request_context)
+                self.pools[pool_key] = pool
+        return pool
+
+    def clear(self):
+        """Closes the idle connections of all pools and discards them."""
+        self.pools.clear()
+
+
+class AsyncHTTPAdapter(HTTPAdapter):
+    """An asyncio Transport Adapter, the counterpart of
+    :class:`HTTPAdapter <requests.adapters.HTTPAdapter>` for
+    :class:`AsyncSession`, whose :meth:`send` is a coroutine.
+
+    Retries, timeouts and TLS settings are handled as by
+    :class:`HTTPAdapter <requests.adapters.HTTPAdapter>`, and raise the same
+    exceptions. Proxies are not supported.
+
+    Responses are read completely before :meth:`send` returns, so streaming
+    is not supported: :meth:`send` raises :class:`ValueError` with
+    ``stream=True``.
+
+    :param pool_connections: The number of connection pools to cache.
+    :param pool_maxsize: The maximum number of connections to save in the pool.
+    :param max_retries: The maximum number of retries each connection
+        should attempt, or a urllib3 ``Retry``, as for
+        :class:`HTTPAdapter <requests.adapters.HTTPAdapter>`.
+    :param pool_block: Whether the connection pool should wait for a free
+        connection rather than open more than ``pool_maxsize`` connections to
+        a host.
+
+    Usage::
+
+      >>> s = AsyncSession()
+      >>> s.mount('http://', AsyncHTTPAdapter(pool_maxsize=100, pool_block=True))
+    """
+
+    def __init__(
+        self,
+        pool_connections=DEFAULT_POOLSIZE,
+        pool_maxsize=DEFAULT_POOLSIZE,
+        max_retries=DEFAULT_RETRIES,
+        pool_block=DEFAULT_POOLBLOCK,
+    ):
+        super().__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+            pool_block=pool_block,
+        )
+
+    def init_poolmanager(
+        self, connections, maxsize, block=DEFAULT_POOLBLOCK, **pool_kwargs
+    ):
+        """Initializes an :class:`AsyncPoolManager`.
+
+        This method should not be called from user code, and is only
+        exposed for use when subclassing the :class:`AsyncHTTPAdapter`.
+        """
+        # save these values for pickling
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+
+        self.poolmanager = AsyncPoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            **pool_kwargs,
+        )
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        raise ProxyError(f"AsyncHTTPAdapter does not support proxies ({proxy}).")
+
+    async def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        """Sends PreparedRequest object. Returns Response object.
+
+        :param request: The :class:`PreparedRequest <PreparedRequest>` being sent.
+        :param stream: (optional) Must be False, the content is always read.
+        :param timeout: (optional) How long to wait for the server to send
+            data before giving up, as a float, or a :ref:`(connect timeout,
+            read timeout) <timeouts>` tuple.
+        :type timeout: float or tuple or urllib3 Timeout object
+        :param verify: (optional) Either a boolean, in which case it controls whether
+            we verify the server's TLS certificate, or a string, in which case it
+            must be a path to a CA bundle to use
+        :param cert: (optional) Any user-provided SSL certificate to be trusted.
+        :param proxies: (optional) The proxies dictionary to apply to the request.
+        :rtype: requests.Response
+        """
+        if stream:
+            raise ValueError("AsyncHTTPAdapter does not support stream=True.")
+
+        try:
+            conn = self.get_connection_with_tls_context(
+                request, verify, proxies=proxies, cert=cert
+            )
+        except LocationValueError as e:
+            raise InvalidURL(e, request=request)
+
+        self.cert_verify(conn, request.url, verify, cert)
+        url = self.request_url(request, proxies)
+        self.add_headers(
+            request,
+            stream=stream,
+            timeout=timeout,
+            verify=verify,
+            cert=cert,
+            proxies=proxies,
+        )
+
+        chunked = not (request.body is None or "Content-Length" in request.headers)
+        timeout = _urllib3_timeout(timeout)
+
+        with _translate_urllib3_errors(request):
+            resp = await conn.urlopen(
+                method=request.method,
+                url=url,
+                body=request.body,
+                headers=request.headers,
+                retries=self.max_retries,
+                timeout=timeout,
+                chunked=chunked,
+                decode_content=False,
+            )
+
+        return self.build_response(request, resp)
+
+
+class AsyncSession(Session):
+    """A Requests session whose requests are coroutines.
+
+    Requests are prepared, and cookies, hooks and redirects handled, as by
+    :class:`Session <requests.Session>`; ``http://`` and ``https://`` URLs
+    are sent with :class:`AsyncHTTPAdapter`. Adapters mounted on an
+    AsyncSession must have a coroutine ``send``.
+
+    Basic Usage::
+
+      >>> async with AsyncSession() as s:
+      ...     r = await s.get('https://httpbin.org/get')
+      <Response [200]>
+
+    :meth:`request`, :meth:`get` and the other methods prepare the request
+    at once, and return a coroutine sending it. Response bodies are read
+    before the coroutine returns, ``stream=True`` is not supported.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.adapters = OrderedDict()
+        self.mount("https://", AsyncHTTPAdapter())
+        self.mount("http://", AsyncHTTPAdapter())
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    async def send(self, request, **kwargs):
+        """Send a given PreparedRequest.
+
+        :rtype: requests.Response
+        """
+        # Set defaults that the hooks can utilize to ensure they always have
+        # the correct parameters to reproduce the previous request.
+        kwargs.setdefault("stream", self.stream)
+        kwargs.setdefault("verify", self.verify)
+        kwargs.setdefault("cert", self.cert)
+        if "proxies" not in kwargs:
+            kwargs["proxies"] = resolve_proxies(request, self.proxies, self.trust_env)
+
+        # It's possible that users might accidentally send a Request object.
+        # Guard against that specific failure case.
+        if isinstance(request, Request):
+            raise ValueError("You can only send PreparedRequests.")
+
+        # Set up variables needed for resolve_redirects and dispatching of hooks
+        allow_redirects = kwargs.pop("allow_redirects", True)
+        stream = kwargs.get("stream")
+        hooks = request.hooks
+
+        # Get the appropriate adapter to use
+        adapter = self.get_adapter(url=request.url)
+
+        # Start time (approximately) of the request
+        start = preferred_clock()
+
+        # Send the request
+        r = await adapter.send(request, **kwargs)
+
+        # Total elapsed time of the request (approximately)
+        elapsed = preferred_clock() - start
+        r.elapsed = timedelta(seconds=elapsed)
+
+        # Response manipulation hooks
+        r = dispatch_hook("response", hooks, r, **kwargs)
+
+        # Persist cookies
+        if r.history:
+            # If the hooks create history then we want those cookies too
+            for resp in r.history:
+                extract_cookies_to_jar(self.cookies, resp.request, resp.raw)
+
+        extract_cookies_to_jar(self.cookies, request, r.raw)
+
+        # Resolve redirects if allowed.
+        if allow_redirects:
+            history = [resp async for resp in self.resolve_redirects(r, request, **kwargs)]
+        else:
+            history = []
+
+        # Shuffle things around if there's history.
+        if history:
+            # Insert the first (original) request at the start
+            history.insert(0, r)
+            # Get the last request made
+            r = history.pop()
+            r.history = history
+
+        # If redirects aren't being followed, store the response on the Request for Response.next().
+        if not allow_redirects:
+            gen = self.resolve_redirects(r, request, yield_requests=True, **kwargs)
+            try:
+                r._next = await gen.__anext__()
+            except StopAsyncIteration:
+                pass
+            finally:
+                await gen.aclose()
+
+        if not stream:
+            r.content
+
+        return r
+
+    async def resolve_redirects(
+        self,
+        resp,
+        req,
+        stream=False,
+        timeout=None,
+        verify=True,
+        cert=None,
+        proxies=None,
+        yield_requests=False,
+        **adapter_kwargs,
+    ):
+        """Receives a Response. Returns an asynchronous generator of
+        Responses or Requests."""
+
+        hist = []  # keep track of history
+
+        url = self.get_redirect_target(resp)
+        previous_fragment = urlparse(req.url).fragment
+        while url:
+            prepared_request, proxies, previous_fragment = self._prepare_redirect(
+                resp, req, url, hist, previous_fragment, proxies
+            )
+
+            # Override the original request.
+            req = prepared_request
+
+            if yield_requests:
+                yield req
+            else:
+                resp = await self.send(
+                    req,
+                    stream=stream,
+                    timeout=timeout,
+                    verify=verify,
+                    cert=cert,
+                    proxies=proxies,
+                    allow_redirects=False,
+                    **adapter_kwargs,
+                )
+
+                extract_cookies_to_jar(self.cookies, prepared_request, resp.raw)
+
+                # extract redirect url, if any, for the next loop
+                url = self.get_redirect_target(resp)
+                yield resp
+
+    def map(self, requests, max_workers=None, per_host_limit=None, **kwargs):
+        r"""Sends many requests concurrently, as :meth:`Session.map
+        <requests.Session.map>` does. Returns an asynchronous iterator of
+        :class:`MapResult <requests.sessions.MapResult>`, yielded as the
+        requests complete.
+
+        At most ``max_workers`` requests are in flight at once, and at most
+        ``per_host_limit`` to the same scheme and host. The requests are
+        taken from ``requests`` as others complete, so it may be a generator.
+        An exception raised for a request is stored in its result.
+
+        Usage::
+
+          >>> async with AsyncSession() as s:
+          ...     async for result in s.map(reqs, max_workers=50, timeout=5):
+          ...         print(result.request.url, result.response)
+
+        :param requests: iterable of :class:`Request` or
+            :class:`PreparedRequest` objects.
+        :param max_workers: (optional) number of requests in flight at once,
+            defaults to 10.
+        :param per_host_limit: (optional) number of requests in flight to the
+            same host at once, defaults to the ``pool_maxsize`` of the adapter
+            mounted for the host.
+        :param \*\*kwargs: Optional arguments that ``send`` takes.
+        :rtype: asynchronous iterator of :class:`MapResult
+            <requests.sessions.MapResult>`
+        """
+        return super().map(requests, max_workers, per_host_limit, **kwargs)
+
+    async def _map(self, requests, max_workers, per_host_limit, kwargs):
+        running = {}
+        active = {}
+        limits = {}
+        # Requests read while their host was at its limit, by host
+        waiting = OrderedDict()
+        waiting_count = 0
+        count = 0
+
+        def host_limit(host, url):
+            if host not in limits:
+                limit = per_host_limit
+                if limit is None:
+                    try:
+                        adapter = self.get_adapter(url=url)
+                    except InvalidSchema:
+                        adapter = None
+                    limit = getattr(adapter, "_pool_maxsize", None) or max_workers
+                limits[host] = limit
+            return limits[host]
+
+        def start(host, index, request):
+            task = asyncio.ensure_future(self._map_send(index, request, kwargs))
+            running[task] = host
+            active[host] = active.get(host, 0) + 1
+
+        try:
+            while True:
+                for host in list(waiting):
+                    pending = waiting[host]
+                    while (
+                        pending
+                        and len(running) < max_workers
+                        and active.get(host, 0) < limits[host]
+                    ):
+                        start(host, *pending.popleft())
+                        waiting_count -= 1
+                    if not pending:
+                        del waiting[host]
+
+                while len(running) < max_workers and waiting_count < max_workers:
+                    try:
+                        request = next(requests)
+                    except StopIteration:
+                        break
+                    url = getattr(request, "url", None)
+                    host = _host_key(url)
+                    if active.get(host, 0) < host_limit(host, url):
+                        start(host, count, request)
+                    else:
+                        waiting.setdefault(host, deque()).append((count, request))
+                        waiting_count += 1
+                    count += 1
+
+                if not running:
+                    return
+
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    active[running.pop(task)] -= 1
+                    yield task.result()
+        finally:
+            # The iteration was stopped early
+            for task in running:
+                task.cancel()
+
+    async def _map_send(self, index, request, kwargs):
+        """Prepares and sends one of the requests of :meth:`map`.
+
+        :rtype: MapResult
+        """
+        result = MapResult(index, request)
+        start = preferred_clock()
+        try:
+            if isinstance(request, Request):
+                prep = self.prepare_request(request)
+                send_kwargs = dict(kwargs)
+                send_kwargs.update(
+                    self.merge_environment_settings(
+                        prep.url,
+                        dict(kwargs.get("proxies") or {}),
+                        kwargs.get("stream"),
+                        kwargs.get("verify"),
+                        kwargs.get("cert"),
+                    )
+                )
+            else:
+                prep = request
+                send_kwargs = kwargs
+            result.response = await self.send(prep, **send_kwargs)
+        except Exception as e:
+            result.exception = e
+        result.elapsed = timedelta(seconds=preferred_clock() - start)
+        return result
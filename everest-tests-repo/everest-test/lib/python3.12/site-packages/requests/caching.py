@@ -0,0 +1,505 @@
+"""
+requests.caching
+~~~~~~~~~~~~~~~~
+
+This module provides a transport adapter caching responses, for use with a
+:class:`Session <requests.Session>`.
+
+Usage::
+
+  >>> import requests
+  >>> from requests.caching import CachingAdapter
+  >>> s = requests.Session()
+  >>> cache = CachingAdapter(maxsize=512, ttl={'*/api/modules*': 300})
+  >>> s.mount('http://', cache)
+  >>> s.get('http://localhost:1880/api/modules')
+  <Response [200]>
+  >>> cache.stats
+  <CacheStats hits=0 revalidated=0 misses=1 stored=1>
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from fnmatch import fnmatchcase
+
+from urllib3._collections import RecentlyUsedContainer
+from urllib3.response import HTTPResponse
+
+from .adapters import BaseAdapter, HTTPAdapter
+from .models import Response
+from .structures import CaseInsensitiveDict
+from .utils import get_encoding_from_headers, urldefragauth
+
+#: Status codes of responses which may be stored (RFC 9111, section 3).
+CACHEABLE_STATUS_CODES = frozenset(
+    (200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501)
+)
+
+# Headers of a 304 response which must not replace the stored ones.
+_NOT_UPDATED_HEADERS = frozenset(
+    ("content-length", "content-encoding", "transfer-encoding", "content-range")
+)
+
+# Headers describing the received body, not the decoded content which is
+# stored.
+_NOT_STORED_HEADERS = frozenset(
+    ("content-length", "content-encoding", "transfer-encoding")
+)
+
+
+def _parse_cache_control(value):
+    """Parses a Cache-Control header into a dict of lowercase directives.
+
+    :rtype: dict
+    """
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def _parse_seconds(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_date(value):
+    """Returns the timestamp of an HTTP date, or None if it is invalid."""
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class CacheStats:
+    """Counts of the requests handled by a :class:`CachingAdapter`.
+
+    Members:
+
+    hits : Integer. Responses served from the cache without a request.
+
+    revalidated : Integer. Responses served from the cache after the server
+        answered a conditional request with 304 Not Modified.
+
+    misses : Integer. Requests answered by the server with a new response.
+
+    stored : Integer. Responses stored in the cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        return (
+            f"<CacheStats hits={self.hits} revalidated={self.revalidated} "
+            f"misses={self.misses} stored={self.stored}>"
+        )
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def hit_ratio(self):
+        """The share of cacheable requests answered from the cache, including
+        revalidated responses, or 0.0 if there were none."""
+        total = self.hits + self.revalidated + self.misses
+        return (self.hits + self.revalidated) / total if total else 0.0
+
+    def reset(self):
+        """Sets the counts back to zero."""
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stored = 0
+
+
+class _CacheEntry:
+    """A stored response."""
+
+    __slots__ = (
+        "url",
+        "status",
+        "reason",
+        "headers",
+        "content",
+        "vary",
+        "expires",
+    )
+
+    def __init__(self, url, status, reason, headers, content, vary, expires):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        #: List of (name, value) tuples.
+        self.headers = headers
+        #: Decoded content of the response.
+        self.content = content
+        #: Values of the request headers named by the Vary header.
+        self.vary = vary
+        #: Time at which the entry becomes stale.
+        self.expires = expires
+
+    def dumps(self):
+        meta = {name: getattr(self, name) for name in self.__slots__}
+        del meta["content"]
+        return json.dumps(meta).encode("utf-8") + b"\n" + self.content
+
+    @classmethod
+    def loads(cls, data):
+        meta, _, content = data.partition(b"\n")
+        meta = json.loads(meta)
+        meta["headers"] = [tuple(header) for header in meta["headers"]]
+        return cls(content=content, **meta)
+
+
+class _DiskStore:
+    """Stores cache entries as files of a directory, one per key."""
+
+    # Names of the entries, and of the temporary files of set()
+    _NAME = re.compile(r"[0-9a-f]{64}|\.tmp[a-z0-9_]{8}")
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(
+            self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest()
+        )
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return _CacheEntry.loads(f.read())
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+    def set(self, key, entry):
+        # Write to a temporary file first, so that readers never see a
+        # partial entry.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(entry.dumps())
+            os.replace(tmp, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        # The directory may hold other files, only remove ours.
+        for name in os.listdir(self.directory):
+            if not self._NAME.fullmatch(name):
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class CachingAdapter(BaseAdapter):
+    """A Transport Adapter caching the responses of another adapter.
+
+    GET responses are stored according to their Cache-Control, Expires, ETag
+    and Last-Modified headers, in a bounded in-memory LRU and, optionally, in
+    a directory. Fresh responses are served without a request. Stale ones
+    are revalidated with a conditional request (If-None-Match or
+    If-Modified-Since), and served from the cache when the server answers 304
+    Not Modified. Successful requests with other methods remove the entry of
+    their URL.
+
+    The cache is private: responses to requests with credentials are stored
+    too. Responses requested with ``stream=True`` are served from the cache
+    but not stored, and the content of the responses stored is read at once.
+    ``Response.raw`` of a cached response reads the decoded content.
+
+    :param adapter: (optional) The adapter sending the requests, an
+        :class:`HTTPAdapter <requests.adapters.HTTPAdapter>` by default.
+    :param maxsize: The maximum number of responses kept in memory.
+    :param directory: (optional) A directory where responses are also stored,
+        so that they survive the adapter. Entries evicted from memory are
+        read back from it.
+    :param ttl: (optional) A dictionary mapping URL patterns to freshness
+        lifetimes in seconds, overriding the lifetime given by the response
+        headers. Patterns are matched against the whole URL with
+        :func:`fnmatch.fnmatchcase`, the first matching pattern is used.
+        A lifetime of 0 makes responses be revalidated on every request.
+
+    Usage::
+
+      >>> s = requests.Session()
+      >>> s.mount('http://', CachingAdapter(directory='.http-cache'))
+    """
+
+    __attrs__ = ["adapter", "maxsize", "directory", "ttl"]
+
+    def __init__(self, adapter=None, maxsize=256, directory=None, ttl=None):
+        super().__init__()
+        self.adapter = adapter if adapter is not None else HTTPAdapter()
+        self.maxsize = maxsize
+        self.directory = directory
+        self.ttl = dict(ttl or {})
+        self.stats = CacheStats()
+        self._init_store()
+
+    def _init_store(self):
+        self._memory = RecentlyUsedContainer(self.maxsize)
+        self._disk = _DiskStore(self.directory) if self.directory else None
+
+    def __getstate__(self):
+        return {attr: getattr(self, attr, None) for attr in self.__attrs__}
+
+    def __setstate__(self, state):
+        for attr, value in state.items():
+            setattr(self, attr, value)
+        self.stats = CacheStats()
+        self._init_store()
+
+    @property
+    def _pool_maxsize(self):
+        # Sizes the per-host limit of Session.map as for the wrapped adapter
+        return getattr(self.adapter, "_pool_maxsize", None)
+
+    def _get(self, key):
+        entry = self._memory.get(key)
+        if entry is None and self._disk is not None:
+            entry = self._disk.get(key)
+            if entry is not None:
+                self._memory[key] = entry
+        return entry
+
+    def _set(self, key, entry):
+        self._memory[key] = entry
+        if self._disk is not None:
+            self._disk.set(key, entry)
+
+    def _delete(self, key):
+        self._memory.pop(key, None)
+        if self._disk is not None:
+            self._disk.delete(key)
+
+    def clear(self):
+        """Removes all stored responses, from memory and from the
+        directory. Other files of the directory are left alone."""
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self):
+        """Closes the wrapped adapter. The cache is kept."""
+        self.adapter.close()
+
+    def cache_key(self, request):
+        """Returns the key under which the response to request is stored.
+        This may be overridden to cache by other parts of the request.
+
+        :rtype: str
+        """
+        return urldefragauth(request.url)
+
+    def freshness_lifetime(self, url, headers):
+        """Returns the number of seconds for which a response is fresh,
+        from the ``ttl`` overrides or the response headers.
+
+        :rtype: int or float
+        """
+        for pattern, seconds in self.ttl.items():
+            if fnmatchcase(url, pattern):
+                return seconds
+
+        cache_control = _parse_cache_control(headers.get("Cache-Control"))
+        if "no-cache" in cache_control:
+            return 0
+        max_age = _parse_seconds(cache_control.get("max-age"))
+        if max_age is not None:
+            return max_age
+
+        expires = _parse_date(headers.get("Expires"))
+        if expires is not None:
+            date = _parse_date(headers.get("Date"))
+            return max(expires - (date if date is not None else time.time()), 0)
+        return 0
+
+    def _vary(self, request, headers):
+        """Returns the values of the request headers named by the Vary
+        header, or None if the response can't be stored."""
+        vary = {}
+        for name in (headers.get("Vary") or "").split(","):
+            name = name.strip().lower()
+            if name == "*":
+                return None
+            if name:
+                vary[name] = request.headers.get(name)
+        return vary
+
+    def _build_response(self, request, entry):
+        headers = CaseInsensitiveDict(entry.headers)
+        response = Response()
+        response.status_code = entry.status
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        response.reason = entry.reason
+        response.raw = HTTPResponse(
+            body=io.BytesIO(entry.content),
+            headers=entry.headers,
+            status=entry.status,
+            reason=entry.reason,
+            preload_content=False,
+            decode_content=False,
+        )
+        response.url = request.url
+        response._content = entry.content
+        response._content_consumed = True
+        response.request = request
+        response.connection = self
+        return response
+
+    def _store(self, key, request, response, now):
+        """Stores response if it may be, returning whether it was."""
+        cache_control = _parse_cache_control(response.headers.get("Cache-Control"))
+        if response.status_code not in CACHEABLE_STATUS_CODES or "no-store" in cache_control:
+            return False
+        vary = self._vary(request, response.headers)
+        if vary is None:
+            return False
+
+        lifetime = self.freshness_lifetime(key, response.headers)
+        validated = "ETag" in response.headers or "Last-Modified" in response.headers
+        if lifetime <= 0 and not validated:
+            return False
+        age = _parse_seconds(response.headers.get("Age")) or 0
+
+        content = response.content
+        headers = [
+            (name, value)
+            for name, value in response.headers.items()
+            if name.lower() not in _NOT_STORED_HEADERS
+        ]
+        headers.append(("Content-Length", str(len(content))))
+        entry = _CacheEntry(
+            url=key,
+            status=response.status_code,
+            reason=response.reason,
+            headers=headers,
+            content=content,
+            vary=vary,
+            expires=now + lifetime - age,
+        )
+        self._set(key, entry)
+        self.stats._count("stored")
+        return True
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        """Sends PreparedRequest object, or answers it from the cache.
+        Returns Response object.
+
+        :param request: The :class:`PreparedRequest <PreparedRequest>` being sent.
+        :param stream: (optional) Whether to stream the request content.
+            Streamed responses are not stored.
+        :param timeout: (optional) How long to wait for the server to send
+            data before giving up, as a float, or a :ref:`(connect timeout,
+            read timeout) <timeouts>` tuple.
+        :type timeout: float or tuple or urllib3 Timeout object
+        :param verify: (optional) Either a boolean, in which case it controls whether
+            we verify the server's TLS certificate, or a string, in which case it
+            must be a path to a CA bundle to use
+        :param cert: (optional) Any user-provided SSL certificate to be trusted.
+        :param proxies: (optional) The proxies dictionary to apply to the request.
+        :rtype: requests.Response
+        """
+        kwargs = {
+            "stream": stream,
+            "timeout": timeout,
+            "verify": verify,
+            "cert": cert,
+            "proxies": proxies,
+        }
+        key = self.cache_key(request)
+
+        if request.method != "GET":
+            response = self.adapter.send(request, **kwargs)
+            if request.method not in ("HEAD", "OPTIONS", "TRACE") and (
+                200 <= response.status_code < 400
+            ):
+                self._delete(key)
+            return response
+
+        request_cache_control = _parse_cache_control(request.headers.get("Cache-Control"))
+        if "no-store" in request_cache_control:
+            return self.adapter.send(request, **kwargs)
+
+        now = time.time()
+        entry = self._get(key)
+        if entry is not None and entry.vary != {
+            name: request.headers.get(name) for name in entry.vary
+        }:
+            entry = None
+
+        if entry is not None:
+            headers = CaseInsensitiveDict(entry.headers)
+            revalidate = (
+                "no-cache" in request_cache_control
+                or _parse_seconds(request_cache_control.get("max-age")) == 0
+            )
+            if now < entry.expires and not revalidate:
+                self.stats._count("hits")
+                return self._build_response(request, entry)
+
+            # Revalidate the stored response, without altering the
+            # caller's request.
+            conditional = request.copy()
+            if "ETag" in headers:
+                conditional.headers["If-None-Match"] = headers["ETag"]
+            if "Last-Modified" in headers:
+                conditional.headers["If-Modified-Since"] = headers["Last-Modified"]
+            response = self.adapter.send(conditional, **kwargs)
+
+            if response.status_code == 304:
+                response.close()
+                for name, value in response.headers.items():
+                    if name.lower() not in _NOT_UPDATED_HEADERS:
+                        headers[name] = value
+                lifetime = self.freshness_lifetime(key, headers)
+                age = _parse_seconds(headers.get("Age")) or 0
+                entry = _CacheEntry(
+                    url=entry.url,
+                    status=entry.status,
+                    reason=entry.reason,
+                    headers=list(headers.items()),
+                    content=entry.content,
+                    vary=entry.vary,
+                    expires=now + lifetime - age,
+                )
+                self._set(key, entry)
+                self.stats._count("revalidated")
+                return self._build_response(request, entry)
+        else:
+            response = self.adapter.send(request, **kwargs)
+
+        self.stats._count("misses")
+        if not stream:
+            self._store(key, request, response, now)
+        return response
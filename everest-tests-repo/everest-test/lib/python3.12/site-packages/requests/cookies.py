@@ -355,6 +355,13 @@ class RequestsCookieJar(cookielib.CookieJar, MutableMapping):
             cookie.value = cookie.value.replace('\\"', "")
         return super().set_cookie(cookie, *args, **kwargs)
 
+    def __iter__(self):
+        """Iterates over a snapshot of the cookies, so that the jar may be
+        updated by other threads meanwhile (e.g. by :meth:`Session.map`).
+        """
+        with self._cookies_lock:
+            return iter(list(super().__iter__()))
+
     def update(self, other):
         """Updates this jar with cookies from another CookieJar or dict-like"""
         if isinstance(other, cookielib.CookieJar):
@@ -25,6 +25,7 @@ from urllib3.filepost import encode_multipart_formdata
 from urllib3.util import parse_url
 
 from ._internal_utils import to_native_string, unicode_is_ascii
+from ._jsonstream import JSONStreamDecoder, parse_json_path
 from .auth import HTTPBasicAuth
 from .compat import (
     Callable,
@@ -944,16 +945,21 @@ class Response:
 
         return content
 
-    def json(self, **kwargs):
+    def json(self, stream=False, **kwargs):
         r"""Decodes the JSON response body (if any) as a Python object.
 
         This may return a dictionary, list, etc. depending on what is in the response.
 
+        :param stream: (optional) if True, return an iterator over the items
+            of the top-level array instead, see :meth:`iter_json`.
         :param \*\*kwargs: Optional arguments that ``json.loads`` takes.
         :raises requests.exceptions.JSONDecodeError: If the response body does not
             contain valid json.
         """
 
+        if stream:
+            return self.iter_json(**kwargs)
+
         if not self.encoding and self.content and len(self.content) > 3:
             # No encoding set. JSON RFC 4627 section 3 states we should expect
             # UTF-8, -16 or -32. Detect which one to use; If the detection or
@@ -979,6 +985,35 @@ class Response:
             # This aliases json.JSONDecodeError and simplejson.JSONDecodeError
             raise RequestsJSONDecodeError(e.msg, e.doc, e.pos)
 
+    def iter_json(self, path="$[*]", chunk_size=ITER_CHUNK_SIZE, **kwargs):
+        r"""Iterates over the values of the JSON response body selected by
+        ``path``, decoding each one as soon as it has been received. When
+        stream=True is set on the request, this avoids reading the whole
+        body into memory, e.g. for large arrays of records.
+
+        By default the items of the top-level array are yielded. ``path``
+        accepts a subset of JSONPath: ``$`` is the document, ``.name`` or
+        ``['name']`` a member of an object, ``[n]`` an item of an array, and
+        ``[*]`` or ``.*`` every item or member, e.g. ``$.results[*]``. Values
+        that do not match the path are skipped without being decoded, so
+        ``object_hook`` and the like are not called for them and they are
+        not validated.
+
+        If Response.encoding is None, the encoding is detected from the first
+        bytes of the body as JSON requires UTF-8, -16 or -32, rather than by
+        ``charset_normalizer`` or ``chardet`` which need the whole body.
+
+        :param path: (optional) JSONPath selecting the values to yield.
+        :param chunk_size: (optional) number of bytes read at once.
+        :param \*\*kwargs: Optional arguments that ``json.loads`` takes.
+        :raises ValueError: If the path is not supported.
+        :raises requests.exceptions.JSONDecodeError: If the response body does not
+            contain valid json. Values before the error have already been yielded.
+        """
+        steps = parse_json_path(path)
+        chunks = self.iter_content(chunk_size=chunk_size)
+        return iter(JSONStreamDecoder(chunks, steps, self.encoding, **kwargs))
+
     @property
     def links(self):
         """Returns the parsed header links of the response, if any."""
@@ -7,12 +7,14 @@ requests (cookies, auth, proxies).
 """
 import os
 import sys
+import threading
 import time
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import timedelta
 
 from ._internal_utils import to_native_string
-from .adapters import HTTPAdapter
+from .adapters import DEFAULT_POOLSIZE, HTTPAdapter
 from .auth import _basic_auth_str
 from .compat import Mapping, cookielib, urljoin, urlparse
 from .cookies import (
@@ -103,6 +105,35 @@ def merge_hooks(request_hooks, session_hooks, dict_class=OrderedDict):
     return merge_setting(request_hooks, session_hooks, dict_class)
 
 
+def _serialize_hooks(hooks, lock):
+    """Wraps each event of a hook dictionary so that its hooks are
+    dispatched while holding lock.
+    """
+
+    def wrap(event, event_hooks):
+        def dispatch(hook_data, **kwargs):
+            with lock:
+                return dispatch_hook(event, {event: event_hooks}, hook_data, **kwargs)
+
+        return dispatch
+
+    return {
+        event: [wrap(event, event_hooks)] if event_hooks else []
+        for event, event_hooks in (hooks or {}).items()
+    }
+
+
+def _host_key(url):
+    """Returns the scheme and netloc of url, which identify its connection
+    pool, or url itself if it can't be parsed.
+    """
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return url
+    return parsed.scheme.lower(), parsed.netloc.lower()
+
+
 class SessionRedirectMixin:
     def get_redirect_target(self, resp):
         """Receives a Response. Returns a redirect URI or ``None``"""
@@ -175,87 +206,10 @@ class SessionRedirectMixin:
         url = self.get_redirect_target(resp)
         previous_fragment = urlparse(req.url).fragment
         while url:
-            prepared_request = req.copy()
-
-            # Update history and keep track of redirects.
-            # resp.history must ignore the original request in this loop
-            hist.append(resp)
-            resp.history = hist[1:]
-
-            try:
-                resp.content  # Consume socket so it can be released
-            except (ChunkedEncodingError, ContentDecodingError, RuntimeError):
-                resp.raw.read(decode_content=False)
-
-            if len(resp.history) >= self.max_redirects:
-                raise TooManyRedirects(
-                    f"Exceeded {self.max_redirects} redirects.", response=resp
-                )
-
-            # Release the connection back into the pool.
-            resp.close()
-
-            # Handle redirection without scheme (see: RFC 1808 Section 4)
-            if url.startswith("//"):
-                parsed_rurl = urlparse(resp.url)
-                url = ":".join([to_native_string(parsed_rurl.scheme), url])
-
-            # Normalize url case and attach previous fragment if needed (RFC 7231 7.1.2)
-            parsed = urlparse(url)
-            if parsed.fragment == "" and previous_fragment:
-                parsed = parsed._replace(fragment=previous_fragment)
-            elif parsed.fragment:
-                previous_fragment = parsed.fragment
-            url = parsed.geturl()
-
-            # Facilitate relative 'location' headers, as allowed by RFC 7231.
-            # (e.g. '/path/to/resource' instead of 'http://domain.tld/path/to/resource')
-            # Compliant with RFC3986, we percent encode the url.
-            if not parsed.netloc:
-                url = urljoin(resp.url, requote_uri(url))
-            else:
-                url = requote_uri(url)
-
-            prepared_request.url = to_native_string(url)
-
-            self.rebuild_method(prepared_request, resp)
-
-            # https://github.com/psf/requests/issues/1084
-            if resp.status_code not in (
-                codes.temporary_redirect,
-                codes.permanent_redirect,
-            ):
-                # https://github.com/psf/requests/issues/3490
-                purged_headers = ("Content-Length", "Content-Type", "Transfer-Encoding")
-                for header in purged_headers:
-                    prepared_request.headers.pop(header, None)
-                prepared_request.body = None
-
-            headers = prepared_request.headers
-            headers.pop("Cookie", None)
-
-            # Extract any cookies sent on the response to the cookiejar
-            # in the new request. Because we've mutated our copied prepared
-            # request, use the old one that we haven't yet touched.
-            extract_cookies_to_jar(prepared_request._cookies, req, resp.raw)
-            merge_cookies(prepared_request._cookies, self.cookies)
-            prepared_request.prepare_cookies(prepared_request._cookies)
-
-            # Rebuild auth and proxy information.
-            proxies = self.rebuild_proxies(prepared_request, proxies)
-            self.rebuild_auth(prepared_request, resp)
-
-            # A failed tell() sets `_body_position` to `object()`. This non-None
-            # value ensures `rewindable` will be True, allowing us to raise an
-            # UnrewindableBodyError, instead of hanging the connection.
-            rewindable = prepared_request._body_position is not None and (
-                "Content-Length" in headers or "Transfer-Encoding" in headers
+            prepared_request, proxies, previous_fragment = self._prepare_redirect(
+                resp, req, url, hist, previous_fragment, proxies
             )
 
-            # Attempt to rewind consumed file-like object.
-            if rewindable:
-                rewind_body(prepared_request)
-
             # Override the original request.
             req = prepared_request
 
@@ -279,6 +233,96 @@ class SessionRedirectMixin:
                 url = self.get_redirect_target(resp)
                 yield resp
 
+    def _prepare_redirect(self, resp, req, url, hist, previous_fragment, proxies):
+        """Builds the request following the redirect of resp to url, for
+        :meth:`resolve_redirects`. Returns the new request, and the proxies
+        and URL fragment to use for the next redirect.
+
+        :rtype: tuple
+        """
+        prepared_request = req.copy()
+
+        # Update history and keep track of redirects.
+        # resp.history must ignore the original request in this loop
+        hist.append(resp)
+        resp.history = hist[1:]
+
+        try:
+            resp.content  # Consume socket so it can be released
+        except (ChunkedEncodingError, ContentDecodingError, RuntimeError):
+            resp.raw.read(decode_content=False)
+
+        if len(resp.history) >= self.max_redirects:
+            raise TooManyRedirects(
+                f"Exceeded {self.max_redirects} redirects.", response=resp
+            )
+
+        # Release the connection back into the pool.
+        resp.close()
+
+        # Handle redirection without scheme (see: RFC 1808 Section 4)
+        if url.startswith("//"):
+            parsed_rurl = urlparse(resp.url)
+            url = ":".join([to_native_string(parsed_rurl.scheme), url])
+
+        # Normalize url case and attach previous fragment if needed (RFC 7231 7.1.2)
+        parsed = urlparse(url)
+        if parsed.fragment == "" and previous_fragment:
+            parsed = parsed._replace(fragment=previous_fragment)
+        elif parsed.fragment:
+            previous_fragment = parsed.fragment
+        url = parsed.geturl()
+
+        # Facilitate relative 'location' headers, as allowed by RFC 7231.
+        # (e.g. '/path/to/resource' instead of 'http://domain.tld/path/to/resource')
+        # Compliant with RFC3986, we percent encode the url.
+        if not parsed.netloc:
+            url = urljoin(resp.url, requote_uri(url))
+        else:
+            url = requote_uri(url)
+
+        prepared_request.url = to_native_string(url)
+
+        self.rebuild_method(prepared_request, resp)
+
+        # https://github.com/psf/requests/issues/1084
+        if resp.status_code not in (
+            codes.temporary_redirect,
+            codes.permanent_redirect,
+        ):
+            # https://github.com/psf/requests/issues/3490
+            purged_headers = ("Content-Length", "Content-Type", "Transfer-Encoding")
+            for header in purged_headers:
+                prepared_request.headers.pop(header, None)
+            prepared_request.body = None
+
+        headers = prepared_request.headers
+        headers.pop("Cookie", None)
+
+        # Extract any cookies sent on the response to the cookiejar
+        # in the new request. Because we've mutated our copied prepared
+        # request, use the old one that we haven't yet touched.
+        extract_cookies_to_jar(prepared_request._cookies, req, resp.raw)
+        merge_cookies(prepared_request._cookies, self.cookies)
+        prepared_request.prepare_cookies(prepared_request._cookies)
+
+        # Rebuild auth and proxy information.
+        proxies = self.rebuild_proxies(prepared_request, proxies)
+        self.rebuild_auth(prepared_request, resp)
+
+        # A failed tell() sets `_body_position` to `object()`. This non-None
+        # value ensures `rewindable` will be True, allowing us to raise an
+        # UnrewindableBodyError, instead of hanging the connection.
+        rewindable = prepared_request._body_position is not None and (
+            "Content-Length" in headers or "Transfer-Encoding" in headers
+        )
+
+        # Attempt to rewind consumed file-like object.
+        if rewindable:
+            rewind_body(prepared_request)
+
+        return prepared_request, proxies, previous_fragment
+
     def rebuild_auth(self, prepared_request, response):
         """When being redirected we may want to strip authentication from the
         request to avoid leaking credentials. This method intelligently removes
@@ -353,6 +397,40 @@ class SessionRedirectMixin:
         prepared_request.method = method
 
 
+class MapResult:
+    """The outcome of one of the requests sent by :meth:`Session.map`."""
+
+    __slots__ = ("index", "request", "response", "exception", "elapsed")
+
+    def __init__(self, index, request, response=None, exception=None, elapsed=None):
+        #: Position of the request in the iterable given to ``map``.
+        self.index = index
+
+        #: The :class:`Request <Request>` or :class:`PreparedRequest
+        #: <PreparedRequest>` given to ``map``.
+        self.request = request
+
+        #: The :class:`Response <Response>`, or ``None`` if an exception
+        #: was raised.
+        self.response = response
+
+        #: The exception raised while preparing or sending the request, if
+        #: any.
+        self.exception = exception
+
+        #: The amount of time elapsed between the request being picked up by
+        #: a worker and the response being complete (as a timedelta). Unlike
+        #: :attr:`Response.elapsed`, this includes preparing the request,
+        #: following redirects and, unless ``stream=True``, downloading the
+        #: content.
+        self.elapsed = elapsed if elapsed is not None else timedelta(0)
+
+    def __repr__(self):
+        if self.exception is not None:
+            return f"<MapResult [{self.index}] {self.exception!r}>"
+        return f"<MapResult [{self.index}] {self.response!r}>"
+
+
 class Session(SessionRedirectMixin):
     """A Requests session.
 
@@ -747,6 +825,149 @@ class Session(SessionRedirectMixin):
 
         return r
 
+    def map(self, requests, max_workers=None, per_host_limit=None, **kwargs):
+        r"""Sends many requests concurrently over this session's connection
+        pools. Returns an iterator of :class:`MapResult`, yielded as the
+        requests complete, which is not necessarily in order.
+
+        The requests are sent by a pool of ``max_workers`` threads, with at
+        most ``per_host_limit`` of them to the same scheme and host at once.
+        They are taken from ``requests`` as workers become free, so it may
+        be a generator. An exception raised for a request is stored in its
+        result instead of being raised, and the other requests carry on.
+
+        Cookies set by the responses are stored in :attr:`cookies` as
+        usual; requests prepared afterwards include them. Response hooks are
+        called by the worker threads, one at a time.
+
+        Usage::
+
+          >>> reqs = (requests.Request('GET', url) for url in urls)
+          >>> with requests.Session() as s:
+          ...     for result in s.map(reqs, max_workers=8, timeout=5):
+          ...         print(result.request.url, result.elapsed, result.response)
+
+        :param requests: iterable of :class:`Request` objects, which are
+            prepared with this session's settings as :meth:`request` does,
+            or :class:`PreparedRequest` objects, which are sent as
+            :meth:`send` does.
+        :param max_workers: (optional) number of requests sent at once,
+            defaults to 10.
+        :param per_host_limit: (optional) number of requests sent to the same
+            host at once. Defaults to the ``pool_maxsize`` of the adapter
+            mounted for the host, so that connections are not discarded
+            after use for lack of room in the pool.
+        :param \*\*kwargs: Optional arguments that ``send`` takes, such as
+            ``timeout`` or ``allow_redirects``.
+        :rtype: iterator of :class:`MapResult`
+        """
+        if max_workers is None:
+            max_workers = DEFAULT_POOLSIZE
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if per_host_limit is not None and per_host_limit < 1:
+            raise ValueError("per_host_limit must be at least 1")
+        return self._map(iter(requests), max_workers, per_host_limit, kwargs)
+
+    def _map(self, requests, max_workers, per_host_limit, kwargs):
+        hook_lock = threading.RLock()
+        running = {}
+        active = {}
+        limits = {}
+        # Requests read while their host was at its limit, by host
+        waiting = OrderedDict()
+        waiting_count = 0
+        count = 0
+
+        def host_limit(host, url):
+            if host not in limits:
+                limit = per_host_limit
+                if limit is None:
+                    try:
+                        adapter = self.get_adapter(url=url)
+                    except InvalidSchema:
+                        adapter = None
+                    limit = getattr(adapter, "_pool_maxsize", None) or max_workers
+                limits[host] = limit
+            return limits[host]
+
+        with ThreadPoolExecutor(max_workers, thread_name_prefix="requests-map") as executor:
+
+            def submit(host, index, request):
+                future = executor.submit(
+                    self._map_send, index, request, kwargs, hook_lock
+                )
+                running[future] = host
+                active[host] = active.get(host, 0) + 1
+
+            while True:
+                for host in list(waiting):
+                    pending = waiting[host]
+                    while (
+                        pending
+                        and len(running) < max_workers
+                        and active.get(host, 0) < limits[host]
+                    ):
+                        submit(host, *pending.popleft())
+                        waiting_count -= 1
+                    if not pending:
+                        del waiting[host]
+
+                # Read no more requests than can be started soon, so that
+                # a large or endless iterable isn't consumed at once.
+                while len(running) < max_workers and waiting_count < max_workers:
+                    try:
+                        request = next(requests)
+                    except StopIteration:
+                        break
+                    url = getattr(request, "url", None)
+                    host = _host_key(url)
+                    if active.get(host, 0) < host_limit(host, url):
+                        submit(host, count, request)
+                    else:
+                        waiting.setdefault(host, deque()).append((count, request))
+                        waiting_count += 1
+                    count += 1
+
+                if not running:
+                    return
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    active[running.pop(future)] -= 1
+                    yield future.result()
+
+    def _map_send(self, index, request, kwargs, hook_lock):
+        """Prepares and sends one of the requests of :meth:`map`.
+
+        :rtype: MapResult
+        """
+        result = MapResult(index, request)
+        start = preferred_clock()
+        try:
+            if isinstance(request, Request):
+                prep = self.prepare_request(request)
+                send_kwargs = dict(kwargs)
+                send_kwargs.update(
+                    self.merge_environment_settings(
+                        prep.url,
+                        dict(kwargs.get("proxies") or {}),
+                        kwargs.get("stream"),
+                        kwargs.get("verify"),
+                        kwargs.get("cert"),
+                    )
+                )
+            else:
+                # Don't wrap the hooks of the caller's object
+                prep = request.copy()
+                send_kwargs = kwargs
+            prep.hooks = _serialize_hooks(prep.hooks, hook_lock)
+            result.response = self.send(prep, **send_kwargs)
+        except Exception as e:
+            result.exception = e
+        result.elapsed = timedelta(seconds=preferred_clock() - start)
+        return result
+
     def merge_environment_settings(self, url, proxies, stream, verify, cert):
         """
         Check the environment and merge it with some settings.
@@ -258,23 +258,28 @@ class BytesQueueBuffer:
 
     This buffer should be filled using calls to put()
 
+    Chunks are never split: the buffer keeps the offset of the data not yet returned
+    in the first chunk, so data is copied only once, into the bytes returned by get()
+    and get_all() or into the buffer passed to get_into(). A chunk returned as a whole
+    is not copied at all.
+
     Our maximum memory usage is determined by the sum of the size of:
 
      * self.buffer, which contains the full data
-     * the largest chunk that we will copy in get()
-
-    The worst case scenario is a single chunk, in which case we'll make a full copy of
-    the data inside get().
+     * the amount of data returned by get()
     """
 
     def __init__(self) -> None:
         self.buffer: typing.Deque[bytes] = collections.deque()
         self._size: int = 0
+        # Number of bytes of self.buffer[0] already returned
+        self._offset: int = 0
 
     def __len__(self) -> int:
         return self._size
 
     def put(self, data: bytes) -> None:
+        # Empty chunks are kept too: get() raises only once no chunk is left
         self.buffer.append(data)
         self._size += len(data)
 
@@ -286,42 +291,59 @@ class BytesQueueBuffer:
         elif n < 0:
             raise ValueError("n should be > 0")
 
-        fetched = 0
-        ret = io.BytesIO()
-        while fetched < n:
-            remaining = n - fetched
-            chunk = self.buffer.popleft()
-            chunk_length = len(chunk)
-            if remaining < chunk_length:
-                left_chunk, right_chunk = chunk[:remaining], chunk[remaining:]
-                ret.write(left_chunk)
-                self.buffer.appendleft(right_chunk)
-                self._size -= remaining
-                break
-            else:
-                ret.write(chunk)
-                self._size -= chunk_length
-            fetched += chunk_length
-
-            if not self.buffer:
+        buffer = self.buffer
+        parts: list[bytes | memoryview] = []
+        while n > 0 and buffer:
+            chunk = buffer[0]
+            available = len(chunk) - self._offset
+            if n < available:
+                parts.append(memoryview(chunk)[self._offset : self._offset + n])
+                self._offset += n
+                self._size -= n
                 break
+            parts.append(memoryview(chunk)[self._offset :] if self._offset else chunk)
+            buffer.popleft()
+            self._offset = 0
+            self._size -= available
+            n -= available
 
-        return ret.getvalue()
+        # A single whole chunk is returned by join() as is
+        return b"".join(parts)
 
     def get_all(self) -> bytes:
         buffer = self.buffer
         if not buffer:
             assert self._size == 0
             return b""
-        if len(buffer) == 1:
+        if len(buffer) == 1 and self._offset == 0:
             result = buffer.pop()
         else:
-            ret = io.BytesIO()
-            ret.writelines(buffer.popleft() for _ in range(len(buffer)))
-            result = ret.getvalue()
+            head = memoryview(buffer.popleft())[self._offset :]
+            result = b"".join([head, *buffer])
+            buffer.clear()
         self._size = 0
+        self._offset = 0
         return result
 
+    def get_into(self, b: memoryview) -> int:
+        """Move up to ``len(b)`` bytes into ``b``, returning the number of bytes
+        moved."""
+        buffer = self.buffer
+        written = 0
+        while written < len(b) and buffer:
+            chunk = buffer[0]
+            count = min(len(b) - written, len(chunk) - self._offset)
+            b[written : written + count] = memoryview(chunk)[
+                self._offset : self._offset + count
+            ]
+            written += count
+            self._offset += count
+            if self._offset == len(chunk):
+                buffer.popleft()
+                self._offset = 0
+        self._size -= written
+        return written
+
 
 class BaseHTTPResponse(io.IOBase):
     CONTENT_DECODERS = ["gzip", "x-gzip", "deflate"]
@@ -902,41 +924,71 @@ class HTTPResponse(BaseHTTPResponse):
 
         with self._error_catcher():
             data = self._fp_read(amt, read1=read1) if not fp_closed else b""
-            if amt is not None and amt != 0 and not data:
-                # Platform-specific: Buggy versions of Python.
-                # Close the connection when no data is returned
-                #
-                # This is redundant to what httplib/http.client _should_
-                # already do.  However, versions of python released before
-                # December 15, 2012 (http://bugs.python.org/issue16298) do
-                # not properly close the connection in all cases. There is
-                # no harm in redundantly calling close.
-                self._fp.close()
-                if (
-                    self.enforce_content_length
-                    and self.length_remaining is not None
-                    and self.length_remaining != 0
-                ):
-                    # This is an edge case that httplib failed to cover due
-                    # to concerns of backward compatibility. We're
-                    # addressing it here to make sure IncompleteRead is
-                    # raised during streaming, so all calls with incorrect
-                    # Content-Length are caught.
-                    raise IncompleteRead(self._fp_bytes_read, self.length_remaining)
-            elif read1 and (
-                (amt != 0 and not data) or self.length_remaining == len(data)
+            self._check_raw_read(amt, len(data), read1=read1)
+        return data
+
+    def _raw_readinto(self, b: memoryview, *, read1: bool = False) -> int:
+        """
+        Reads up to `len(b)` bytes from the socket straight into `b`.
+        """
+        if self._fp is None:
+            return 0
+
+        amt = len(b)
+        if amt > 2**31 - 1 and (util.IS_PYOPENSSL or sys.version_info < (3, 10)):
+            # See _fp_read()
+            b = b[: 2**31 - 1]
+        fp_closed = getattr(self._fp, "closed", False)
+
+        with self._error_catcher():
+            if fp_closed:
+                size = 0
+            elif hasattr(self._fp, "readinto1" if read1 else "readinto"):
+                size = (self._fp.readinto1 if read1 else self._fp.readinto)(b)
+            else:
+                data = self._fp_read(len(b), read1=read1)
+                size = len(data)
+                b[:size] = data
+            self._check_raw_read(amt, size, read1=read1)
+        return size
+
+    def _check_raw_read(self, amt: int | None, size: int, *, read1: bool) -> None:
+        """
+        Updates the counters after reading `size` bytes of the `amt` requested,
+        and closes the connection once all the data has been read.
+        """
+        if amt is not None and amt != 0 and not size:
+            # Platform-specific: Buggy versions of Python.
+            # Close the connection when no data is returned
+            #
+            # This is redundant to what httplib/http.client _should_
+            # already do.  However, versions of python released before
+            # December 15, 2012 (http://bugs.python.org/issue16298) do
+            # not properly close the connection in all cases. There is
+            # no harm in redundantly calling close.
+            self._fp.close()
+            if (
+                self.enforce_content_length
+                and self.length_remaining is not None
+                and self.length_remaining != 0
             ):
-                # All data has been read, but `self._fp.read1` in
-                # CPython 3.12 and older doesn't always close
-                # `http.client.HTTPResponse`, so we close it here.
-                # See https://github.com/python/cpython/issues/113199
-                self._fp.close()
-
-        if data:
-            self._fp_bytes_read += len(data)
+                # This is an edge case that httplib failed to cover due
+                # to concerns of backward compatibility. We're
+                # addressing it here to make sure IncompleteRead is
+                # raised during streaming, so all calls with incorrect
+                # Content-Length are caught.
+                raise IncompleteRead(self._fp_bytes_read, self.length_remaining)
+        elif read1 and ((amt != 0 and not size) or self.length_remaining == size):
+            # All data has been read, but `self._fp.read1` in
+            # CPython 3.12 and older doesn't always close
+            # `http.client.HTTPResponse`, so we close it here.
+            # See https://github.com/python/cpython/issues/113199
+            self._fp.close()
+
+        if size:
+            self._fp_bytes_read += size
             if self.length_remaining is not None:
-                self.length_remaining -= len(data)
-        return data
+                self.length_remaining -= size
 
     def read(
         self,
@@ -1066,6 +1118,49 @@ class HTTPResponse(BaseHTTPResponse):
             return self._decoded_buffer.get_all()
         return self._decoded_buffer.get(amt)
 
+    def readinto(self, b: bytearray) -> int:
+        """
+        Similar to :meth:`io.BufferedIOBase.readinto`: reads up to ``len(b)``
+        bytes of the content into ``b``, and returns the number of bytes read.
+
+        The content is decoded according to ``decode_content``. Content that
+        doesn't need decoding is read from the socket straight into ``b``,
+        decoded content is copied into it once.
+        """
+        return self._readinto(b, read1=False)
+
+    def readinto1(self, b: bytearray) -> int:
+        """
+        Similar to :meth:`io.BufferedIOBase.readinto1`: like :meth:`readinto`,
+        but reads from the socket at most once, unless no decoded content is
+        available yet.
+        """
+        return self._readinto(b, read1=True)
+
+    def _readinto(self, b: bytearray, *, read1: bool) -> int:
+        with memoryview(b) as view, view.cast("B") as buffer:
+            # try and respond without going to the network
+            written = self._decoded_buffer.get_into(buffer)
+            if written == len(buffer) or (read1 and written):
+                return written
+
+            self._init_decoder()
+            if self._decoder is None or not self.decode_content:
+                if not self.decode_content and self._has_decoded_content:
+                    raise RuntimeError(
+                        "Calling readinto() with decode_content=False is not "
+                        "supported after read(decode_content=True) was called."
+                    )
+                return written + self._raw_readinto(buffer[written:], read1=read1)
+
+            while True:
+                data = self._raw_read(len(buffer) - written, read1=read1) or b""
+                decoded_data = self._decode(data, True, flush_decoder=not data)
+                self._decoded_buffer.put(decoded_data)
+                written += self._decoded_buffer.get_into(buffer[written:])
+                if not data or written == len(buffer) or (read1 and written):
+                    return written
+
     def stream(
         self, amt: int | None = 2**16, decode_content: bool | None = None
     ) -> typing.Generator[bytes]:
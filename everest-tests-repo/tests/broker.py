@@ -0,0 +1,166 @@
+"""A minimal MQTT 3.1.1 broker for tests: it acknowledges connections,
+publications and subscriptions, and records what it receives. Also helpers
+to encode packets and to drive a client over a socket pair."""
+import socket
+import struct
+import threading
+
+import paho.mqtt.client as mqtt
+from paho.mqtt.enums import CallbackAPIVersion
+
+
+def read_packet(sock):
+    """Return (command, body) of the next packet, or None on EOF."""
+    head = sock.recv(1)
+    if not head:
+        return None
+    length = 0
+    multiplier = 1
+    while True:
+        byte = sock.recv(1)[0]
+        length += (byte & 0x7F) * multiplier
+        multiplier *= 128
+        if not byte & 0x80:
+            break
+    body = b""
+    while len(body) < length:
+        chunk = sock.recv(length - len(body))
+        if not chunk:
+            return None
+        body += chunk
+    return head[0], body
+
+
+def encode_length(length):
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        out.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(out)
+
+
+def packet(command, body):
+    return bytes([command]) + encode_length(len(body)) + body
+
+
+def publish_packet(topic, payload, qos=0, mid=1, retain=False):
+    body = struct.pack("!H", len(topic)) + topic.encode()
+    if qos:
+        body += struct.pack("!H", mid)
+    return packet(0x30 | qos << 1 | retain, body + payload)
+
+
+class Broker:
+    """Serves one connection at a time on a local port.
+
+    :param connack: send CONNACK in reply to CONNECT.
+    """
+
+    def __init__(self, connack=True):
+        self.connack = connack
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.port = self.server.getsockname()[1]
+        self.published = []
+        self.connections = []
+        self.received = threading.Condition()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections.append(conn)
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    pkt = read_packet(conn)
+                except OSError:
+                    return
+                if pkt is None:
+                    return
+                command, body = pkt
+                kind = command & 0xF0
+                if kind == 0x10 and self.connack:
+                    conn.sendall(packet(0x20, b"\x00\x00"))
+                elif kind == 0x30:
+                    qos = (command >> 1) & 3
+                    topic_len = struct.unpack("!H", body[:2])[0]
+                    topic = body[2:2 + topic_len].decode()
+                    pos = 2 + topic_len
+                    if qos:
+                        mid = body[pos:pos + 2]
+                        pos += 2
+                        conn.sendall(packet(0x40 if qos == 1 else 0x50, mid))
+                    with self.received:
+                        self.published.append((topic, body[pos:], qos))
+                        self.received.notify_all()
+                elif kind == 0x62:
+                    conn.sendall(packet(0x70, body[:2]))
+                elif kind == 0x80:
+                    count = len(self.subscribe_qos(body))
+                    conn.sendall(packet(0x90, body[:2] + b"\x00" * count))
+                elif kind == 0xC0:
+                    conn.sendall(packet(0xD0, b""))
+                elif kind == 0xE0:
+                    return
+
+    def wait_published(self, count, timeout=5.0):
+        with self.received:
+            self.received.wait_for(lambda: len(self.published) >= count, timeout)
+        return self.published
+
+    @staticmethod
+    def subscribe_qos(body):
+        pos = 2
+        qos = []
+        while pos < len(body):
+            length = struct.unpack("!H", body[pos:pos + 2])[0]
+            pos += 2 + length
+            qos.append(body[pos])
+            pos += 1
+        return qos
+
+    def close(self):
+        self.server.close()
+        for conn in self.connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def make_connected(**kwargs):
+    """A client whose socket is one end of a socket pair, as if connected.
+    Return the client, its socket and the other end. kwargs are passed to
+    the client."""
+    client = mqtt.Client(CallbackAPIVersion.VERSION2, **kwargs)
+    sock, broker = socket.socketpair()
+    sock.setblocking(False)
+    client._sock = sock
+    client._state = mqtt._ConnectionState.MQTT_CS_CONNECTED
+    return client, sock, broker
+
+
+def received_messages(client):
+    """Return the list to which the messages received by client are added."""
+    messages = []
+    client.on_message = lambda client, userdata, message: messages.append(message)
+    return messages
+
+
+def read_all(client, broker, data, sizes):
+    """Send data in parts of the given sizes, reading after each one."""
+    pos = 0
+    for size in sizes:
+        broker.sendall(data[pos:pos + size])
+        pos += size
+        client.loop_read()
+    assert pos == len(data)
@@ -0,0 +1,58 @@
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# The libraries under test are those installed in the everest-test virtualenv
+SITE_PACKAGES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "everest-test", "lib", "python3.12", "site-packages",
+)
+if SITE_PACKAGES not in sys.path:
+    sys.path.insert(0, SITE_PACKAGES)
+
+
+@pytest.fixture
+def connected():
+    """A client connected to a socket pair, and the broker end of the pair."""
+    from broker import make_connected
+
+    client, sock, broker = make_connected()
+    broker.settimeout(5)
+    yield client, broker
+    if client.dispatcher is not None:
+        client.dispatcher.close()
+    sock.close()
+    broker.close()
+
+
+@pytest.fixture
+def broker():
+    """A `broker.Broker` listening on a local port."""
+    from broker import Broker
+
+    broker = Broker()
+    yield broker
+    broker.close()
+
+
+@pytest.fixture
+def http_server():
+    """Return a function starting a local HTTP server with the given request
+    handler class, and returning its URL. The servers are stopped after the
+    test."""
+    servers = []
+
+    def start(handler):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return "http://127.0.0.1:%d" % server.server_address[1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,110 @@
+import random
+import threading
+
+import pytest
+
+from paho.mqtt.aggregate import Aggregator, Series, WindowStats
+
+from broker import make_connected, publish_packet
+
+
+def window_stats(samples, now, window):
+    values = [(t, v) for t, v in samples if t > now - window]
+    if not values:
+        return WindowStats(0, None, None, None, None)
+    (first_time, first), (last_time, last) = values[0], values[-1]
+    rate = (last - first) / (last_time - first_time) if last_time > first_time else None
+    vs = [v for _, v in values]
+    return WindowStats(len(vs), min(vs), max(vs), sum(vs) / len(vs), rate)
+
+
+def test_series_sliding_window():
+    rng = random.Random(1)
+    series = Series(window=5.0)
+    samples = []
+    now = 0.0
+    for _ in range(2000):
+        now += rng.random()
+        value = rng.uniform(-100, 100)
+        series.add(now, value)
+        samples.append((now, value))
+        stats = series.stats(now)
+        expected = window_stats(samples, now, 5.0)
+        assert stats[:3] == expected[:3]
+        assert stats.mean == pytest.approx(expected.mean)
+        assert stats.rate == pytest.approx(expected.rate)
+    assert series.stats(now + 5.0) == WindowStats(0, None, None, None, None)
+    assert series.last == value
+
+
+def test_series_capacity():
+    series = Series(window=100.0, capacity=3)
+    for i in range(10):
+        series.add(float(i), float(i))
+    assert len(series) == 3
+    assert series.stats(10.0) == WindowStats(3, 7.0, 9.0, 8.0, 1.0)
+
+
+def test_series_tumbling_windows():
+    series = Series(window=100.0, tumbling=10.0, history=2)
+    for t, v in [(1.0, 5.0), (9.0, 1.0), (12.0, 2.0), (25.0, 3.0), (31.0, 4.0), (35.0, 6.0)]:
+        series.add(t, v)
+    assert series.windows() == [
+        (10.0, WindowStats(1, 2.0, 2.0, 2.0, None)),
+        (20.0, WindowStats(1, 3.0, 3.0, 3.0, None)),
+    ]
+    assert series.current_window() == (30.0, WindowStats(2, 4.0, 6.0, 5.0, 0.5))
+
+
+def test_series_triggers():
+    series = Series(window=10.0)
+    series.add(1.0, 0.0)
+    series.add_trigger("on", lambda value: value > 0)
+    series.add(2.0, 0.0)
+    assert series.triggered("on") is None
+    series.add(3.0, 5.0)
+    series.add(4.0, 0.0)
+    series.add(5.0, 2.0)
+    assert series.triggered("on") == 3.0
+    assert series.last_triggered("on") == 5.0
+
+
+def test_aggregator_attach():
+    client, sock, broker = make_connected()
+    agg = Aggregator(window=10.0)
+    agg.attach(client, "power/+", field="power_W.total")
+    broker.sendall(
+        publish_packet("power/evse", b'{"power_W": {"total": 10}}')
+        + publish_packet("power/evse", b'{"power_W": {"total": 20.5}}')
+        + publish_packet("power/car", b'{"power_W": {}}')
+        + publish_packet("power/car", b"not json"))
+    client.loop_read()
+    sock.close()
+    broker.close()
+
+    stats = agg.series("power/evse", "power_W.total").stats()
+    assert (stats.count, stats.min, stats.max) == (2, 10.0, 20.5)
+    assert agg.errors == 2
+    assert agg.topics() == [("power/evse", "power_W.total")]
+    assert agg.stats("power/car", "power_W.total").count == 0
+
+
+class Message:
+    timestamp = 0.0
+    topic = "t"
+    payload = b"x"
+
+
+def test_aggregator_errors_threads():
+    agg = Aggregator()
+
+    def receive():
+        for _ in range(10000):
+            agg.on_message(Message())
+
+    threads = [threading.Thread(target=receive) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert agg.errors == 40000
@@ -0,0 +1,67 @@
+import asyncio
+
+from paho.mqtt.async_client import AsyncClient
+
+from broker import publish_packet
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 10))
+
+
+def test_publish_subscribe_and_messages(broker):
+    async def main():
+        async with AsyncClient() as client:
+            reason_code = await client.connect("127.0.0.1", broker.port)
+            assert not reason_code.is_failure
+            reason_codes = await client.subscribe("a/#", qos=1)
+            assert [rc.value for rc in reason_codes] == [0]
+
+            info = await client.publish("a/b", b"1", qos=1)
+            assert info.is_published()
+            await client.publish("a/c", b"0")
+
+            broker.connections[-1].sendall(publish_packet("a/x", b"hello") + publish_packet("a/y", b"world"))
+            received = []
+            async for message in client.messages():
+                received.append((message.topic, message.payload))
+                if len(received) == 2:
+                    break
+
+            await client.disconnect()
+            # The iteration ends once disconnected
+            assert [message async for message in client.messages()] == []
+        return received
+
+    assert run(main()) == [("a/x", b"hello"), ("a/y", b"world")]
+    assert broker.wait_published(2) == [("a/b", b"1", 1), ("a/c", b"0", 0)]
+
+
+def test_queue_size_drops_messages(broker):
+    async def main():
+        async with AsyncClient(queue_size=2) as client:
+            await client.connect("127.0.0.1", broker.port)
+            broker.connections[-1].sendall(b"".join(publish_packet("t", b"%d" % i) for i in range(5)))
+            # Wait for the messages to be read
+            while client.dropped_messages + client._messages.qsize() < 5:
+                await asyncio.sleep(0.01)
+            return client.dropped_messages, [(await client._messages.get()).payload for _ in range(2)]
+
+    assert run(main()) == (3, [b"0", b"1"])
+
+
+def test_connection_lost_fails_pending(broker):
+    async def main():
+        client = AsyncClient()
+        await client.connect("127.0.0.1", broker.port)
+        # The broker acknowledges QoS 1 messages, stop it first
+        broker.close()
+        try:
+            await client.publish("t", b"x", qos=1)
+        except ConnectionError:
+            return True
+        finally:
+            client._stop_misc()
+        return False
+
+    assert run(main())
@@ -0,0 +1,178 @@
+import copy
+import logging
+import pickle
+
+import pytest
+
+import paho.mqtt.client as mqtt
+
+from broker import packet, publish_packet, read_all, received_messages
+
+
+def test_packet_write_marks_published_when_on_publish_raises(connected):
+    client, broker = connected
+    calls = []
+
+    def on_publish(client, userdata, mid, reason_code, properties):
+        calls.append(mid)
+        raise RuntimeError("callback failed")
+
+    client.on_publish = on_publish
+    # Queue both messages without writing them yet
+    with client._in_callback_mutex:
+        first = client.publish("a", b"1")
+        second = client.publish("b", b"2")
+
+    with pytest.raises(RuntimeError):
+        client.loop_write()
+
+    assert calls == [first.mid]
+    assert first.is_published()
+    assert second.is_published()
+    assert broker.recv(100) == b"\x30\x04\x00\x01a1\x30\x04\x00\x01b2"
+
+
+def test_packet_write_sends_disconnect_alone(connected):
+    client, broker = connected
+    events = []
+    client.on_publish = lambda client, userdata, mid, reason_code, properties: events.append(mid)
+    client.on_disconnect = lambda client, userdata, flags, reason_code, properties: events.append("disconnect")
+    with client._in_callback_mutex:
+        first = client.publish("a", b"1")
+        client.disconnect()
+        late = client.publish("b", b"2")
+
+    client.loop_write()
+    # The callbacks of the messages sent before DISCONNECT run before the
+    # socket is closed, nothing is sent after it
+    assert events == [first.mid, "disconnect"]
+    assert broker.recv(100) == b"\x30\x04\x00\x01a1\xe0\x00"
+    assert not late.is_published()
+
+
+STREAM = [
+    ("a", b"1"),
+    ("topic/b", b"x" * 200),
+    ("c", b""),
+    ("big", bytes(range(256)) * 600),
+]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 200, 65536])
+def test_packet_read_partial(connected, size):
+    client, broker = connected
+    messages = received_messages(client)
+    data = b"".join(publish_packet(topic, payload) for topic, payload in STREAM)
+    # A PINGRESP between the messages
+    data += packet(0xD0, b"") + publish_packet("end", b"!")
+    read_all(client, broker, data, [size] * (len(data) // size) + [len(data) % size])
+
+    # Messages received earlier are not changed by the following reads
+    assert [(message.topic, message.payload) for message in messages] == STREAM + [("end", b"!")]
+    assert client._in_buffer == b""
+
+
+def test_packet_read_split_header(connected):
+    client, broker = connected
+    messages = received_messages(client)
+    data = publish_packet("t", b"y" * 300) * 2
+    # In the remaining length, then in the topic of the second message
+    read_all(client, broker, data, [2, len(data) // 2 - 2 + 4, len(data) // 2 - 4])
+    assert [message.payload for message in messages] == [b"y" * 300] * 2
+
+
+def test_packet_read_malformed_length(connected):
+    client, broker = connected
+    broker.sendall(b"\x30\xff\xff\xff\xff\x01")
+    assert client._packet_read() == mqtt.MQTTErrorCode.MQTT_ERR_PROTOCOL
+
+
+def test_received_message_copy_and_pickle(connected):
+    client, broker = connected
+    messages = received_messages(client)
+    broker.sendall(publish_packet("a/b", b"payload", qos=1, mid=3))
+    client.loop_read()
+    (message,) = messages
+
+    for other in (pickle.loads(pickle.dumps(message)), copy.deepcopy(message), copy.copy(message)):
+        assert (other.topic, other.payload, other.mid, other.qos) == ("a/b", b"payload", 3, 1)
+        assert not other.info.is_published()
+    assert message.payload == b"payload"
+
+
+def test_received_message_releases_receive_buffer(connected):
+    client, broker = connected
+    messages = received_messages(client)
+    broker.sendall(publish_packet("a/b", b"payload"))
+    client.loop_read()
+    (message,) = messages
+
+    # Only the payload refers to the receive buffer, until it is read
+    assert type(message._topic) is bytes
+    assert isinstance(message._payload, memoryview)
+    assert message.payload == b"payload"
+    assert type(message._payload) is bytes
+
+
+@pytest.mark.parametrize("logger_first", [False, True])
+def test_received_publish_logged(connected, caplog, logger_first):
+    client, broker = connected
+    logs = []
+    logger = logging.getLogger("test_paho_client")
+    if logger_first:
+        client.enable_logger(logger)
+    client.on_log = lambda client, userdata, level, buf: logs.append(buf)
+    if not logger_first:
+        client.enable_logger(logger)
+
+    with caplog.at_level(logging.DEBUG, logger="test_paho_client"):
+        broker.sendall(publish_packet("a/b", b"payload"))
+        client.loop_read()
+    expected = "Received PUBLISH (d0, q0, r0, m0), 'a/b', ...  (7 bytes)"
+    assert expected in logs
+    assert expected in caplog.messages
+
+    # Only the logger
+    client.on_log = None
+    caplog.clear()
+    with caplog.at_level(logging.DEBUG, logger="test_paho_client"):
+        broker.sendall(publish_packet("a/b", b"payload"))
+        client.loop_read()
+    assert expected in caplog.messages
+
+
+def test_on_message_batch(connected):
+    client, broker = connected
+    batches = []
+    filtered = []
+    client.on_message = lambda client, userdata, message: pytest.fail("on_message called")
+    client.on_message_batch = lambda client, userdata, messages: batches.append(
+        [(message.topic, message.payload) for message in messages])
+    client.message_callback_add("f/#", lambda client, userdata, message: filtered.append(message.topic))
+
+    broker.sendall(b"".join(publish_packet(topic, b"%d" % i) for i, topic in enumerate(["a", "f/x", "b", "c"])))
+    client.loop_read()
+    broker.sendall(publish_packet("d", b"4", qos=1, mid=7))
+    client.loop_read()
+
+    assert batches == [[("a", b"0"), ("b", b"2"), ("c", b"3")], [("d", b"4")]]
+    assert filtered == ["f/x"]
+    # The QoS 1 message is acknowledged
+    assert broker.recv(100) == packet(0x40, b"\x00\x07")
+
+
+def test_on_message_batch_exception(connected):
+    client, broker = connected
+
+    def on_message_batch(client, userdata, messages):
+        raise RuntimeError("callback failed")
+
+    client.on_message_batch = on_message_batch
+    broker.sendall(publish_packet("a", b"1"))
+    with pytest.raises(RuntimeError):
+        client.loop_read()
+
+    client.suppress_exceptions = True
+    broker.sendall(publish_packet("a", b"2"))
+    assert client.loop_read() == mqtt.MQTTErrorCode.MQTT_ERR_SUCCESS
+    assert client._message_batch is None
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+import paho.mqtt.client as mqtt
+from paho.mqtt.client_group import ClientGroup
+from paho.mqtt.enums import CallbackAPIVersion
+
+from broker import publish_packet
+
+
+@pytest.fixture
+def group():
+    group = ClientGroup(tick=0.1)
+    yield group
+    group.close()
+
+
+def make_client(group, broker, keepalive=60):
+    client = mqtt.Client(CallbackAPIVersion.VERSION2)
+    connected = threading.Event()
+    client.on_connect = lambda client, userdata, flags, reason_code, properties: connected.set()
+    group.add(client)
+    client.connect("127.0.0.1", broker.port, keepalive)
+    assert connected.wait(5)
+    return client
+
+
+def test_many_clients(group, broker):
+    group.loop_start()
+    clients = [make_client(group, broker) for _ in range(20)]
+    assert len(group) == 20
+
+    infos = [client.publish(f"t/{i}", b"x", qos=1) for i, client in enumerate(clients)]
+    for info in infos:
+        info.wait_for_publish(5)
+        assert info.is_published()
+    assert sorted(topic for topic, _, _ in broker.wait_published(20)) == sorted(f"t/{i}" for i in range(20))
+
+
+def test_receive(group, broker):
+    group.loop_start()
+    client = make_client(group, broker)
+    received = threading.Event()
+    messages = []
+
+    def on_message(client, userdata, message):
+        messages.append((message.topic, message.payload))
+        received.set()
+
+    client.on_message = on_message
+    broker.connections[-1].sendall(publish_packet("a", b"1"))
+    assert received.wait(5)
+    assert messages == [("a", b"1")]
+
+
+def test_keepalive(group, broker):
+    group.loop_start()
+    client = make_client(group, broker, keepalive=1)
+    connected_at = client._last_msg_in
+    # PINGREQ sent after a second of silence, and answered
+    deadline = time.monotonic() + 5
+    while client._last_msg_in == connected_at:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert client.is_connected()
+
+
+def test_remove(group, broker):
+    group.loop_start()
+    client = make_client(group, broker)
+    group.remove(client)
+    assert client not in group
+    assert client.on_socket_open is None
+    # The connection is left open, and driven by the client again
+    client.loop_start()
+    try:
+        client.publish("t", b"x", qos=1).wait_for_publish(5)
+    finally:
+        client.loop_stop()
+    assert broker.wait_published(1) == [("t", b"x", 1)]
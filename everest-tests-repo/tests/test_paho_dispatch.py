@@ -0,0 +1,126 @@
+import threading
+import time
+import zlib
+
+import pytest
+
+from paho.mqtt.client import MQTTMessage
+from paho.mqtt.dispatch import MessageDispatcher
+
+from broker import packet, publish_packet
+
+
+def read_until(client, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        client.loop_read()
+        time.sleep(0.01)
+
+
+def topics_of_worker(dispatcher, index, count):
+    topics = []
+    n = 0
+    while len(topics) < count:
+        topic = f"t/{n}"
+        if zlib.crc32(topic.encode()) % len(dispatcher._workers) == index:
+            topics.append(topic)
+        n += 1
+    return topics
+
+
+def test_ack_sent_once_callbacks_returned(connected):
+    client, broker = connected
+    release = threading.Event()
+    delivered = []
+
+    def on_message(client, userdata, message):
+        release.wait(5)
+        delivered.append(message.mid)
+
+    client.on_message = on_message
+    client.dispatcher = MessageDispatcher(workers=2)
+    broker.sendall(b"".join(publish_packet("a/b", b"x", qos=1, mid=mid) for mid in (1, 2, 3)))
+    client.loop_read()
+
+    broker.settimeout(0.2)
+    with pytest.raises(TimeoutError):
+        broker.recv(100)
+
+    release.set()
+    assert client.dispatcher.join(5)
+    broker.settimeout(5)
+    acks = b""
+    while len(acks) < 12:
+        acks += broker.recv(100)
+    # Messages of a topic are delivered and acknowledged in order
+    assert delivered == [1, 2, 3]
+    assert acks == b"".join(packet(0x40, bytes([0, mid])) for mid in (1, 2, 3))
+
+
+def test_no_ack_after_reconnection(connected):
+    client, broker = connected
+    release = threading.Event()
+    client.on_message = lambda client, userdata, message: release.wait(5)
+    client.dispatcher = MessageDispatcher(workers=1)
+    broker.sendall(publish_packet("a", b"x", qos=1, mid=7))
+    client.loop_read()
+
+    # What reconnect() does
+    client._connection_count += 1
+    release.set()
+    assert client.dispatcher.join(5)
+    client.loop_write()
+    broker.settimeout(0.2)
+    with pytest.raises(TimeoutError):
+        broker.recv(100)
+
+
+def test_paused_stalls_at_publish_only(connected):
+    client, broker = connected
+    release = threading.Event()
+    client.on_message = lambda client, userdata, message: release.wait(5)
+    subscribed = []
+    client.on_subscribe = lambda *args: subscribed.append(args[2])
+    dispatcher = MessageDispatcher(workers=1, queue_size=2)
+    client.dispatcher = dispatcher
+
+    # The first message is being delivered, two more fill the queue
+    broker.sendall(b"".join(publish_packet("a", b"x", mid=mid) for mid in (1, 2, 3)))
+    read_until(client, lambda: dispatcher.paused)
+
+    # A SUBACK is still handled while paused, the next message is held back
+    client._out_messages = {}
+    broker.sendall(packet(0x90, b"\x00\x05\x00") + publish_packet("a", b"held"))
+    client.loop_read()
+    assert subscribed == [5]
+    assert client._in_stalled
+    assert dispatcher.pending() == 2
+
+    release.set()
+    read_until(client, lambda: not client._in_stalled)
+    assert dispatcher.join(5)
+
+
+def test_loop_woken_once_all_workers_have_room(connected, monkeypatch):
+    client, broker = connected
+    release = threading.Event()
+    callbacks = [lambda client, userdata, message: release.wait(5)]
+    dispatcher = MessageDispatcher(workers=2, queue_size=2)
+    client.dispatcher = dispatcher
+    wakes = []
+    monkeypatch.setattr(client, "_wake_loop", lambda: wakes.append(dispatcher.paused))
+
+    for index in range(2):
+        (topic,) = topics_of_worker(dispatcher, index, 1)
+        for mid in range(3):
+            message = MQTTMessage(mid, topic.encode())
+            dispatcher._dispatch(client, message, callbacks)
+    assert all(worker.full for worker in dispatcher._workers)
+    assert dispatcher._full_count == 2
+    assert dispatcher.paused
+
+    release.set()
+    assert dispatcher.join(5)
+    assert not dispatcher.paused
+    assert wakes == [False]
@@ -0,0 +1,90 @@
+import struct
+
+import pytest
+
+import paho.mqtt.client as mqtt
+
+from broker import make_connected, packet, read_packet
+
+
+@pytest.fixture
+def pair():
+    client, sock, broker = make_connected()
+    client._max_inflight_messages = 2
+    broker.setblocking(False)
+    yield client, broker
+    sock.close()
+    broker.close()
+
+
+def written(broker):
+    """Return the (command, mid) of the packets written by the client."""
+    packets = []
+    while True:
+        try:
+            command, body = read_packet(broker)
+        except BlockingIOError:
+            return packets
+        if command & 0xF0 == 0x30:
+            topic_length, = struct.unpack_from("!H", body)
+            body = body[2 + topic_length:]
+        packets.append((command, struct.unpack_from("!H", body)[0]))
+
+
+def ack(client, broker, command, mid):
+    broker.sendall(packet(command, struct.pack("!H", mid)))
+    client.loop_read()
+
+
+def test_window(pair):
+    client, broker = pair
+    infos = [client.publish("t", b"x", qos=1) for _ in range(5)]
+    assert written(broker) == [(0x32, 1), (0x32, 2)]
+    assert list(client._out_inflight) == [1, 2]
+    assert [m.mid for m in client._out_queue] == [3, 4, 5]
+
+    ack(client, broker, 0x40, 1)
+    assert written(broker) == [(0x32, 3)]
+    assert infos[0].is_published()
+
+    # Acknowledgements of queued messages are ignored
+    ack(client, broker, 0x40, 5)
+    assert written(broker) == []
+    assert not infos[4].is_published()
+    assert client._inflight_messages == 2
+
+    for mid in (2, 3, 4, 5):
+        ack(client, broker, 0x40, mid)
+    assert written(broker) == [(0x32, 4), (0x32, 5)]
+    assert all(info.is_published() for info in infos)
+    assert not client._out_messages and not client._out_inflight and not client._out_queue
+    assert client._inflight_messages == 0
+
+
+def test_window_qos2(pair):
+    client, broker = pair
+    infos = [client.publish("t", b"x", qos=2) for _ in range(3)]
+    assert written(broker) == [(0x34, 1), (0x34, 2)]
+    ack(client, broker, 0x50, 1)
+    # The slot is only freed by PUBCOMP
+    assert written(broker) == [(0x62, 1)]
+    ack(client, broker, 0x70, 1)
+    assert written(broker) == [(0x34, 3)]
+    assert infos[0].is_published()
+    assert list(client._out_inflight) == [2, 3]
+
+
+def test_reconnect_reset(pair):
+    client, broker = pair
+    for _ in range(4):
+        client.publish("t", b"x", qos=1)
+    # A smaller window when reconnecting
+    client._max_inflight_messages = 1
+    client._messages_reconnect_reset_out()
+
+    assert list(client._out_inflight) == [1]
+    assert [m.mid for m in client._out_queue] == [2, 3, 4]
+    message = client._out_inflight[1]
+    assert (message.state, message.dup) == (mqtt.mqtt_ms_publish, True)
+    assert all(m.state == mqtt.mqtt_ms_queued for m in client._out_queue)
+    assert client._inflight_messages == 0
@@ -0,0 +1,90 @@
+import random
+
+from paho.mqtt.matcher import MQTTMatcher
+
+
+def reference_match(matcher, topic):
+    # The recursive walk iter_match() used before, for the expected order
+    lst = topic.split('/')
+    normal = not topic.startswith('$')
+
+    def rec(node, i=0):
+        if i == len(lst):
+            if node._content is not None:
+                yield node._content
+        else:
+            part = lst[i]
+            if part in node._children:
+                yield from rec(node._children[part], i + 1)
+            if '+' in node._children and (normal or i > 0):
+                yield from rec(node._children['+'], i + 1)
+        if '#' in node._children and (normal or i > 0):
+            content = node._children['#']._content
+            if content is not None:
+                yield content
+
+    return list(rec(matcher._root))
+
+
+def random_filter(rng):
+    levels = [rng.choice(["a", "b", "$SYS", "", "+"]) for _ in range(rng.randint(1, 4))]
+    if rng.random() < 0.3:
+        levels.append("#")
+    return "/".join(levels)
+
+
+def random_topic(rng):
+    return "/".join(rng.choice(["a", "b", "$SYS", ""]) for _ in range(rng.randint(1, 5)))
+
+
+def test_iter_match_against_recursive_walk():
+    rng = random.Random(3)
+    matcher = MQTTMatcher(cache_size=16)
+    filters = set()
+    topics = [random_topic(rng) for _ in range(50)]
+    for _ in range(300):
+        sub = random_filter(rng)
+        if sub in filters and rng.random() < 0.5:
+            del matcher[sub]
+            filters.discard(sub)
+        else:
+            matcher[sub] = sub
+            filters.add(sub)
+        # Cached results must follow the changes of the filters
+        for topic in rng.sample(topics, 10):
+            assert list(matcher.iter_match(topic)) == reference_match(matcher, topic)
+
+
+def test_exact_filters_only():
+    matcher = MQTTMatcher()
+    matcher["a/b"] = 1
+    matcher["a/c"] = 2
+    assert list(matcher.iter_match("a/b")) == [1]
+    assert list(matcher.iter_match("a/d")) == []
+    matcher["a/+"] = 3
+    assert list(matcher.iter_match("a/b")) == [1, 3]
+    del matcher["a/+"]
+    assert list(matcher.iter_match("a/b")) == [1]
+    assert matcher._wildcards == 0
+
+
+def test_dollar_topics():
+    matcher = MQTTMatcher()
+    matcher["#"] = "all"
+    matcher["+/x"] = "plus"
+    matcher["$SYS/#"] = "sys"
+    assert list(matcher.iter_match("$SYS/x")) == ["sys"]
+    assert list(matcher.iter_match("a/x")) == ["plus", "all"]
+
+
+def test_cache_size():
+    matcher = MQTTMatcher(cache_size=2)
+    matcher["#"] = 0
+    for topic in ("a", "b", "c", "a"):
+        assert list(matcher.iter_match(topic)) == [0]
+    assert list(matcher._cache) == ["c", "a"]
+
+    uncached = MQTTMatcher(cache_size=0)
+    uncached["+"] = 1
+    assert list(uncached.iter_match("a")) == [1]
+    assert not uncached._cache
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from paho.mqtt.dispatch import MessageDispatcher
+from paho.mqtt.metrics import ClientMetrics, Histogram
+
+from broker import publish_packet, received_messages
+
+
+def test_topic_counts_and_rates(connected, monkeypatch):
+    client, broker = connected
+    received_messages(client)
+    metrics = ClientMetrics(topic_filters=["a/+", "#"])
+    client.metrics = metrics
+    clock = [100.0]
+    monkeypatch.setattr("paho.mqtt.metrics.time.monotonic", lambda: clock[0])
+    metrics.reset()
+
+    broker.sendall(publish_packet("a/b", b"1") * 3 + publish_packet("c", b"2"))
+    client.loop_read()
+    clock[0] += 2.0
+    snapshot = metrics.snapshot()
+    assert snapshot["messages_in"] == 4
+    assert snapshot["topic_messages"] == {"a/+": 3, "#": 4}
+    assert snapshot["topic_rates"] == {"a/+": 1.5, "#": 2.0}
+
+    # Rates are over the time since the snapshot given, snapshots don't
+    # change the rates seen by other readers
+    broker.sendall(publish_packet("c", b"3"))
+    client.loop_read()
+    clock[0] += 4.0
+    assert metrics.snapshot(since=snapshot)["topic_rates"] == {"a/+": 0.0, "#": 0.25}
+    assert metrics.snapshot(since=snapshot)["topic_rates"] == {"a/+": 0.0, "#": 0.25}
+    assert metrics.snapshot()["topic_rates"] == {"a/+": 0.5, "#": 5 / 6}
+    assert 'paho_mqtt_topic_received_messages_total{filter="#"} 5' in metrics.prometheus()
+
+
+def test_delivery_latency_per_message(connected):
+    client, broker = connected
+    metrics = ClientMetrics()
+    client.metrics = metrics
+    release = threading.Event()
+    client.on_message = lambda client, userdata, message: release.wait(5)
+    client.dispatcher = MessageDispatcher(workers=1)
+
+    broker.sendall(publish_packet("a", b"1") + publish_packet("a", b"2"))
+    client.loop_read()
+    time.sleep(0.2)
+    # A later read doesn't change the latency of the queued messages
+    broker.sendall(publish_packet("b", b"3"))
+    client.loop_read()
+    release.set()
+    assert client.dispatcher.join(5)
+
+    latency = metrics.delivery_latency
+    assert latency.count == 3
+    assert latency.max >= 0.2
+    assert latency.min < 0.2
+    assert metrics.callback_time.count == 3
+
+
+def test_delivery_latency_without_dispatcher(connected):
+    client, broker = connected
+    metrics = ClientMetrics()
+    client.metrics = metrics
+    client.on_message = lambda client, userdata, message: time.sleep(0.05)
+    broker.sendall(publish_packet("a", b"1") * 2)
+    client.loop_read()
+    # The second message waited for the callback of the first one
+    assert metrics.delivery_latency.count == 2
+    assert metrics.delivery_latency.max >= 0.05
+
+
+def test_histogram_threads():
+    histogram = Histogram()
+
+    def record():
+        for i in range(10000):
+            histogram.record(i * 1e-6)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 40000
+    assert sum(histogram._counts.values()) == 40000
+    assert snapshot["max"] == 9999e-6
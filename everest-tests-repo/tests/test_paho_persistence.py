@@ -0,0 +1,144 @@
+import os
+
+import pytest
+
+import paho.mqtt.client as mqtt
+from paho.mqtt.enums import CallbackAPIVersion
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.persistence import _RECORD, FilePersistence
+from paho.mqtt.properties import Properties
+
+
+def message(mid, payload=b"payload", topic=b"a/b", qos=1, state=mqtt.mqtt_ms_wait_for_puback):
+    msg = mqtt.MQTTMessage(mid, topic)
+    msg.payload = payload
+    msg.qos = qos
+    msg.state = state
+    return msg
+
+
+def summary(messages):
+    return [(m.mid, m.topic, m.payload, m.qos, m.retain, m.dup, m.state) for m in messages]
+
+
+def segments(path):
+    return sorted(name for name in os.listdir(path) if name.endswith(".log"))
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path)
+    with FilePersistence(path) as store:
+        props = Properties(PacketTypes.PUBLISH)
+        props.UserProperty = ("k", "v")
+        first = message(7)
+        first.retain = True
+        first.properties = props
+        store.add_out(first)
+        store.add_out(message(3, b"queued", state=mqtt.mqtt_ms_queued))
+        store.add_out(message(5, b"gone"))
+        store.add_in(message(9, b"in", qos=2, state=mqtt.mqtt_ms_wait_for_pubrel))
+        store.add_in(message(10, b"released", qos=2, state=mqtt.mqtt_ms_wait_for_pubrel))
+        first.dup = True
+        first.state = mqtt.mqtt_ms_publish
+        store.update_out(first)
+        store.remove_out(5)
+        store.remove_in(10)
+
+    with FilePersistence(path) as store:
+        out_messages, in_messages = store.load()
+        # In the order they were added, the payload of queued messages is
+        # only read when needed
+        assert summary(out_messages) == [
+            (7, "a/b", b"payload", 1, True, True, mqtt.mqtt_ms_publish),
+            (3, "a/b", b"", 1, False, False, mqtt.mqtt_ms_queued),
+        ]
+        assert out_messages[0].properties.UserProperty == [("k", "v")]
+        assert store.payload(3) == b"queued"
+        with pytest.raises(KeyError):
+            store.payload(5)
+        assert summary(in_messages) == [(9, "a/b", b"in", 2, False, False, mqtt.mqtt_ms_wait_for_pubrel)]
+        store.clear_in()
+        assert store.load()[1] == []
+
+
+def test_client_loads_stored_messages(tmp_path):
+    client = mqtt.Client(CallbackAPIVersion.VERSION2, client_id="c", clean_session=False)
+    client.persistence = FilePersistence(str(tmp_path))
+    for i in range(3):
+        client.publish("t", b"%d" % i, qos=1)
+    client.persistence.close()
+
+    other = mqtt.Client(CallbackAPIVersion.VERSION2, client_id="c", clean_session=False)
+    other.persistence = FilePersistence(str(tmp_path))
+    other.max_inflight_messages = 2
+    # Published while disconnected, the messages wait in the queue without
+    # their payload
+    assert list(other._out_messages) == [1, 2, 3]
+    assert [(m.mid, m.payload) for m in other._out_queue] == [(1, b""), (2, b""), (3, b"")]
+    assert other.publish("t", b"x", qos=1).mid == 4
+
+    # The payload is read back when the message takes a slot of the window
+    other._messages_reconnect_reset_out()
+    assert [(m.mid, m.payload) for m in other._out_inflight.values()] == [(1, b"0"), (2, b"1")]
+    assert [(m.mid, m.payload) for m in other._out_queue] == [(3, b""), (4, b"")]
+    other.persistence.close()
+
+
+def test_compaction(tmp_path):
+    path = str(tmp_path)
+    record_size = _RECORD.size + 3 + 100
+    with FilePersistence(path, segment_size=4 * record_size) as store:
+        # An old message that is never acknowledged
+        store.add_in(message(1, b"o" * 100, qos=2, state=mqtt.mqtt_ms_wait_for_pubrel))
+        for mid in range(1, 40):
+            store.add_out(message(mid, b"%03d" % mid * 33 + b"x"))
+            if mid > 2:
+                store.remove_out(mid - 2)
+        # The old message is copied forward instead of keeping its segment
+        assert "00000001.log" not in segments(path)
+        assert len(segments(path)) <= 2
+        out_messages, in_messages = store.load()
+        assert [(m.mid, m.payload) for m in out_messages] == [
+            (mid, b"%03d" % mid * 33 + b"x") for mid in (38, 39)]
+        assert [m.payload for m in in_messages] == [b"o" * 100]
+
+    # Everything is still there once reopened
+    with FilePersistence(path, segment_size=4 * record_size) as store:
+        out_messages, in_messages = store.load()
+        assert [m.mid for m in out_messages] == [38, 39]
+        assert len(in_messages) == 1
+
+
+def test_truncated_segment(tmp_path):
+    path = str(tmp_path)
+    with FilePersistence(path) as store:
+        store.add_out(message(1, b"first"))
+        store.add_out(message(2, b"second"))
+    # Crash in the middle of the last write: the record is incomplete
+    name = os.path.join(path, segments(path)[-1])
+    os.truncate(name, os.path.getsize(name) - 3)
+
+    with FilePersistence(path) as store:
+        out_messages, _ = store.load()
+        assert [(m.mid, m.payload) for m in out_messages] == [(1, b"first")]
+        # New records are appended after the damaged one, which is ignored
+        store.add_out(message(3, b"third"))
+    with FilePersistence(path) as store:
+        assert [(m.mid, m.payload) for m in store.load()[0]] == [(1, b"first"), (3, b"third")]
+
+
+def test_missing_segment(tmp_path):
+    path = str(tmp_path)
+    with FilePersistence(path, segment_size=_RECORD.size + 20) as store:
+        store.add_out(message(1))
+        store.add_out(message(2))
+    os.remove(os.path.join(path, segments(path)[0]))
+    with FilePersistence(path) as store:
+        assert [m.mid for m in store.load()[0]] == [2]
+
+
+def test_not_an_index(tmp_path):
+    with open(tmp_path / "index", "wb") as f:
+        f.write(b"something else")
+    with pytest.raises(ValueError):
+        FilePersistence(str(tmp_path))
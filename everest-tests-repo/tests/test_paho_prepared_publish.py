@@ -0,0 +1,64 @@
+import pytest
+
+import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from broker import make_connected, read_packet
+
+
+@pytest.fixture(params=[mqtt.MQTTv311, mqtt.MQTTv5])
+def pair(request):
+    client, sock, broker = make_connected(protocol=request.param)
+    broker.settimeout(5)
+    yield client, broker
+    sock.close()
+    broker.close()
+
+
+def properties():
+    props = Properties(PacketTypes.PUBLISH)
+    props.ContentType = "text/plain"
+    props.UserProperty = ("a", "1")
+    return props
+
+
+@pytest.mark.parametrize("qos", [0, 1, 2])
+def test_same_packets_as_publish(pair, qos):
+    client, broker = pair
+    props = properties() if client._protocol == mqtt.MQTTv5 else None
+    template = client.prepared_publish("a/b", qos=qos, retain=True, properties=props)
+    for payload in (b"1", "text", 42, None):
+        client.publish("a/b", payload, qos=qos, retain=True, properties=props)
+        info = template.publish(payload)
+        assert info.rc == mqtt.MQTTErrorCode.MQTT_ERR_SUCCESS
+        expected = read_packet(broker)
+        # Only the message id differs
+        if qos:
+            assert info.mid == client._last_mid
+            expected = (expected[0], expected[1][:5] + info.mid.to_bytes(2, "big") + expected[1][7:])
+        assert read_packet(broker) == expected
+
+
+def test_properties_encoded_once():
+    client, sock, broker = make_connected(protocol=mqtt.MQTTv5)
+    props = properties()
+    template = client.prepared_publish("t", properties=props)
+    props.ContentType = "changed"
+    template.publish(b"x")
+    _, body = read_packet(broker)
+    sock.close()
+    broker.close()
+    assert b"text/plain" in body
+    assert b"changed" not in body
+
+
+def test_invalid(pair):
+    client, _ = pair
+    with pytest.raises(ValueError):
+        client.prepared_publish("a/#")
+    with pytest.raises(ValueError):
+        client.prepared_publish("a", qos=3)
+    if client._protocol != mqtt.MQTTv5:
+        with pytest.raises(ValueError):
+            client.prepared_publish("")
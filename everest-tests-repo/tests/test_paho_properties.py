@@ -0,0 +1,115 @@
+import copy
+import pickle
+
+import pytest
+
+from paho.mqtt import properties as properties_module
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import MalformedPacket, MQTTException, Properties
+from paho.mqtt.reasoncodes import ReasonCode
+
+
+def unpack(data, packet_type=PacketTypes.PUBLISH):
+    properties = Properties(packet_type)
+    properties.unpack(data)
+    return properties
+
+
+def test_round_trip():
+    properties = Properties(PacketTypes.PUBLISH)
+    properties.MessageExpiryInterval = 30
+    properties.ContentType = "text/plain"
+    properties.CorrelationData = b"\x00\x01"
+    properties.UserProperty = ("a", "1")
+    properties.UserProperty = ("b", "2")
+    properties.SubscriptionIdentifier = 300
+
+    received, end = Properties(PacketTypes.PUBLISH).unpack(properties.pack() + b"payload")
+    assert end == len(properties.pack())
+    assert received.MessageExpiryInterval == 30
+    assert received.ContentType == "text/plain"
+    assert received.CorrelationData == b"\x00\x01"
+    assert received.UserProperty == [("a", "1"), ("b", "2")]
+    assert received.SubscriptionIdentifier == [300]
+    assert received.pack() == properties.pack()
+
+
+@pytest.mark.parametrize("data", [
+    b"\x02\x02\x00",  # four byte integer
+    b"\x02\x23\x00",  # two byte integer
+    b"\x03\x09\x00\x05",  # binary data
+    b"\x03\x03\x00\x05",  # string
+    b"\x05\x26\x00\x01a\x00",  # string pair
+    b"\x01\x0b",  # variable byte integer
+    b"\x01\x01",  # byte
+    b"\x01\xff",  # identifier
+    b"",  # properties length
+])
+def test_truncated(data):
+    with pytest.raises(MalformedPacket):
+        unpack(data)
+
+
+@pytest.mark.parametrize("data", [
+    b"\x02\x63\x00",  # unknown identifier
+    b"\x04\x23\x00\x01\x23",  # exceeds the properties length
+    b"\x05\x03\x00\x05ab",  # exceeds the packet
+])
+def test_malformed(data):
+    with pytest.raises(MalformedPacket):
+        unpack(data)
+
+
+@pytest.mark.parametrize("data", [
+    b"\x06\x23\x00\x01\x23\x00\x02",  # twice
+    b"\x03\x23\x00\x00",  # out of range
+    b"\x02\x01\x02",  # not 0 or 1
+])
+def test_invalid_values(data):
+    with pytest.raises(MQTTException):
+        unpack(data)
+
+
+def test_not_applicable_to_packet():
+    with pytest.raises(MQTTException):
+        unpack(b"\x03\x21\x00\x01", PacketTypes.PUBLISH)
+    assert unpack(b"\x03\x21\x00\x01", PacketTypes.CONNACK).ReceiveMaximum == 1
+
+
+def test_set_after_unpack():
+    properties = unpack(b"\x03\x23\x00\x05")
+    properties.UserProperty = ("a", "1")
+    assert properties.TopicAlias == 5
+    assert properties.UserProperty == [("a", "1")]
+    del properties.TopicAlias
+    assert not hasattr(properties, "TopicAlias")
+
+
+def test_unpack_decodes_once(monkeypatch):
+    properties = Properties(PacketTypes.PUBLISH)
+    properties.ContentType = "text/plain"
+    properties.UserProperty = [("a", "1"), ("b", "2")]
+    data = properties.pack()
+
+    calls = []
+    read = properties_module._readProperties
+    monkeypatch.setattr(properties_module, "_readProperties", lambda buffer: calls.append(buffer) or read(buffer))
+    received = unpack(data)
+    assert received.UserProperty == [("a", "1"), ("b", "2")]
+    assert received.ContentType == "text/plain"
+    assert len(calls) == 1
+
+
+def test_reason_codes_can_be_modified():
+    code = ReasonCode._cached(PacketTypes.PUBACK)
+    assert code == 0 and code.getName() == "Success"
+    code.value = 0x80
+    assert code.getName() == "Unspecified error"
+    assert ReasonCode._cached(PacketTypes.PUBACK) == 0
+    assert ReasonCode._cached(PacketTypes.SUBACK, identifier=1).getName() == "Granted QoS 1"
+
+
+def test_reason_code_copy_and_pickle():
+    code = ReasonCode._cached(PacketTypes.PUBACK, identifier=0x10)
+    assert copy.deepcopy(code) == code
+    assert pickle.loads(pickle.dumps(code)).getName() == code.getName()
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+import paho.mqtt as mqtt
+import paho.mqtt.client as paho
+from paho.mqtt import publish
+from paho.mqtt.enums import CallbackAPIVersion, MQTTErrorCode
+
+from broker import Broker
+
+
+
+def test_stream_qos0(broker):
+    msgs = ((f"t/{i % 3}", f"m{i}", 0) for i in range(500))
+    stats = publish.stream(msgs, port=broker.port, inflight=10)
+    assert stats.messages == 500
+    assert len(broker.wait_published(500)) == 500
+    assert sum(stats.per_connection) == 500
+    assert [m[1] for m in broker.published if m[0] == "t/1"] == [
+        f"m{i}".encode() for i in range(1, 500, 3)]
+
+
+def test_stream_qos1(broker):
+    stats = publish.stream(
+        (("t", str(i), 1) for i in range(200)), port=broker.port, inflight=5, connections=2)
+    assert stats.messages == 200
+    assert stats.latency_max is not None
+
+
+def _stream_connection(inflight=2):
+    client = paho.Client(CallbackAPIVersion.VERSION2)
+    return publish._StreamConnection(client, inflight)
+
+
+def test_stream_qos0_not_connected_is_an_error():
+    conn = _stream_connection()
+    with pytest.raises(mqtt.MQTTException):
+        conn.publish({"topic": "t", "payload": b"x", "qos": 0}, 1)
+    assert conn.outstanding == 0
+    # The window slot has been given back
+    assert conn.window.acquire(blocking=False)
+    assert conn.window.acquire(blocking=False)
+
+
+def test_stream_qos1_not_connected_is_queued():
+    conn = _stream_connection()
+    conn.publish({"topic": "t", "payload": b"x", "qos": 1}, 1)
+    assert conn.outstanding == 1
+
+
+def test_stream_qos0_lost_on_reconnect_releases_window(monkeypatch):
+    conn = _stream_connection(inflight=1)
+    infos = []
+
+    def fake_publish(**kwargs):
+        info = paho.MQTTMessageInfo(len(infos) + 1)
+        info.rc = MQTTErrorCode.MQTT_ERR_SUCCESS
+        infos.append(info)
+        return info
+
+    monkeypatch.setattr(conn.client, "publish", fake_publish)
+    conn.publish({"topic": "t", "payload": b"x"}, 1)
+
+    # What reconnect() does to the QoS 0 messages not yet sent: they are
+    # marked as published, without calling on_publish.
+    def lose():
+        time.sleep(0.2)
+        infos[0].rc = MQTTErrorCode.MQTT_ERR_CONN_LOST
+        infos[0]._set_as_published()
+    threading.Thread(target=lose).start()
+
+    start = time.monotonic()
+    conn.publish({"topic": "t", "payload": b"x"}, 1)
+    conn.on_publish(conn.client, None, infos[1].mid, None, None)
+    infos[1]._set_as_published()
+    conn.wait_idle()
+    assert time.monotonic() - start < 3
+    assert conn.outstanding == 0
+    assert conn.qos0 == {}
+    assert len(conn.latencies) == 1
+
+
+def test_stream_no_connack():
+    broker = Broker(connack=False)
+    try:
+        conn = _stream_connection()
+        conn.client.connect("127.0.0.1", broker.port)
+        conn.client.loop_start()
+        start = time.monotonic()
+        with pytest.raises(mqtt.MQTTException):
+            conn.wait_connected(1.0)
+        assert time.monotonic() - start < 3
+        conn.client.disconnect()
+        conn.client.loop_stop()
+    finally:
+        broker.close()
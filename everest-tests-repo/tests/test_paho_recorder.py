@@ -0,0 +1,41 @@
+import struct
+
+from paho.mqtt.recorder import Recorder, Recording
+
+from broker import make_connected, publish_packet, read_all, read_packet
+
+MESSAGES = [
+    ("a/b", b"1", 0, False),
+    ("c", b"", 1, True),
+    ("a/b", b"x" * 300, 1, False),
+    ("c", bytes(range(256)) * 100, 0, True),
+]
+
+
+def test_record_and_replay_received_messages(tmp_path):
+    path = str(tmp_path / "session.rec")
+    client, sock, broker = make_connected()
+    with Recorder(path, index_interval=2) as recorder:
+        client.on_message = recorder.on_message
+        data = b"".join(
+            publish_packet(topic, payload, qos, mid, retain)
+            for mid, (topic, payload, qos, retain) in enumerate(MESSAGES, 1))
+        read_all(client, broker, data, [7] * (len(data) // 7) + [len(data) % 7])
+        assert recorder.count == len(MESSAGES)
+    sock.close()
+    broker.close()
+
+    with Recording(path) as recording:
+        assert recording.topics == ["a/b", "c"]
+        assert [(msg.topic, bytes(msg.payload), msg.qos, msg.retain) for msg in recording.iter_messages()] == MESSAGES
+
+        client, sock, broker = make_connected()
+        assert recording.replay(client, speed=None) == len(MESSAGES)
+        for topic, payload, qos, retain in MESSAGES:
+            command, body = read_packet(broker)
+            assert command == 0x30 | qos << 1 | retain
+            length, = struct.unpack_from("!H", body)
+            assert body[2:2 + length].decode() == topic
+            assert body[2 + length + (2 if qos else 0):] == payload
+        sock.close()
+        broker.close()
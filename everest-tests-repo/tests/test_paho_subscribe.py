@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from paho.mqtt import subscribe
+from paho.mqtt.client import MQTTMessage
+
+from broker import publish_packet
+
+
+def wait_connected(messages):
+    deadline = time.monotonic() + 5
+    while not messages.client.is_connected():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_stream(broker):
+    with subscribe.stream("a/#", port=broker.port, retained=False) as messages:
+        wait_connected(messages)
+        broker.connections[-1].sendall(
+            publish_packet("a/1", b"1")
+            + publish_packet("a/old", b"r", retain=True)
+            + publish_packet("a/2", b"2", qos=1))
+        received = [messages.get(timeout=5) for _ in range(2)]
+        assert [(m.topic, m.payload) for m in received] == [("a/1", b"1"), ("a/2", b"2")]
+        with pytest.raises(TimeoutError):
+            messages.get(timeout=0.05)
+    # Iteration stops once closed
+    assert list(messages) == []
+    assert messages.closed
+
+
+def test_stream_async(broker):
+    async def main():
+        with subscribe.stream("a/#", port=broker.port) as messages:
+            await asyncio.get_running_loop().run_in_executor(None, wait_connected, messages)
+            broker.connections[-1].sendall(publish_packet("a/1", b"1") + publish_packet("a/2", b"2"))
+            topics = []
+            async for message in messages:
+                topics.append(message.topic)
+                if len(topics) == 2:
+                    messages.close()
+            return topics
+
+    assert asyncio.run(asyncio.wait_for(main(), 10)) == ["a/1", "a/2"]
+
+
+def make_message(n):
+    return MQTTMessage(n, b"t")
+
+
+@pytest.mark.parametrize("overflow, kept", [
+    (subscribe.DROP_OLDEST, [2, 3, 4]),
+    (subscribe.DROP_NEWEST, [0, 1, 2]),
+])
+def test_overflow_drop(overflow, kept):
+    messages = subscribe.MessageStream(3, overflow)
+    for n in range(5):
+        messages._put(make_message(n))
+    messages.close()
+    assert [m.mid for m in messages] == kept
+    assert (messages.received, messages.dropped) == (5, 2)
+
+
+def test_overflow_block():
+    messages = subscribe.MessageStream(2, subscribe.BLOCK)
+
+    def put():
+        for n in range(4):
+            messages._put(make_message(n))
+
+    thread = threading.Thread(target=put)
+    thread.start()
+    time.sleep(0.1)
+    # The producer waits for room in the queue
+    assert thread.is_alive()
+    assert len(messages) == 2
+    assert [messages.get(timeout=5).mid for _ in range(4)] == [0, 1, 2, 3]
+    thread.join(5)
+    assert messages.dropped == 0
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        subscribe.MessageStream(0, subscribe.BLOCK)
+    with pytest.raises(ValueError):
+        subscribe.MessageStream(1, "other")
+    with pytest.raises(ValueError):
+        subscribe.stream("t", qos=3)
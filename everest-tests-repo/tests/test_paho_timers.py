@@ -0,0 +1,67 @@
+import math
+import threading
+
+from paho.mqtt import client as mqtt
+from paho.mqtt.timers import TimerWheel
+
+from broker import packet
+
+
+def test_expiry_order():
+    wheel = TimerWheel(1, now=0)
+    for key, deadline in (("a", 3), ("b", 70), ("c", 5000), ("d", 3)):
+        wheel.schedule(key, deadline)
+    wheel.cancel("d")
+    assert wheel.next_expiry(0) == 3
+    assert wheel.advance(2) == []
+    assert wheel.advance(3) == ["a"]
+    assert wheel.advance(69) == []
+    assert wheel.advance(100) == ["b"]
+    assert wheel.advance(10 ** 6) == ["c"]
+    assert len(wheel) == 0
+    assert wheel.next_expiry(10 ** 6) == math.inf
+
+
+def test_concurrent_use():
+    wheel = TimerWheel(1, now=0)
+    expired = []
+    errors = []
+
+    def schedule(base):
+        try:
+            for i in range(2000):
+                key = (base, i)
+                wheel.schedule(key, i % 300 + 1)
+                if i % 3 == 0:
+                    wheel.cancel(key)
+        except Exception as err:  # pragma: no cover
+            errors.append(err)
+
+    threads = [threading.Thread(target=schedule, args=(base,)) for base in range(4)]
+    for thread in threads:
+        thread.start()
+    now = 0
+    while any(thread.is_alive() for thread in threads):
+        now += 1
+        expired += wheel.advance(now)
+    for thread in threads:
+        thread.join()
+    expired += wheel.advance(10 ** 6)
+
+    assert not errors
+    # A timer may expire before being cancelled, the others expire once
+    assert len(expired) == len(set(expired))
+    kept = {(base, i) for base in range(4) for i in range(2000) if i % 3}
+    assert kept <= set(expired)
+    assert len(wheel) == 0
+
+
+def test_pingresp_cancels_timer(connected):
+    client, broker = connected
+    client._keepalive = 60
+    assert client._send_pingreq() == mqtt.MQTTErrorCode.MQTT_ERR_SUCCESS
+    assert mqtt._TIMER_PINGRESP in client._timers
+    broker.sendall(packet(0xD0, b""))
+    client.loop_read()
+    assert client._ping_t == 0
+    assert mqtt._TIMER_PINGRESP not in client._timers
@@ -0,0 +1,126 @@
+import struct
+
+import pytest
+
+import paho.mqtt.client as mqtt
+from paho.mqtt.enums import MQTTErrorCode
+
+from broker import encode_length, make_connected, packet, read_packet, received_messages
+
+
+def publish_v5(topic, payload, alias=None):
+    props = b"" if alias is None else b"\x23" + struct.pack("!H", alias)
+    body = struct.pack("!H", len(topic)) + topic.encode() + encode_length(len(props)) + props
+    return packet(0x30, body + payload)
+
+
+def connack_v5(topic_alias_maximum):
+    props = b"\x22" + struct.pack("!H", topic_alias_maximum)
+    return packet(0x20, b"\x00\x00" + encode_length(len(props)) + props)
+
+
+@pytest.fixture
+def client_v5():
+    client, sock, broker = make_connected(protocol=mqtt.MQTTv5)
+    yield client, broker
+    sock.close()
+    broker.close()
+
+
+def test_incoming_aliases(client_v5):
+    client, broker = client_v5
+    client._in_topic_alias_max = 2
+    messages = received_messages(client)
+    broker.sendall(
+        publish_v5("a", b"1", alias=1)
+        + publish_v5("", b"2", alias=1)
+        + publish_v5("b", b"3", alias=1)
+        + publish_v5("", b"4", alias=1)
+        + publish_v5("c", b"5"))
+    assert client.loop_read() == MQTTErrorCode.MQTT_ERR_SUCCESS
+    assert [(m.topic, m.payload) for m in messages] == [
+        ("a", b"1"), ("a", b"2"), ("b", b"3"), ("b", b"4"), ("c", b"5")]
+
+
+@pytest.mark.parametrize("data", [
+    # Alias above our Topic Alias Maximum
+    publish_v5("a", b"", alias=3),
+    # Alias never assigned
+    publish_v5("", b"", alias=2),
+    # Empty topic without an alias
+    publish_v5("", b""),
+])
+def test_incoming_invalid_alias(client_v5, data):
+    client, broker = client_v5
+    client._in_topic_alias_max = 2
+    messages = received_messages(client)
+    broker.sendall(publish_v5("a", b"", alias=1) + data)
+    assert client.loop_read() == MQTTErrorCode.MQTT_ERR_PROTOCOL
+    assert len(messages) == 1
+
+
+def test_incoming_alias_not_allowed(client_v5):
+    # Without a Topic Alias Maximum in CONNECT, the broker may not use aliases
+    client, broker = client_v5
+    broker.sendall(publish_v5("a", b"", alias=1))
+    assert client.loop_read() == MQTTErrorCode.MQTT_ERR_PROTOCOL
+
+
+def sent_publishes(client, broker, count):
+    client.loop_write()
+    sent = []
+    for _ in range(count):
+        _, body = read_packet(broker)
+        topic_len = struct.unpack("!H", body[:2])[0]
+        topic = body[2:2 + topic_len].decode()
+        props = body[2 + topic_len:]
+        props_len = props[0]
+        alias = None
+        if props_len:
+            assert props[1] == 0x23
+            alias = struct.unpack("!H", props[2:4])[0]
+        sent.append((topic, alias, props[1 + props_len:]))
+    return sent
+
+
+def test_outgoing_aliases(client_v5):
+    client, broker = client_v5
+    client._max_topic_aliases = 2
+    broker.sendall(connack_v5(3))
+    client.loop_read()
+    # The smaller of the two maximums is used
+    assert client._out_topic_alias_max == 2
+
+    for topic in ["a", "b", "a", "c", "b", "a"]:
+        client.publish(topic, topic.encode())
+    assert sent_publishes(client, broker, 6) == [
+        ("a", 1, b"a"),
+        ("b", 2, b"b"),
+        ("", 1, b"a"),
+        # The alias of the least recently used topic is reassigned
+        ("c", 2, b"c"),
+        ("b", 1, b"b"),
+        ("a", 2, b"a"),
+    ]
+
+
+def test_outgoing_alias_set_by_caller(client_v5):
+    client, broker = client_v5
+    client._max_topic_aliases = 2
+    broker.sendall(connack_v5(2))
+    client.loop_read()
+    properties = mqtt.Properties(mqtt.PacketTypes.PUBLISH)
+    properties.TopicAlias = 2
+    client.publish("a", b"1", properties=properties)
+    client.publish("b", b"2")
+    assert sent_publishes(client, broker, 2) == [("a", 2, b"1"), ("b", 1, b"2")]
+
+
+def test_outgoing_aliases_disabled_by_broker(client_v5):
+    client, broker = client_v5
+    client._max_topic_aliases = 2
+    broker.sendall(connack_v5(0))
+    client.loop_read()
+    client.publish("a", b"1")
+    client.publish("a", b"2")
+    assert sent_publishes(client, broker, 2) == [("a", None, b"1"), ("a", None, b"2")]
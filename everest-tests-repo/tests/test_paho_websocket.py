@@ -0,0 +1,170 @@
+import concurrent.futures
+import os
+import socket
+import struct
+
+import pytest
+
+import paho.mqtt.client as mqtt
+
+BINARY = mqtt._WebsocketWrapper.OPCODE_BINARY
+CONTINUATION = mqtt._WebsocketWrapper.OPCODE_CONTINUATION
+PING = mqtt._WebsocketWrapper.OPCODE_PING
+PONG = mqtt._WebsocketWrapper.OPCODE_PONG
+CONNCLOSE = mqtt._WebsocketWrapper.OPCODE_CONNCLOSE
+
+
+def frame(payload, opcode=BINARY, mask=None, fin=True):
+    length = len(payload)
+    maskbit = 0x80 if mask is not None else 0
+    if length < 126:
+        header = struct.pack("!BB", fin << 7 | opcode, maskbit | length)
+    elif length < 65536:
+        header = struct.pack("!BBH", fin << 7 | opcode, maskbit | 126, length)
+    else:
+        header = struct.pack("!BBQ", fin << 7 | opcode, maskbit | 127, length)
+    if mask is None:
+        return header + payload
+    return header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+def read_frame(sock):
+    """Return (opcode, payload) of the next frame sent on sock."""
+    def recv_exactly(n):
+        data = b""
+        while len(data) < n:
+            data += sock.recv(n - len(data))
+        return data
+
+    head, length = recv_exactly(2)
+    mask = length & 0x80
+    length &= 0x7f
+    if length == 126:
+        length, = struct.unpack("!H", recv_exactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", recv_exactly(8))
+    key = recv_exactly(4) if mask else None
+    payload = recv_exactly(length)
+    if key is not None:
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return head & 0x0f, payload
+
+
+@pytest.fixture
+def websocket(monkeypatch):
+    monkeypatch.setattr(mqtt._WebsocketWrapper, "_do_handshake", lambda self, headers: None)
+    sock, other = socket.socketpair()
+    sock.setblocking(False)
+    other.settimeout(5)
+    wrapper = mqtt._WebsocketWrapper(sock, "localhost", 80, False, "/mqtt", None)
+    yield wrapper, other
+    sock.close()
+    other.close()
+
+
+def recv_all(wrapper, length, size=65536):
+    data = b""
+    while len(data) < length:
+        try:
+            data += wrapper.recv(min(size, length - len(data)))
+        except BlockingIOError:
+            pass
+    return data
+
+
+@pytest.mark.parametrize("length", [0, 1, 125, 126, 300, 65535, 65536, 200000])
+@pytest.mark.parametrize("masked", [False, True])
+def test_recv_frame(websocket, length, masked):
+    wrapper, other = websocket
+    payload = os.urandom(length)
+    other.sendall(frame(payload, mask=os.urandom(4) if masked else None) + frame(b"end"))
+    assert recv_all(wrapper, length + 3) == payload + b"end"
+
+
+def test_recv_several_frames_at_once(websocket):
+    wrapper, other = websocket
+    other.sendall(frame(b"abc") + frame(b"de", mask=b"\x01\x02\x03\x04") + frame(b"") + frame(b"f"))
+    assert wrapper.recv(100) == b"abcdef"
+
+
+@pytest.mark.parametrize("masked", [False, True])
+def test_recv_in_parts(websocket, masked):
+    # Frames arriving a byte at a time, read in small parts
+    wrapper, other = websocket
+    payload = os.urandom(300)
+    data = frame(payload, mask=b"\x11\x22\x33\x44" if masked else None) + frame(b"xyz")
+    received = b""
+    for i in range(len(data)):
+        other.sendall(data[i:i + 1])
+        try:
+            received += wrapper.recv(7)
+        except BlockingIOError:
+            pass
+    received += recv_all(wrapper, len(payload) + 3 - len(received), 7)
+    assert received == payload + b"xyz"
+
+
+def test_recv_limited_leaves_pending(websocket):
+    wrapper, other = websocket
+    other.sendall(frame(b"0123456789", mask=b"\x01\x02\x03\x04"))
+    assert wrapper.recv(4) == b"0123"
+    assert wrapper.pending() == 6
+    assert wrapper.recv(100) == b"456789"
+    assert wrapper.pending() == 0
+
+
+def test_recv_fragmented_with_ping(websocket):
+    wrapper, other = websocket
+    other.sendall(
+        frame(b"abc", fin=False)
+        + frame(b"hello", opcode=PING)
+        + frame(b"def", opcode=CONTINUATION, mask=b"\x05\x06\x07\x08"))
+    assert recv_all(wrapper, 6) == b"abcdef"
+    assert read_frame(other) == (PONG, b"hello")
+
+
+def test_recv_incomplete_control_frame(websocket):
+    wrapper, other = websocket
+    data = frame(b"hello", opcode=PING)
+    other.sendall(data[:4])
+    with pytest.raises(BlockingIOError):
+        wrapper.recv(100)
+    assert wrapper.pending() == 0
+    other.sendall(data[4:] + frame(b"abc"))
+    assert recv_all(wrapper, 3) == b"abc"
+    assert read_frame(other) == (PONG, b"hello")
+
+
+def test_recv_close(websocket):
+    wrapper, other = websocket
+    other.sendall(frame(b"\x03\xe8", opcode=CONNCLOSE))
+    with pytest.raises(BlockingIOError):
+        wrapper.recv(100)
+    assert read_frame(other) == (CONNCLOSE, b"\x03\xe8")
+
+
+def test_recv_connection_closed(websocket):
+    wrapper, other = websocket
+    other.close()
+    assert wrapper.recv(100) == b""
+    assert not wrapper.connected
+
+
+@pytest.mark.parametrize("length", [0, 125, 126, 65535, 65536, 200000])
+def test_send(websocket, length):
+    wrapper, other = websocket
+    payload = os.urandom(length)
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        received = executor.submit(read_frame, other)
+        # A frame larger than the socket buffer is sent over several calls,
+        # which return 0 until it is all written
+        while True:
+            try:
+                sent = wrapper.send(payload)
+            except BlockingIOError:
+                continue
+            if not wrapper._sendbuffer:
+                break
+            assert sent == 0
+        assert sent == length
+        assert received.result(5) == (BINARY, payload)
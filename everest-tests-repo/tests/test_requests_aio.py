@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import requests
+from requests.aio import AsyncSession
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.1)
+            body = self.path.encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+@pytest.fixture
+def server(http_server):
+    return http_server(Handler)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_get(server):
+    async def main():
+        async with AsyncSession() as s:
+            return await s.get(server + "/hello", params={"a": 1})
+
+    r = run(main())
+    assert r.status_code == 200
+    assert r.text == "/hello?a=1"
+
+
+def test_stream_rejected(server):
+    async def main():
+        async with AsyncSession() as s:
+            return await s.get(server + "/", stream=True)
+
+    with pytest.raises(ValueError, match="stream=True"):
+        run(main())
+
+
+def test_environment_proxies(server, monkeypatch):
+    monkeypatch.setenv("HTTP_PROXY", "http://127.0.0.1:9")
+
+    async def main():
+        async with AsyncSession() as s:
+            return await s.get(server + "/env")
+
+    # The proxies of the environment apply, and aren't supported
+    monkeypatch.setenv("NO_PROXY", "")
+    with pytest.raises(requests.exceptions.ProxyError):
+        run(main())
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    assert run(main()).text == "/env"
+
+
+def test_explicit_proxies_rejected(server):
+    async def main():
+        async with AsyncSession() as s:
+            return await s.get(server + "/", proxies={"http": "http://127.0.0.1:9"})
+
+    with pytest.raises(requests.exceptions.ProxyError):
+        run(main())
+
+
+def test_map(server):
+    Handler.peak = 0
+    urls = [server + f"/slow/{i}" for i in range(12)]
+
+    async def main():
+        async with AsyncSession() as s:
+            reqs = (requests.Request("GET", url) for url in urls)
+            return [result async for result in s.map(reqs, max_workers=4)]
+
+    results = run(main())
+    assert sorted(result.index for result in results) == list(range(12))
+    for result in results:
+        assert result.exception is None
+        assert result.response.text == f"/slow/{result.index}"
+        assert result.elapsed.total_seconds() >= 0.1
+    assert 1 < Handler.peak <= 4
+
+
+def test_map_per_host_limit_and_errors(server):
+    Handler.peak = 0
+    reqs = [requests.Request("GET", server + f"/slow/{i}") for i in range(4)]
+    reqs.append(requests.Request("GET", "nope://host/"))
+
+    async def main():
+        async with AsyncSession() as s:
+            prepared = s.prepare_request(requests.Request("GET", server + "/prepared"))
+            return [r async for r in s.map(reqs + [prepared], max_workers=8, per_host_limit=1)]
+
+    results = {result.index: result for result in run(main())}
+    assert Handler.peak == 1
+    assert isinstance(results[4].exception, requests.exceptions.InvalidSchema)
+    assert results[5].response.text == "/prepared"
+
+
+def test_map_arguments_checked_at_call():
+    s = AsyncSession()
+    with pytest.raises(ValueError):
+        s.map([], max_workers=0)
+    with pytest.raises(ValueError):
+        s.map([], per_host_limit=0)
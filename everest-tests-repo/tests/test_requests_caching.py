@@ -0,0 +1,120 @@
+import gzip
+import os
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import requests
+from requests.caching import CachingAdapter
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body, headers=()):
+        self.send_response(code)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self._send(304, b"", [("ETag", '"v1"'), ("X-New", "1")])
+            return self._send(
+                200,
+                gzip.compress(b"etag-body"),
+                [("ETag", '"v1"'), ("Content-Encoding", "gzip"), ("Cache-Control", "no-cache")],
+            )
+        if self.path == "/last-modified":
+            if self.headers.get("If-Modified-Since"):
+                return self._send(304, b"")
+            return self._send(200, b"lm", [("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")])
+        if self.path == "/fresh":
+            return self._send(200, b"fresh", [("Cache-Control", "max-age=60")])
+        self._send(200, b"plain")
+
+
+@pytest.fixture
+def server(http_server):
+    return http_server(Handler)
+
+
+@pytest.fixture
+def session():
+    Handler.hits.clear()
+    s = requests.Session()
+    s.trust_env = False
+    yield s
+    s.close()
+
+
+def test_fresh_response_is_served_from_cache(server, session):
+    cache = CachingAdapter()
+    session.mount("http://", cache)
+    for _ in range(3):
+        assert session.get(server + "/fresh").text == "fresh"
+    assert Handler.hits["/fresh"] == 1
+    assert (cache.stats.misses, cache.stats.hits) == (1, 2)
+
+
+def test_revalidation_with_etag(server, session):
+    cache = CachingAdapter()
+    session.mount("http://", cache)
+    for _ in range(3):
+        assert session.get(server + "/etag").text == "etag-body"
+    assert Handler.hits["/etag"] == 3
+    assert cache.stats.revalidated == 2
+    # Headers of the 304 response are merged into the stored ones
+    assert session.get(server + "/etag").headers["X-New"] == "1"
+
+
+def test_revalidation_with_last_modified(server, session):
+    session.mount("http://", CachingAdapter())
+    session.get(server + "/last-modified")
+    response = session.get(server + "/last-modified")
+    assert response.status_code == 200
+    assert response.text == "lm"
+    assert Handler.hits["/last-modified"] == 2
+
+
+def test_stored_headers_describe_decoded_content(server, session):
+    session.mount("http://", CachingAdapter())
+    session.get(server + "/etag")
+    response = session.get(server + "/etag")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Content-Length"] == str(len(b"etag-body"))
+    assert response.raw.read(decode_content=True) == b"etag-body"
+
+
+def test_disk_entries_survive_the_adapter(server, session, tmp_path):
+    session.mount("http://", CachingAdapter(directory=str(tmp_path)))
+    session.get(server + "/fresh")
+    other = requests.Session()
+    other.trust_env = False
+    other.mount("http://", CachingAdapter(directory=str(tmp_path)))
+    assert other.get(server + "/fresh").text == "fresh"
+    assert Handler.hits["/fresh"] == 1
+
+
+def test_clear_only_removes_cache_files(server, session, tmp_path):
+    keep = tmp_path / "keep.txt"
+    keep.write_text("keep")
+    (tmp_path / ".tmprc").write_text("keep")
+    cache = CachingAdapter(directory=str(tmp_path))
+    session.mount("http://", cache)
+    session.get(server + "/fresh")
+    session.get(server + "/etag")
+    assert len(os.listdir(tmp_path)) == 4
+
+    cache.clear()
+    assert sorted(os.listdir(tmp_path)) == [".tmprc", "keep.txt"]
+    session.get(server + "/fresh")
+    assert Handler.hits["/fresh"] == 2
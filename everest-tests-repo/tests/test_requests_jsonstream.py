@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from requests._jsonstream import ANY, JSONStreamDecoder, parse_json_path
+from requests.exceptions import JSONDecodeError
+
+DOCUMENTS = [
+    [1, 23, -4.5e3, True, False, None, 'aé"\\', {"x": [1, {"y": 2}]}, [], {}],
+    {"data": {"items": [{"id": i, "name": "n中%d" % i} for i in range(20)]}, "n": 123},
+    [],
+    12345,
+    "text",
+]
+PATHS = [
+    "$",
+    "$[*]",
+    "$.*",
+    "$[7].x[1].y",
+    "$.data.items[*]",
+    "$.data.items[3].name",
+    "$['data'].items.*",
+    "$.n",
+]
+ENCODINGS = ["utf-8", "utf-8-sig", "utf-16-le", "utf-16-be", "utf-32-le", "utf-32-be"]
+
+
+def expected(doc, steps):
+    if not steps:
+        yield doc
+        return
+    step, rest = steps[0], steps[1:]
+    if isinstance(doc, list):
+        for index, value in enumerate(doc):
+            if step is ANY or step == index:
+                yield from expected(value, rest)
+    elif isinstance(doc, dict):
+        for key, value in doc.items():
+            if step is ANY or step == key:
+                yield from expected(value, rest)
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)] or [b""]
+
+
+@pytest.mark.parametrize("doc", DOCUMENTS)
+@pytest.mark.parametrize("encoding", ENCODINGS)
+@pytest.mark.parametrize("path", PATHS)
+def test_chunk_boundaries(doc, encoding, path):
+    steps = parse_json_path(path)
+    want = list(expected(doc, steps))
+    for indent in (None, 1):
+        raw = json.dumps(doc, ensure_ascii=False, indent=indent).encode(encoding)
+        for size in (1, 2, 3, 5, 7, 64, len(raw) or 1):
+            assert list(JSONStreamDecoder(split(raw, size), steps)) == want
+
+
+@pytest.mark.parametrize("text", [
+    b"1.5", b"-12e+3", b"true", b'"a\\"b"', b"[10, 200, 3000]", b'{"k": 123.25}',
+])
+def test_numbers_and_literals_split_anywhere(text):
+    for size in range(1, len(text) + 1):
+        assert list(JSONStreamDecoder(split(text, size), ())) == [json.loads(text)]
+
+
+def test_skipped_values_are_not_decoded():
+    calls = []
+
+    def hook(obj):
+        calls.append(obj)
+        return obj
+
+    doc = b'[{"a": 1}, {"b": {"c": "]}"}}, {"d": 3}]'
+    steps = parse_json_path("$[2]")
+    assert list(JSONStreamDecoder(split(doc, 3), steps, object_hook=hook)) == [{"d": 3}]
+    assert calls == [{"d": 3}]
+
+
+@pytest.mark.parametrize("bad", [
+    b"", b"  ", b"[1,2", b"[1 2]", b"[1,2]x", b'{"a" 1}', b"{1:2}", b"[1,]",
+    b'{"a": [1, "x', b'{"a": ]}',
+])
+@pytest.mark.parametrize("path", ["$", "$[*]", "$.zz"])
+def test_invalid_documents(bad, path):
+    for size in (1, 100):
+        with pytest.raises(JSONDecodeError):
+            list(JSONStreamDecoder(split(bad, size), parse_json_path(path)))
+
+
+def test_invalid_selected_value():
+    with pytest.raises(JSONDecodeError):
+        list(JSONStreamDecoder([b"[1, tru]"], parse_json_path("$[*]")))
+    # Skipped values are not validated
+    assert list(JSONStreamDecoder([b"[tru, 2]"], parse_json_path("$[1]"))) == [2]
+
+
+@pytest.mark.parametrize("path", ["a", "$x", "$[", "$..a", "$[-1]"])
+def test_unsupported_paths(path):
+    with pytest.raises(ValueError):
+        parse_json_path(path)
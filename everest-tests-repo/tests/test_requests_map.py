@@ -0,0 +1,75 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import requests
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(0.05)
+            body = self.path.encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+@pytest.fixture
+def server(http_server):
+    return http_server(Handler)
+
+
+@pytest.fixture
+def session():
+    Handler.peak = 0
+    s = requests.Session()
+    s.trust_env = False
+    yield s
+    s.close()
+
+
+def test_map(session, server):
+    reqs = (requests.Request("GET", server + f"/{i}") for i in range(10))
+    results = list(session.map(reqs, max_workers=3))
+    assert sorted(result.index for result in results) == list(range(10))
+    assert all(result.response.text == f"/{result.index}" for result in results)
+    assert 1 < Handler.peak <= 3
+
+
+def test_map_per_host_limit_and_errors(session, server):
+    reqs = [requests.Request("GET", server + f"/{i}") for i in range(3)]
+    reqs.append(requests.Request("GET", "nope://host/"))
+    results = {result.index: result for result in session.map(reqs, per_host_limit=1)}
+    assert Handler.peak == 1
+    assert isinstance(results[3].exception, requests.exceptions.InvalidSchema)
+    assert results[2].response.status_code == 200
+
+
+@pytest.mark.parametrize("kwargs", [{"max_workers": 0}, {"per_host_limit": 0}])
+def test_map_arguments_checked_at_call(session, kwargs):
+    with pytest.raises(ValueError):
+        session.map([], **kwargs)
+
+
+def test_map_requests_must_be_iterable(session):
+    with pytest.raises(TypeError):
+        session.map(None)
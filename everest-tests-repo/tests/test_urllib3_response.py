@@ -0,0 +1,181 @@
+import collections
+import gzip
+import io
+import random
+import zlib
+
+import pytest
+
+from urllib3.response import BytesQueueBuffer, HTTPResponse
+
+
+class OldBytesQueueBuffer:
+    """BytesQueueBuffer as it was before get_into(), the reference."""
+
+    def __init__(self):
+        self.buffer = collections.deque()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def put(self, data):
+        self.buffer.append(data)
+        self._size += len(data)
+
+    def get(self, n):
+        if n == 0:
+            return b""
+        elif not self.buffer:
+            raise RuntimeError("buffer is empty")
+        elif n < 0:
+            raise ValueError("n should be > 0")
+
+        fetched = 0
+        ret = io.BytesIO()
+        while fetched < n:
+            remaining = n - fetched
+            chunk = self.buffer.popleft()
+            chunk_length = len(chunk)
+            if remaining < chunk_length:
+                left_chunk, right_chunk = chunk[:remaining], chunk[remaining:]
+                ret.write(left_chunk)
+                self.buffer.appendleft(right_chunk)
+                self._size -= remaining
+                break
+            else:
+                ret.write(chunk)
+                self._size -= chunk_length
+            fetched += chunk_length
+
+            if not self.buffer:
+                break
+
+        return ret.getvalue()
+
+    def get_all(self):
+        buffer = self.buffer
+        if not buffer:
+            return b""
+        if len(buffer) == 1:
+            result = buffer.pop()
+        else:
+            result = b"".join(buffer)
+            buffer.clear()
+        self._size = 0
+        return result
+
+
+def outcome(function, *args):
+    try:
+        result = function(*args)
+    except Exception as e:
+        return type(e)
+    assert type(result) is bytes
+    return result
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_buffer_matches_old_behaviour(seed):
+    rnd = random.Random(seed)
+    new, old = BytesQueueBuffer(), OldBytesQueueBuffer()
+    for _ in range(300):
+        op = rnd.random()
+        if op < 0.4:
+            data = rnd.randbytes(rnd.randrange(0, 40))
+            new.put(data)
+            old.put(data)
+        elif op < 0.75:
+            n = rnd.randrange(-1, 60)
+            assert outcome(new.get, n) == outcome(old.get, n)
+        elif op < 0.9:
+            view = memoryview(bytearray(rnd.randrange(0, 60)))
+            count = new.get_into(view)
+            expected = old.get(len(view)) if old.buffer else b""
+            assert view[:count] == expected
+        else:
+            assert outcome(new.get_all) == outcome(old.get_all)
+        assert len(new) == len(old)
+
+
+def test_buffer_returns_whole_chunks_without_copy():
+    chunk = b"abc"
+    buffer = BytesQueueBuffer()
+    buffer.put(chunk)
+    buffer.put(b"d")
+    assert buffer.get(3) is chunk
+    assert buffer.get_all() == b"d"
+    buffer.put(chunk)
+    assert buffer.get_all() is chunk
+
+
+BODY = random.Random(0).randbytes(100000) + b"x" * 100000
+
+
+def response(encoding):
+    headers = {}
+    data = BODY
+    if encoding == "gzip":
+        data = gzip.compress(BODY)
+        headers["content-encoding"] = "gzip"
+    elif encoding == "deflate":
+        data = zlib.compress(BODY)
+        headers["content-encoding"] = "deflate"
+    r = HTTPResponse(
+        body=io.BytesIO(data), headers=headers, status=200, preload_content=False
+    )
+    return r, len(data)
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip", "deflate"])
+@pytest.mark.parametrize("size", [1000, 8192, 12345, 300000])
+@pytest.mark.parametrize("method", ["readinto", "readinto1"])
+def test_readinto(encoding, size, method):
+    r, length = response(encoding)
+    buf = bytearray(size)
+    out = bytearray()
+    while True:
+        n = getattr(r, method)(buf)
+        if not n:
+            break
+        assert n <= size
+        out += buf[:n]
+    assert out == BODY
+    assert r.tell() == length
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip"])
+def test_readinto_mixed_with_read(encoding):
+    r, _ = response(encoding)
+    buf = bytearray(7000)
+    out = bytearray()
+    for i in range(10000):
+        if i % 3 == 0:
+            data = r.read(1000)
+        elif i % 3 == 1:
+            data = r.read1(5000)
+        else:
+            data = buf[: r.readinto(buf)]
+        if not data and i % 3 != 1:
+            break
+        out += data
+    assert out == BODY
+
+
+def test_buffered_reader():
+    r, _ = response("gzip")
+    assert io.BufferedReader(r, 8192).read() == BODY
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "deflate"])
+def test_read_empty_body(encoding):
+    # Decoding gives no data at all, the buffer only holds empty chunks
+    data = gzip.compress(b"") if encoding == "gzip" else zlib.compress(b"")
+    r = HTTPResponse(
+        body=io.BytesIO(data),
+        headers={"content-encoding": encoding},
+        status=200,
+        preload_content=False,
+    )
+    assert r.read(10) == b""
+    assert r.read(10) == b""